@@ -0,0 +1,276 @@
+﻿# -*- coding: utf-8 -*-
+import xbmc
+import xbmcgui
+
+import images
+import inventory
+import picker
+import refdata
+
+# --- Actions de modification de l'inventaire (RunPlugin depuis les menus contextuels) ---
+def add_brainrot(base_name):
+    """Ajoute un Brainrot existant dans une base, avec sélection visuelle + mutation + traits"""
+    dialog = xbmcgui.Dialog()
+
+    # === Étape 1 : Choisir le Brainrot (rareté puis fiche, voir picker.py) ===
+    try:
+        position = picker.choose_brainrot(dialog)
+        if position is None:
+            return
+        selected_brainrot = refdata.catalog_records([position])[0]
+        mutations, traits = refdata.load('mutations', 'traits')
+    except OSError as e:
+        dialog.ok("Erreur", f"Fichier introuvable : {e.filename}")
+        return
+    except ValueError as e:
+        dialog.ok("Erreur JSON", f"Impossible de lire les données de référence :\n{e}")
+        return
+
+    # === Étape 2 : Choisir la Mutation ===
+    mutation_items = [xbmcgui.ListItem(label=m.get('Name'), label2=f"x{m.get('Multiplier')}") for m in mutations]
+    mut_idx = dialog.select("Sélectionnez une Mutation", mutation_items, useDetails=True)
+    if mut_idx == -1:
+        return
+    selected_mutation = mutations[mut_idx]
+
+    # === Étape 3 : Choisir les Traits (multi-sélection) ===
+    missing_images = []
+    trait_items = []
+    for t in traits:
+        li = xbmcgui.ListItem(label=t.get('Name'), label2=f"x{t.get('Multiplier')}")
+        li.setArt(images.art('traits', t.get('Image', ''), missing_images) or {'icon': 'DefaultFolder.png'})
+        trait_items.append(li)
+    images.report_missing('traits', missing_images)
+
+    sel_traits_idx = dialog.multiselect("Sélectionnez les Traits", trait_items, useDetails=True)
+    selected_traits = [traits[i] for i in sel_traits_idx] if sel_traits_idx else []
+
+    # === Étape 4 : Création de la référence (la fiche reste dans le catalogue) ===
+    mutation_name = selected_mutation.get("Name", "")
+    trait_names = [t.get("Name", "") for t in selected_traits]
+    new_brainrot = inventory.make_entry(inventory.new_instance_id(), selected_brainrot.get("Id"), mutation_name, trait_names)
+
+    try:
+        inventory.commit({"op": "add_brainrots", "base": base_name, "entries": [new_brainrot]})
+    except inventory.InventoryError as e:
+        dialog.ok("Erreur", str(e))
+        return
+    picker.record_use(selected_brainrot.get("Id"), position)
+
+    dialog.notification("Brainrot ajouté", f"{selected_brainrot.get('Name', 'Inconnu')} dans {base_name}", xbmcgui.NOTIFICATION_INFO, 2500)
+    xbmc.executebuiltin("Container.Refresh")
+
+def delete_brainrot(base_name, brainrot_id):
+    """Supprime un brainrot d'une base"""
+    try:
+        result = inventory.commit({"op": "delete_brainrots", "base": base_name, "ids": [brainrot_id]})
+    except inventory.InventoryError as e:
+        xbmcgui.Dialog().notification("Aucun changement", str(e), xbmcgui.NOTIFICATION_WARNING, 2500)
+        return
+
+    name = inventory.resolve_brainrot(result["removed"][0]).get("Name", brainrot_id)
+    xbmcgui.Dialog().notification("Brainrot supprimé", f"{name} retiré de {base_name}", xbmcgui.NOTIFICATION_INFO, 2500)
+    xbmc.executebuiltin("Container.Refresh")  # 🔄 rafraîchir
+
+def move_brainrot(base_name, brainrot_id):
+    """Déplace un brainrot d'une base vers une autre via sélection de base"""
+    dialog = xbmcgui.Dialog()
+
+    try:
+        source_base = inventory.get_base(base_name)
+        base_names = [name for name, _ in inventory.base_summaries() if name != base_name]
+    except OSError as e:
+        dialog.ok("Erreur", f"Inventaire inaccessible :\n{e}")
+        return
+    except ValueError as e:
+        dialog.ok("Erreur JSON", f"Impossible de lire l'inventaire :\n{e}")
+        return
+
+    # Trouve la base source et le brainrot à déplacer
+    if not source_base:
+        dialog.ok("Erreur", f"Base source '{base_name}' introuvable.")
+        return
+
+    brainrot = next((br for br in source_base.get("Brainrots", []) if br.get("Id") == brainrot_id), None)
+    if not brainrot:
+        dialog.ok("Erreur", f"Brainrot introuvable dans {base_name}")
+        return
+
+    # Liste des autres bases disponibles
+    if not base_names:
+        dialog.ok("Aucune autre base", "Il n'y a pas d'autre base où déplacer ce Brainrot.")
+        return
+
+    brainrot_label = inventory.resolve_brainrot(brainrot).get("Name", brainrot_id)
+    idx = dialog.select(f"Déplacer {brainrot_label} vers quelle base ?", base_names)
+    if idx == -1:
+        return
+
+    target_name = base_names[idx]
+
+    # Déplace le brainrot
+    try:
+        inventory.commit({"op": "move_brainrots", "base": base_name, "ids": [brainrot_id], "target": target_name})
+    except inventory.InventoryError as e:
+        dialog.ok("Erreur", str(e))
+        return
+
+    dialog.notification(
+        "🔁 Brainrot déplacé",
+        f"{brainrot_label} → {target_name}",
+        xbmcgui.NOTIFICATION_INFO, 2500
+    )
+    xbmc.executebuiltin("Container.Refresh")
+
+# --- Actions groupées : une sélection, une seule écriture, un seul rafraîchissement ---
+BULK_OPERATIONS = [
+    ("move", "Déplacer vers une autre base"),
+    ("copy", "Copier vers une autre base"),
+    ("delete", "Supprimer"),
+    ("mutation", "Appliquer une mutation"),
+    ("traits", "Ajouter des traits"),
+]
+
+def bulk_brainrots(base_name):
+    """Applique une opération à plusieurs brainrots d'une base, choisis par multi-sélection"""
+    import render
+    dialog = xbmcgui.Dialog()
+
+    try:
+        base = inventory.get_base(base_name)
+        base_names = [name for name, _ in inventory.base_summaries() if name != base_name]
+    except OSError as e:
+        dialog.ok("Erreur", f"Inventaire inaccessible :\n{e}")
+        return
+    except ValueError as e:
+        dialog.ok("Erreur JSON", f"Impossible de lire l'inventaire :\n{e}")
+        return
+    if not base:
+        dialog.ok("Erreur", f"Base '{base_name}' introuvable.")
+        return
+    brainrots = base.get("Brainrots", [])
+    if not brainrots:
+        dialog.notification("Aucune brainrot", f"La base {base_name} est vide.", xbmcgui.NOTIFICATION_INFO, 2500)
+        return
+
+    # === Étape 1 : Sélection des brainrots ===
+    labels = [row.label for row in render.owned_rows(brainrots)]
+    selected = dialog.multiselect(f"Brainrots de {base_name}", labels)
+    if not selected:
+        return
+    ids = list(dict.fromkeys(brainrots[i].get("Id") for i in selected))
+
+    # === Étape 2 : Choix de l'opération et de ses paramètres ===
+    idx = dialog.select(f"{len(selected)} brainrot(s) sélectionné(s)", [label for _, label in BULK_OPERATIONS])
+    if idx == -1:
+        return
+    kind = BULK_OPERATIONS[idx][0]
+    if kind in ("move", "copy"):
+        if not base_names:
+            dialog.ok("Aucune autre base", "Il n'y a pas d'autre base de destination.")
+            return
+        target = dialog.select("Vers quelle base ?", base_names)
+        if target == -1:
+            return
+        op = {"op": f"{kind}_brainrots", "base": base_name, "ids": ids, "target": base_names[target]}
+        if kind == "copy":
+            op["new_ids"] = [inventory.new_instance_id() for _ in ids]
+    elif kind == "delete":
+        if not dialog.yesno("Supprimer", f"Supprimer {len(selected)} brainrot(s) de {base_name} ?"):
+            return
+        op = {"op": "delete_brainrots", "base": base_name, "ids": ids}
+    elif kind == "mutation":
+        mutations = refdata.get_mutations()
+        m_idx = dialog.select("Mutation à appliquer", [f"{m.get('Name')} (x{m.get('Multiplier')})" for m in mutations])
+        if m_idx == -1:
+            return
+        op = {"op": "update_brainrots", "base": base_name, "ids": ids, "mutation": mutations[m_idx].get("Name", "")}
+    else:
+        traits = refdata.get_traits()
+        t_idx = dialog.multiselect("Traits à ajouter", [f"{t.get('Name')} (x{t.get('Multiplier')})" for t in traits])
+        if not t_idx:
+            return
+        op = {"op": "update_brainrots", "base": base_name, "ids": ids, "traits": [traits[i].get("Name", "") for i in t_idx]}
+
+    # === Étape 3 : Une seule opération enregistrée ===
+    try:
+        result = inventory.commit(op)
+    except inventory.InventoryError as e:
+        dialog.ok("Erreur", str(e))
+        return
+
+    count = len(result.get("added") or result.get("removed") or [])
+    messages = {
+        "move": f"{count} brainrot(s) → {op.get('target')}",
+        "copy": f"{count} brainrot(s) copié(s) dans {op.get('target')}",
+        "delete": f"{count} brainrot(s) retiré(s) de {base_name}",
+        "mutation": f"Mutation {op.get('mutation')} appliquée à {count} brainrot(s)",
+        "traits": f"{', '.join(op.get('traits', []))} ajouté(s) à {count} brainrot(s)",
+    }
+    dialog.notification(BULK_OPERATIONS[idx][1], messages[kind], xbmcgui.NOTIFICATION_INFO, 2500)
+    xbmc.executebuiltin("Container.Refresh")
+
+def add_base():
+    """Ajoute une nouvelle base à l'inventaire"""
+    name = xbmcgui.Dialog().input("Nom de la nouvelle base :", type=xbmcgui.INPUT_ALPHANUM)
+    if not name:
+        return
+
+    try:
+        inventory.commit({"op": "add_base", "name": name})
+    except inventory.InventoryError as e:
+        xbmcgui.Dialog().ok("Erreur", str(e))
+        return
+
+    xbmcgui.Dialog().notification("Base ajoutée", f"{name} a été créée.", xbmcgui.NOTIFICATION_INFO, 3000)
+    xbmc.executebuiltin("Container.Refresh")
+
+def delete_base(name):
+    """Supprime une base par son nom"""
+    try:
+        inventory.commit({"op": "delete_base", "name": name})
+    except inventory.InventoryError as e:
+        xbmcgui.Dialog().ok("Erreur", str(e))
+        return
+
+    xbmcgui.Dialog().notification("Base supprimée", f"{name} a été retirée.", xbmcgui.NOTIFICATION_INFO, 3000)
+    xbmc.executebuiltin("Container.Refresh")
+
+def rename_base(name):
+    """Renomme une base existante"""
+    new_name = xbmcgui.Dialog().input("Nouveau nom pour la base :", defaultt=name, type=xbmcgui.INPUT_ALPHANUM)
+    if not new_name or new_name == name:
+        return
+
+    try:
+        inventory.commit({"op": "rename_base", "name": name, "new_name": new_name})
+    except inventory.InventoryError as e:
+        xbmcgui.Dialog().ok("Erreur", str(e))
+        return
+
+    xbmcgui.Dialog().notification("Base renommée", f"{name} → {new_name}", xbmcgui.NOTIFICATION_INFO, 3000)
+    xbmc.executebuiltin("Container.Refresh")
+
+def switch_account():
+    """Change de compte : chaque compte a son propre inventaire (dossier accounts/<nom>)"""
+    import paths
+    dialog = xbmcgui.Dialog()
+    current = paths.account_name()
+    accounts = paths.accounts()
+    labels = [f"{name} (actif)" if name == current else name for name in accounts] + ["Nouveau compte..."]
+    idx = dialog.select("Changer de compte", labels)
+    if idx == -1:
+        return
+    if idx == len(accounts):
+        name = dialog.input("Nom du nouveau compte :", type=xbmcgui.INPUT_ALPHANUM)
+        if not name.strip():
+            return
+        folder = paths.account_folder(name)
+    else:
+        folder = accounts[idx]
+    if folder == current:
+        return
+
+    paths.addon.setSetting('account', '' if folder == paths.DEFAULT_ACCOUNT else folder)
+    xbmcgui.Dialog().notification("Compte", f"Compte actif : {folder}", xbmcgui.NOTIFICATION_INFO, 3000)
+    xbmc.executebuiltin("Container.Refresh")
@@ -0,0 +1,223 @@
+﻿# -*- coding: utf-8 -*-
+import os
+import json
+import xbmcgui
+import xbmcplugin
+
+import images
+import income
+import inventory
+import render
+from formatting import format_money
+from paths import addon, base_fanart_path
+from plugin import handle, build_url
+
+# --- Vues de l'inventaire : bases, contenu d'une base et classement des revenus ---
+def show_all_bases():
+    """Affiche la liste des bases du compte actif avec menu contextuel"""
+    xbmcplugin.setPluginCategory(handle, "Brainrot Manager")
+    xbmcplugin.setContent(handle, "movies")
+
+    # Même image pour toutes les bases : un seul appel système
+    image_path = base_fanart_path if os.path.exists(base_fanart_path) else None
+
+    try:
+        bases = inventory.base_totals()
+    except OSError as e:
+        xbmcgui.Dialog().ok("Erreur", f"Inventaire inaccessible :\n{e}")
+        return
+    except ValueError as e:
+        xbmcgui.Dialog().ok("Erreur JSON", f"Impossible de lire l'inventaire :\n{e}")
+        return
+
+    xbmcplugin.addSortMethod(handle, xbmcplugin.SORT_METHOD_UNSORTED)
+    xbmcplugin.addSortMethod(handle, xbmcplugin.SORT_METHOD_LABEL)
+
+    # Liste chaque base
+    for base_name, count, total_income in bases:
+        income_str = format_money(total_income)
+        label = f"{base_name} ({count} brainrots) - {income_str}/s"
+        list_item = xbmcgui.ListItem(label=label, label2=f"{income_str}/s")
+
+        # --- InfoTagMusic pour un rendu riche ---
+        info_tag = list_item.getVideoInfoTag()
+        info_tag.setTitle(base_name)
+        info_tag.setPlot(f"{count} Brainrots enregistrés dans cette base.\nRevenu total : {income_str}/s")
+
+        # --- Image associée ---
+        if image_path:
+            list_item.setArt({
+                'icon': image_path,
+                'thumb': image_path,
+                'poster': image_path,
+                'fanart': image_path
+            })
+        else:
+            list_item.setArt({'icon': 'DefaultFolder.png'})
+
+        # --- Menu contextuel ---
+        context_items = [
+            ("Ajouter une Base", f"RunPlugin({build_url({'action': 'add_base'})})"),
+            ("Renommer cette Base", f"RunPlugin({build_url({'action': 'rename_base', 'name': base_name})})"),
+            ("Actions groupées...", f"RunPlugin({build_url({'action': 'bulk_brainrots', 'base': base_name})})"),
+            ("Supprimer cette Base", f"RunPlugin({build_url({'action': 'delete_base', 'name': base_name})})")
+        ]
+        list_item.addContextMenuItems(context_items, replaceItems=True)
+
+        url = build_url({'action': 'show_base_brainrots', 'base': base_name})
+        xbmcplugin.addDirectoryItem(handle=handle, url=url, listitem=list_item, isFolder=True)
+
+    xbmcplugin.endOfDirectory(handle)
+
+def show_base_brainrots(base_name):
+    """Affiche les brainrots d'une base spécifique"""
+    xbmcplugin.setPluginCategory(handle, f"Brainrots de {base_name}")
+    xbmcplugin.setContent(handle, "movies")
+
+    # --- Lecture de la base demandée ---
+    try:
+        base = inventory.get_base(base_name)
+    except OSError as e:
+        xbmcgui.Dialog().ok("Erreur", f"Inventaire inaccessible :\n{e}")
+        return
+    except ValueError as e:
+        xbmcgui.Dialog().ok("Erreur JSON", f"Impossible de lire l'inventaire :\n{e}")
+        return
+
+    if not base:
+        xbmcgui.Dialog().ok("Erreur", f"Base '{base_name}' introuvable.")
+        return
+
+    brainrots = base.get("Brainrots", [])
+    if not brainrots:
+        xbmcgui.Dialog().notification("Aucune brainrot", f"La base {base_name} est vide.", xbmcgui.NOTIFICATION_INFO, 2500)
+        xbmcplugin.endOfDirectory(handle)
+        return
+
+    for method in (xbmcplugin.SORT_METHOD_UNSORTED, xbmcplugin.SORT_METHOD_LABEL,
+                   xbmcplugin.SORT_METHOD_VIDEO_YEAR, xbmcplugin.SORT_METHOD_DATEADDED):
+        xbmcplugin.addSortMethod(handle, method)
+
+    # --- Liste les brainrots de la base (lignes du cache de rendu, voir render.py) ---
+    # Les exemplaires identiques forment une pile : une ligne, ouverte par show_stack()
+    stacks = inventory.stack_entries(brainrots) if addon.getSettingBool('stack_duplicates') else [[e] for e in brainrots]
+    incomes = income.entry_incomes([stack[0] for stack in stacks])
+    missing_images = []
+    for stack, row, value in zip(stacks, render.owned_rows([stack[0] for stack in stacks]), incomes):
+        if len(stack) == 1:
+            _add_brainrot_item(base_name, stack[0], row, missing_images)
+            continue
+        total_str = format_money(value * len(stack))
+        list_item = _brainrot_item(base_name, stack[0], row, missing_images,
+                                   label=f"{row.label} x{len(stack)} ({total_str}/s)",
+                                   plot=f"{len(stack)} exemplaires identiques - revenu total : {total_str}/s\n\n{row.plot}")
+        url = build_url({'action': 'show_stack', 'base': base_name, 'key': json.dumps(inventory.stack_key(stack[0]))})
+        xbmcplugin.addDirectoryItem(handle=handle, url=url, listitem=list_item, isFolder=True)
+
+    xbmcplugin.endOfDirectory(handle)
+    images.report_missing('brainrots', missing_images)
+
+def show_stack(base_name, key):
+    """Affiche les exemplaires d'une pile ; `key` : inventory.stack_key() encodée en JSON
+
+    La pile est désignée par sa configuration et non par un exemplaire, qui peut être
+    supprimé ou déplacé depuis cette vue.
+    """
+    xbmcplugin.setPluginCategory(handle, f"Brainrots de {base_name}")
+    xbmcplugin.setContent(handle, "movies")
+
+    try:
+        catalog_id, mutation, traits = json.loads(key)
+        key = (catalog_id, mutation, tuple(traits))
+    except (TypeError, ValueError):
+        xbmcgui.Dialog().ok("Erreur", f"Pile de brainrots invalide : {key}")
+        return
+
+    try:
+        base = inventory.get_base(base_name)
+    except OSError as e:
+        xbmcgui.Dialog().ok("Erreur", f"Inventaire inaccessible :\n{e}")
+        return
+    except ValueError as e:
+        xbmcgui.Dialog().ok("Erreur JSON", f"Impossible de lire l'inventaire :\n{e}")
+        return
+
+    if not base:
+        xbmcgui.Dialog().ok("Erreur", f"Base '{base_name}' introuvable.")
+        return
+
+    stack = [e for e in base.get("Brainrots", []) if inventory.stack_key(e) == key]
+    missing_images = []
+    for number, (entry, row) in enumerate(zip(stack, render.owned_rows(stack[:1]) * len(stack)), 1):
+        _add_brainrot_item(base_name, entry, row, missing_images, label=f"{row.label} #{number}")
+
+    xbmcplugin.endOfDirectory(handle)
+    images.report_missing('brainrots', missing_images)
+
+def _brainrot_item(base_name, entry, row, missing_images, label=None, plot=None):
+    """ListItem d'une brainrot possédée depuis sa ligne de rendu, avec son menu contextuel"""
+    list_item = xbmcgui.ListItem(label=label or row.label, label2=row.label2)
+    info_tag = list_item.getVideoInfoTag()
+    info_tag.setTitle(row.title)
+    info_tag.setGenres(row.genres)
+    info_tag.setPlot(plot or row.plot)
+    info_tag.setYear(row.year)
+    info_tag.setDateAdded(row.date_added)
+
+    # --- Image principale (Brainrot) et images des traits ---
+    art = images.art('brainrots', row.image, missing_images)
+    list_item.setArt(art or {'icon': 'DefaultFolder.png'})
+    for trait_image in row.trait_images:
+        trait_img = images.image_path('traits', trait_image)
+        if trait_img:
+            list_item.addAvailableArtwork(trait_img, "thumb")
+
+    # --- Menu contextuel (sur une pile : agit sur un exemplaire) ---
+    context_items = [
+        ("Ajouter un Brainrot", f"RunPlugin({build_url({'action': 'add_brainrot', 'base': base_name})})"),
+        ("Supprimer ce Brainrot", f"RunPlugin({build_url({'action': 'delete_brainrot', 'base': base_name, 'id': entry.get('Id')})})"),
+        ("Déplacer ce Brainrot", f"RunPlugin({build_url({'action': 'move_brainrot', 'base': base_name, 'id': entry.get('Id')})})"),
+        ("Actions groupées...", f"RunPlugin({build_url({'action': 'bulk_brainrots', 'base': base_name})})")
+    ]
+    list_item.addContextMenuItems(context_items, replaceItems=True)
+    return list_item
+
+def _add_brainrot_item(base_name, entry, row, missing_images, label=None):
+    list_item = _brainrot_item(base_name, entry, row, missing_images, label)
+    xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=list_item, isFolder=False)
+
+def show_leaderboard():
+    """Affiche les brainrots les plus rentables, toutes bases confondues"""
+    xbmcplugin.setPluginCategory(handle, "Classement des revenus")
+    xbmcplugin.setContent(handle, "movies")
+
+    try:
+        bases = inventory.load_all_bases()
+    except OSError as e:
+        xbmcgui.Dialog().ok("Erreur", f"Inventaire inaccessible :\n{e}")
+        return
+    except ValueError as e:
+        xbmcgui.Dialog().ok("Erreur JSON", f"Impossible de lire l'inventaire :\n{e}")
+        return
+
+    size = addon.getSettingInt('leaderboard_size') or 25
+    missing_images = []
+    for rank, (value, base_name, entry) in enumerate(income.leaderboard(bases, size), 1):
+        b = inventory.resolve_brainrot(entry)
+        name = b.get("Name", "Inconnu")
+        income_str = format_money(value)
+        genres = [m for m in [b["Mutation"].get("Name", "")] if m] + [t.get("Name", "") for t in b["Traits"]]
+
+        list_item = xbmcgui.ListItem(label=f"#{rank} {name} - {income_str}/s", label2=base_name)
+        info_tag = list_item.getVideoInfoTag()
+        info_tag.setTitle(f"#{rank} {name} - {income_str}/s")
+        info_tag.setGenres(genres)
+        info_tag.setPlot(f"Base : {base_name}\nRevenu : {income_str}/s")
+        art = images.art('brainrots', b.get("Image", ""), missing_images)
+        list_item.setArt(art or {'icon': 'DefaultFolder.png'})
+
+        url = build_url({'action': 'show_base_brainrots', 'base': base_name})
+        xbmcplugin.addDirectoryItem(handle=handle, url=url, listitem=list_item, isFolder=True)
+
+    xbmcplugin.endOfDirectory(handle)
+    images.report_missing('brainrots', missing_images)
@@ -0,0 +1,162 @@
+﻿# -*- coding: utf-8 -*-
+import xbmcgui
+import xbmcplugin
+
+import facets
+import images
+import refdata
+import render
+from paths import addon, traits_data_path, brainrots_data_path
+from plugin import handle, build_url
+
+# --- Vues du catalogue : toutes les brainrots (triées, filtrées, paginées) et les traits ---
+def show_all_brainrots(offset=0, limit=None, sort=None, filters=None):
+    """Affiche les brainrots du catalogue, page par page si le réglage page_size est défini
+
+    `sort` (clé de facets.SORTS) et `filters` (rarity, event, secret) sont servis par les
+    ordres et facettes précalculés : seules les fiches de la page sont lues.
+    """
+    filters = {k: v for k, v in (filters or {}).items() if v is not None}
+    if sort not in facets.SORTS:
+        sort = None  # paramètre tri inconnu (ancien favori, URL modifiée) : ordre du catalogue
+    xbmcplugin.setPluginCategory(handle, " - ".join(
+        ["Brainrot Manager"] + [str(v) for v in filters.values()] + ([facets.SORTS[sort][0]] if sort else [])))
+    xbmcplugin.setContent(handle, "movies")
+    if not sort:
+        for method in (xbmcplugin.SORT_METHOD_UNSORTED, xbmcplugin.SORT_METHOD_LABEL,
+                       xbmcplugin.SORT_METHOD_VIDEO_YEAR, xbmcplugin.SORT_METHOD_DATEADDED):
+            xbmcplugin.addSortMethod(handle, method)
+
+    if limit is None:
+        limit = addon.getSettingInt('page_size')
+
+    try:
+        if sort or filters:
+            ids = facets.positions(sort, **filters)
+            total = len(ids)
+            rows = render.catalog_rows(ids[offset:offset + limit] if limit > 0 else ids)
+        else:
+            rows, total = render.catalog_page(offset, limit)
+    except OSError:
+        xbmcgui.Dialog().ok("Erreur", f"Fichier introuvable : {brainrots_data_path}")
+        return
+    except ValueError as e:
+        xbmcgui.Dialog().ok("Erreur JSON", f"Impossible de lire le catalogue:\n{e}")
+        return
+
+    # Les champs sont déjà mis en forme (voir render.py) : il ne reste qu'à créer les ListItem
+    missing_images = []
+    for row in rows:
+        list_item = xbmcgui.ListItem(label=row.label, label2=row.label2)
+        info_tag = list_item.getVideoInfoTag()
+        info_tag.setTitle(row.title)
+        info_tag.setGenres(row.genres)
+        info_tag.setPlot(row.plot)
+        info_tag.setYear(row.year)
+        info_tag.setDateAdded(row.date_added)
+
+        art = images.art('brainrots', row.image, missing_images)
+        list_item.setArt(art or {'icon': 'DefaultFolder.png'})
+        xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=list_item, isFolder=False)
+
+    # --- Lien vers la page suivante ---
+    if limit > 0 and offset + limit < total:
+        pages = (total + limit - 1) // limit
+        list_item = xbmcgui.ListItem(label=f"Page suivante ({offset // limit + 2}/{pages}) »")
+        list_item.setArt({'icon': 'DefaultFolder.png'})
+        url = build_url(dict(_catalog_query(sort, filters), offset=offset + limit, limit=limit))
+        xbmcplugin.addDirectoryItem(handle=handle, url=url, listitem=list_item, isFolder=True)
+    xbmcplugin.endOfDirectory(handle)
+    images.report_missing('brainrots', missing_images)
+
+# --- Paramètres d'URL des vues triées et filtrées du catalogue ---
+_FILTER_PARAMS = {'rarity': 'rarete', 'event': 'evenement', 'secret': 'secret'}
+
+def _catalog_query(sort=None, filters=None):
+    query = {'action': 'toutes_les_brainrots'}
+    if sort:
+        query['tri'] = sort
+    for facet, value in (filters or {}).items():
+        query[_FILTER_PARAMS[facet]] = int(value) if facet == 'secret' else value
+    return query
+
+def catalog_filters(params):
+    filters = {facet: params.get(name) for facet, name in _FILTER_PARAMS.items()}
+    if filters['secret'] is not None:
+        filters['secret'] = filters['secret'] == '1'
+    return filters
+
+def show_sorts():
+    """Propose les ordres de tri précalculés du catalogue"""
+    xbmcplugin.setPluginCategory(handle, "Brainrots triées")
+    for key, (label, _) in facets.SORTS.items():
+        list_item = xbmcgui.ListItem(label=label)
+        list_item.setArt({'icon': 'DefaultFolder.png'})
+        xbmcplugin.addDirectoryItem(handle=handle, url=build_url(_catalog_query(key)), listitem=list_item, isFolder=True)
+    xbmcplugin.endOfDirectory(handle)
+
+def show_facet(facet):
+    """Liste les valeurs d'une facette (rareté ou événement) avec leur nombre de brainrots"""
+    xbmcplugin.setPluginCategory(handle, "Par rareté" if facet == 'rarity' else "Par événement")
+    xbmcplugin.addSortMethod(handle, xbmcplugin.SORT_METHOD_UNSORTED)
+    xbmcplugin.addSortMethod(handle, xbmcplugin.SORT_METHOD_LABEL)
+
+    try:
+        entries = [(value, count, {facet: value}) for value, count in facets.values(facet)]
+    except OSError:
+        xbmcgui.Dialog().ok("Erreur", f"Fichier introuvable : {brainrots_data_path}")
+        return
+    except ValueError as e:
+        xbmcgui.Dialog().ok("Erreur JSON", f"Impossible de lire le catalogue:\n{e}")
+        return
+    if facet == 'rarity':
+        secret = dict(facets.values('secret')).get(True, 0)
+        entries.append(("Secrètes", secret, {'secret': True}))
+
+    for label, count, filters in entries:
+        list_item = xbmcgui.ListItem(label=f"{label} ({count})")
+        list_item.setArt({'icon': 'DefaultFolder.png'})
+        url = build_url(_catalog_query(filters=filters))
+        xbmcplugin.addDirectoryItem(handle=handle, url=url, listitem=list_item, isFolder=True)
+    xbmcplugin.endOfDirectory(handle)
+
+def show_all_traits():
+    """Affiche tous les traits depuis le fichier JSON"""
+    xbmcplugin.setPluginCategory(handle, "Brainrot Manager")
+    xbmcplugin.setContent(handle, "movies")
+
+    try:
+        traits = refdata.get_traits()
+    except OSError:
+        xbmcgui.Dialog().ok("Erreur", f"Fichier introuvable : {traits_data_path}")
+        return
+    except ValueError as e:
+        xbmcgui.Dialog().ok("Erreur JSON", f"Impossible de lire Traits.json :\n{e}")
+        return
+
+    missing_images = []
+    for t in traits:
+        name = t.get("Name", "Inconnu")
+        multiplier = t.get("Multiplier", 1.0)
+        image = t.get("Image", "")
+        desc = t.get("Description", "")
+        
+        label = f"{name}"
+        list_item = xbmcgui.ListItem(label=label, label2=f"{multiplier}X")
+
+        # --- InfoTagMusic pour les métadonnées ---
+        info_tag = list_item.getVideoInfoTag()
+        info_tag.setTitle(name)
+        info_tag.setGenres(['Trait', f"Multiplicateur: {multiplier}X"])
+        info_tag.setYear(2025)
+        info_tag.setPlot(desc)
+        info_tag.setRating(min(multiplier / 10, 1.0) * 10)  # simple barème 0–10
+
+        # --- Image associée ---
+        art = images.art('traits', image, missing_images)
+        list_item.setArt(art or {'icon': 'DefaultFolder.png'})
+
+        xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=list_item, isFolder=False)
+
+    xbmcplugin.endOfDirectory(handle)
+    images.report_missing('traits', missing_images)
@@ -0,0 +1,51 @@
+﻿# -*- coding: utf-8 -*-
+import xbmc
+import xbmcgui
+import xbmcplugin
+
+import profiling
+from paths import addon
+from plugin import handle, build_url
+
+# --- Dossier Diagnostics : temps médian (p50) et p95 de chaque action profilée ---
+def show_diagnostics():
+    """Affiche les statistiques de profilage, actions les plus lentes d'abord"""
+    xbmcplugin.setPluginCategory(handle, "Diagnostics")
+    xbmcplugin.setContent(handle, "videos")
+
+    if not addon.getSettingBool('profiling'):
+        list_item = xbmcgui.ListItem(label="Profilage désactivé : activez-le dans les réglages (Diagnostics)")
+        list_item.setArt({'icon': 'DefaultIconInfo.png'})
+        xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=list_item, isFolder=False)
+
+    labels = dict(profiling.PHASES)
+    for action, count, p50, p95, phases in profiling.summary():
+        list_item = xbmcgui.ListItem(label=f"{action} - p50 {p50:.0f} ms / p95 {p95:.0f} ms",
+                                     label2=f"{count} mesure(s)")
+        lines = [f"Mesures : {count} (temps passé dans les dialogues exclu)", ""]
+        lines += [f"{labels[phase]} : p50 {low:.1f} ms / p95 {high:.1f} ms"
+                  for phase, (low, high) in sorted(phases.items(), key=lambda p: -p[1][1]) if phase != 'dialog']
+        dump = profiling.profile_dump_path(action)
+        if dump:
+            lines += ["", f"Profil cProfile de l'appel le plus lent : {dump}"]
+        info_tag = list_item.getVideoInfoTag()
+        info_tag.setTitle(action)
+        info_tag.setPlot("\n".join(lines))
+        list_item.setArt({'icon': 'DefaultIconInfo.png'})
+        xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=list_item, isFolder=False)
+
+    list_item = xbmcgui.ListItem(label="Effacer les statistiques")
+    list_item.setArt({'icon': 'DefaultIconError.png'})
+    xbmcplugin.addDirectoryItem(handle=handle, url=build_url({'action': 'diagnostics_reset'}),
+                                listitem=list_item, isFolder=False)
+    xbmcplugin.endOfDirectory(handle)
+
+def reset_diagnostics():
+    """Efface les statistiques de profilage puis rafraîchit la liste"""
+    try:
+        profiling.reset()
+    except OSError as e:
+        xbmcgui.Dialog().ok("Erreur", f"Impossible d'effacer les statistiques :\n{e}")
+        return
+    xbmcgui.Dialog().notification("Diagnostics", "Statistiques effacées.", xbmcgui.NOTIFICATION_INFO, 2000)
+    xbmc.executebuiltin('Container.Refresh')
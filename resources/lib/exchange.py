@@ -0,0 +1,131 @@
+﻿# -*- coding: utf-8 -*-
+import os
+import json
+import time
+
+import inventory
+import safeio
+
+# --- Import / export de l'inventaire au format JSON Lines ---
+# Un enregistrement JSON par ligne, lu et écrit au fil de l'eau :
+#   {"type": "header", "format": "brainrot-inventory", "version": 1, ...}
+#   {"type": "base", "name": "Ma base"}
+#   {"type": "brainrot", "Id": ..., "CatalogId": ..., "Mutation": ..., "Traits": [...]}
+# Les brainrots appartiennent à la dernière base annoncée.
+FORMAT = "brainrot-inventory"
+FORMAT_VERSION = 1
+PROGRESS_STEP = 500
+
+class Cancelled(Exception):
+    """Opération annulée depuis la boîte de progression"""
+
+def _line(record):
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+def export_jsonl(path, progress=None):
+    """Écrit tout l'inventaire dans `path` ; retourne (bases, brainrots) écrits
+
+    `progress(fait, total)` est appelé régulièrement ; s'il renvoie False, l'export est
+    annulé (Cancelled) et `path` n'est pas modifié.
+    """
+    total, bases = inventory.stream_bases()
+    base_count = brainrot_count = 0
+    with safeio.atomic_writer(path) as f:
+        f.write(_line({"type": "header", "format": FORMAT, "version": FORMAT_VERSION,
+                       "exported": time.strftime('%Y-%m-%dT%H:%M:%S'), "brainrots": total}))
+        for name, entries in bases:
+            f.write(_line({"type": "base", "name": name}))
+            base_count += 1
+            for entry in entries:
+                f.write(_line({"type": "brainrot", **entry}))
+                brainrot_count += 1
+                if progress and brainrot_count % PROGRESS_STEP == 0 and progress(brainrot_count, total) is False:
+                    raise Cancelled()
+    return base_count, brainrot_count
+
+def read_records(path, progress=None):
+    """Générateur de ('base', nom) et ('brainrot', entrée normalisée) lus dans `path`
+
+    Lève ValueError (avec le numéro de ligne) si le fichier n'est pas un export valide.
+    Les identifiants d'un export antérieur aux identifiants uniques sont convertis comme
+    lors de la migration de l'inventaire : réimporter cet export ne crée pas de doublons.
+    Un identifiant d'instance valide est gardé tel quel, même répété : merge_records et
+    l'import SQLite comptent la répétition comme doublon.
+    """
+    size = os.path.getsize(path) or 1
+    with open(path, 'rb') as f:
+        base_name, ranks = None, {}
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line.decode('utf-8-sig' if number == 1 else 'utf-8'))
+            except ValueError as e:
+                raise ValueError(f"Ligne {number} : {e}")
+            kind = record.pop("type", None) if isinstance(record, dict) else None
+            if number == 1:
+                if kind != "header" or record.get("format") != FORMAT:
+                    raise ValueError("Ce fichier n'est pas un export d'inventaire Brainrot Manager.")
+                if record.get("version", 0) > FORMAT_VERSION:
+                    raise ValueError(f"Format d'export trop récent (version {record.get('version')}).")
+            elif kind == "base" and record.get("name"):
+                base_name, ranks = record["name"], {}
+                yield 'base', base_name
+            elif kind == "brainrot" and base_name is not None and (record.get("CatalogId") or record.get("Name")):
+                entry = inventory.normalize_entry(record) if inventory.is_legacy_entry(record) else record
+                old_id = entry.get("Id")
+                if not inventory.is_instance_id(old_id):
+                    ranks[old_id] = ranks.get(old_id, 0) + 1
+                    entry["Id"] = inventory.legacy_instance_id(base_name, old_id, ranks[old_id])
+                yield 'brainrot', entry
+            else:
+                raise ValueError(f"Ligne {number} : enregistrement invalide")
+            if progress and number % PROGRESS_STEP == 0 and progress(f.tell(), size) is False:
+                raise Cancelled()
+
+def merge_records(bases, records, merge=True):
+    """Ajoute les enregistrements à `bases` (format {"Name", "Brainrots"}) ; retourne (ajoutés, doublons)
+
+    En fusion, les bases de même nom sont complétées et un brainrot dont l'identifiant
+    d'instance existe déjà dans l'inventaire est ignoré ; sinon l'inventaire est remplacé.
+    Dans les deux cas, un identifiant déjà importé depuis le fichier compte comme doublon.
+    """
+    if not merge:
+        bases.clear()
+    existing = {b.get("Id") for base in bases for b in base.get("Brainrots", [])}
+    by_name = {base.get("Name"): base for base in bases}
+    current, added, skipped = None, 0, 0
+    for kind, value in records:
+        if kind == 'base':
+            current = by_name.get(value)
+            if current is None:
+                current = by_name[value] = {"Name": value, "Brainrots": []}
+                bases.append(current)
+        elif value.get("Id") in existing:
+            skipped += 1
+        else:
+            current.setdefault("Brainrots", []).append(value)
+            existing.add(value.get("Id"))
+            added += 1
+    return added, skipped
+
+def import_jsonl(path, merge=True, progress=None):
+    """Importe un export JSON Lines dans l'inventaire en une seule écriture ; retourne (ajoutés, doublons)
+
+    Avec SQLite, les enregistrements sont insérés au fil de la lecture. Le stockage JSON
+    remplace l'inventaire d'un bloc (jsonstore.write_bases) : tout l'inventaire, fichier
+    importé compris, est alors chargé en mémoire pendant l'import.
+    """
+    records = read_records(path, progress)
+    if inventory.use_sqlite():
+        import sqlstore
+        return sqlstore.import_records(records, merge)
+    try:
+        bases, version = inventory.read_bases()
+    except FileNotFoundError:
+        bases, version = [], None
+    result = merge_records(bases, records, merge)
+    if inventory.write_bases(bases, version) is None:
+        raise inventory.InventoryError("L'inventaire a été modifié pendant l'import, réessayez.")
+    return result
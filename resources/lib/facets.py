@@ -0,0 +1,113 @@
+﻿# -*- coding: utf-8 -*-
+import marshal
+from array import array
+import xbmc
+
+import refdata
+import safeio
+from paths import profile_file
+
+# --- Ordres de tri et facettes du catalogue, précalculés par version du catalogue ---
+# Tout est exprimé en positions dans le catalogue (voir refdata.catalog_records) :
+# un ordre est la liste des positions triées, une facette associe chaque valeur
+# (rareté, événement, secret) à la liste croissante des positions concernées.
+CACHE_NAME = 'facets.cache'
+CACHE_FORMAT = 2
+_TYPECODE = 'I'
+_ITEMSIZE = array(_TYPECODE).itemsize
+
+RARITY_ORDER = ['Common', 'Rare', 'Epic', 'Legendary', 'Mythic', 'Brainrot God', 'Secret', 'OG']
+NO_EVENT = ('', 'none')  # comparé en minuscules : 'none', 'None'...
+
+def rarity_rank(rarity):
+    """Rang d'une rareté ; les raretés inconnues passent après les autres"""
+    try:
+        return RARITY_ORDER.index(rarity)
+    except ValueError:
+        return len(RARITY_ORDER)
+
+def _payback(b):
+    income = b.get("BaseIncomePerSecond", 0) or 0
+    return b.get("Cost", 0) / income if income > 0 else float('inf')
+
+# Clés de tri : (libellé, clé de tri d'une fiche)
+SORTS = {
+    'income': ("Revenu/s décroissant", lambda b: -(b.get("BaseIncomePerSecond", 0) or 0)),
+    'cost': ("Prix croissant", lambda b: b.get("Cost", 0) or 0),
+    'payback': ("Rentabilisé le plus vite", _payback),
+    'rarity': ("Rareté", lambda b: (rarity_rank(b.get("Rarity")), b.get("Cost", 0) or 0)),
+    'added': ("Ajout le plus récent", lambda b: tuple(-int(p) if p.isdigit() else 0 for p in (b.get("AddedAt") or "0").split("-"))),
+}
+
+def _facet_values(b):
+    event = b.get("Event") or ""
+    yield 'rarity', b.get("Rarity") or "Unknown"
+    if event.strip().lower() not in NO_EVENT:
+        yield 'event', event
+    yield 'secret', bool(b.get("Secret"))
+
+def _build(signature):
+    catalog = refdata.get_catalog()
+    positions = range(len(catalog))
+    orders = {key: array(_TYPECODE, sorted(positions, key=lambda i: (sort_key(catalog[i]), i))).tobytes()
+              for key, (_, sort_key) in SORTS.items()}
+    facets = {'rarity': {}, 'event': {}, 'secret': {}}
+    for i, b in enumerate(catalog):
+        for facet, value in _facet_values(b):
+            facets[facet].setdefault(value, array(_TYPECODE)).append(i)
+    facets = {facet: {value: ids.tobytes() for value, ids in values.items()} for facet, values in facets.items()}
+    refdata.log(f"Tris et facettes du catalogue recalculés ({len(catalog)} fiches)", xbmc.LOGINFO)
+    return {'format': CACHE_FORMAT, 'signature': signature, 'orders': orders, 'facets': facets}
+
+_cache = None
+
+def _load():
+    global _cache
+    if _cache is not None:
+        return _cache
+    signature = list(refdata.source_signature('catalog'))
+    try:
+        with open(profile_file(CACHE_NAME), 'rb') as f:
+            data = marshal.loads(f.read())
+        if not isinstance(data, dict) or data.get('format') != CACHE_FORMAT or data.get('signature') != signature:
+            data = None
+    except (OSError, EOFError, ValueError, TypeError):
+        data = None
+    if data is None:
+        data = _build(signature)
+        try:
+            safeio.atomic_write(profile_file(CACHE_NAME), marshal.dumps(data))
+        except OSError as e:
+            refdata.log(f"Écriture de {CACHE_NAME} impossible : {e}", xbmc.LOGWARNING)
+    _cache = data
+    return data
+
+def _unpack(raw):
+    ids = array(_TYPECODE)
+    ids.frombytes(raw)
+    return ids
+
+def values(facet):
+    """[(valeur, nombre de fiches)] d'une facette, dans l'ordre d'affichage"""
+    facet_ids = _load()['facets'][facet]
+    items = [(value, len(raw) // _ITEMSIZE) for value, raw in facet_ids.items()]
+    if facet == 'rarity':
+        return sorted(items, key=lambda item: (rarity_rank(item[0]), item[0]))
+    return sorted(items, key=lambda item: (-item[1], str(item[0])))
+
+def positions(sort=None, **filters):
+    """Positions des fiches qui vérifient tous les filtres (rarity=, event=, secret=), dans l'ordre `sort`"""
+    data = _load()
+    selected = None
+    for facet, value in filters.items():
+        if value is None:
+            continue
+        raw = data['facets'][facet].get(value)
+        ids = set(_unpack(raw)) if raw else set()
+        selected = ids if selected is None else selected & ids
+    if sort is None:
+        return sorted(selected) if selected is not None else list(range(refdata.catalog_count()))
+    order = _unpack(data['orders'][sort])
+    if selected is None:
+        return order.tolist()
+    return [i for i in order if i in selected]
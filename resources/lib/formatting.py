@@ -0,0 +1,43 @@
+﻿# -*- coding: utf-8 -*-
+
+# --- Utilitaire pour convertir les grands nombres ($90M, $6T, etc.) ---
+def format_money(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+    suffixes = ['', 'K', 'M', 'B', 'T']
+    magnitude = 0
+    while abs(value) >= 1000 and magnitude < len(suffixes) - 1:
+        magnitude += 1
+        value /= 1000.0
+    # Supprime les zéros inutiles
+    return f"${value:.1f}".rstrip('0').rstrip('.') + suffixes[magnitude]
+
+def parse_money(text):
+    """Inverse de format_money : "1.5B", "$90M" ou "2500" -> nombre (None si illisible)"""
+    text = (text or "").strip().upper().lstrip('$').replace(' ', '').replace(',', '.')
+    factor = 1
+    if text and text[-1] in 'KMBT':
+        factor = 1000 ** ('KMBT'.index(text[-1]) + 1)
+        text = text[:-1]
+    try:
+        return float(text) * factor
+    except ValueError:
+        return None
+
+def format_duration(seconds):
+    """Durée lisible : "45 s", "12 min", "3 h 05", "2 j 4 h" ; "jamais" si elle est infinie"""
+    if seconds != seconds or seconds == float('inf'):
+        return "jamais"
+    seconds = int(-(-seconds // 1))
+    if seconds < 60:
+        return f"{seconds} s"
+    hours, minutes = divmod(-(-seconds // 60), 60)
+    if not hours:
+        return f"{minutes} min"
+    if hours < 24:
+        return f"{hours} h {minutes:02d}"
+    days, hours = divmod(hours, 24)
+    return f"{days} j {hours} h" if days < 365 else f"{days / 365:.1f} ans"
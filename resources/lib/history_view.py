@@ -0,0 +1,87 @@
+﻿# -*- coding: utf-8 -*-
+import time
+import xbmc
+import xbmcgui
+import xbmcplugin
+
+import inventory
+import refdata
+from plugin import handle, build_url
+
+# --- Historique des opérations (journal du stockage JSON) et annulation ---
+def describe(op):
+    """Description lisible d'une opération du journal"""
+    kind = op["op"]
+    count = len(op.get("ids", op.get("entries", [])))
+    if kind == "add_base":
+        return f"Création de la base {op['name']}"
+    elif kind == "delete_base":
+        return f"Suppression de la base {op['name']}"
+    elif kind == "rename_base":
+        return f"Base {op['name']} renommée en {op['new_name']}"
+    elif kind == "add_brainrots":
+        catalog = refdata.lookup('catalog', 'Id')
+        names = [catalog.get(e.get("CatalogId"), e).get("Name", e.get("Id", "?")) for e in op["entries"]]
+        return f"Ajout de {', '.join(names)} dans {op['base']}"
+    elif kind == "delete_brainrots":
+        return f"Suppression de {count} brainrot(s) de {op['base']}"
+    elif kind == "move_brainrots":
+        return f"Déplacement de {count} brainrot(s) : {op['base']} → {op['target']}"
+    elif kind == "copy_brainrots":
+        return f"Copie de {count} brainrot(s) : {op['base']} → {op['target']}"
+    elif kind == "update_brainrots":
+        changes = ([f"mutation {op['mutation']}"] if op.get("mutation") is not None else []) + op.get("traits", [])
+        return f"{', '.join(changes)} appliqué(s) à {count} brainrot(s) de {op['base']}"
+    return kind
+
+def show_history():
+    """Affiche les dernières opérations, les plus récentes d'abord, avec l'annulation"""
+    xbmcplugin.setPluginCategory(handle, "Historique")
+    xbmcplugin.setContent(handle, "videos")
+
+    if inventory.use_sqlite():
+        list_item = xbmcgui.ListItem(label="L'historique n'est disponible qu'avec le stockage JSON")
+        list_item.setArt({'icon': 'DefaultIconInfo.png'})
+        xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=list_item, isFolder=False)
+        xbmcplugin.endOfDirectory(handle)
+        return
+
+    try:
+        records = inventory.history()
+    except (OSError, ValueError) as e:
+        xbmcgui.Dialog().ok("Erreur", f"Impossible de lire l'historique :\n{e}")
+        return
+
+    if any(not undone for _, undone in records):
+        list_item = xbmcgui.ListItem(label="↩️ Annuler la dernière opération")
+        list_item.setArt({'icon': 'DefaultIconWarning.png'})
+        xbmcplugin.addDirectoryItem(handle=handle, url=build_url({'action': 'annuler'}), listitem=list_item, isFolder=False)
+
+    for record, undone in records:
+        when = time.strftime("%d/%m %H:%M", time.localtime(record.get("time", 0)))
+        description = describe(record["op"])
+        list_item = xbmcgui.ListItem(label=f"{when} - {description}", label2="annulée" if undone else "")
+        info_tag = list_item.getVideoInfoTag()
+        info_tag.setTitle(description)
+        info_tag.setPlot(f"Opération n°{record['seq']} du {time.strftime('%d/%m/%Y à %H:%M:%S', time.localtime(record.get('time', 0)))}"
+                         + ("\nAnnulée." if undone else ""))
+        list_item.setArt({'icon': 'DefaultIconError.png' if undone else 'DefaultFolder.png'})
+        xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=list_item, isFolder=False)
+
+    xbmcplugin.endOfDirectory(handle)
+
+def undo_last():
+    """Annule la dernière opération encore active puis rafraîchit la liste"""
+    try:
+        record = inventory.undo_last()
+    except inventory.InventoryError as e:
+        xbmcgui.Dialog().ok("Erreur", str(e))
+        return
+    except (OSError, ValueError) as e:
+        xbmcgui.Dialog().ok("Erreur", f"Annulation impossible :\n{e}")
+        return
+    if record is None:
+        xbmcgui.Dialog().notification("Historique", "Aucune opération à annuler.", xbmcgui.NOTIFICATION_INFO, 2500)
+        return
+    xbmcgui.Dialog().notification("Opération annulée", describe(record["op"]), xbmcgui.NOTIFICATION_INFO, 3000)
+    xbmc.executebuiltin("Container.Refresh")
@@ -0,0 +1,105 @@
+﻿# -*- coding: utf-8 -*-
+import os
+import marshal
+import xbmc
+
+import safeio
+import thumbnails
+from paths import brainrots_images_path, traits_images_path, profile_path, profile_file
+
+# --- Manifeste des images disponibles ---
+# Un os.listdir par dossier, refait seulement quand la date de modification du dossier
+# change (ajout, suppression ou renommage d'un fichier) ; la résolution d'une image
+# devient ensuite une simple recherche dans un ensemble.
+MANIFEST_NAME = 'images.manifest'
+MANIFEST_FORMAT = 1
+
+DIRECTORIES = {
+    'brainrots': brainrots_images_path,
+    'traits': traits_images_path,
+}
+
+_manifest = None
+
+def _read_manifest():
+    try:
+        with open(profile_file(MANIFEST_NAME), 'rb') as f:
+            data = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return {}
+    if not isinstance(data, dict) or data.get('format') != MANIFEST_FORMAT:
+        return {}
+    return data.get('dirs', {})
+
+def load_manifest():
+    """Retourne {type: ensemble des fichiers présents}, en ne relistant que les dossiers modifiés"""
+    global _manifest
+    if _manifest is not None:
+        return _manifest
+
+    stored = _read_manifest()
+    changed = False
+    manifest = {}
+    for kind, directory in DIRECTORIES.items():
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            manifest[kind] = frozenset()
+            continue
+        entry = stored.get(kind)
+        if not entry or entry[0] != mtime:
+            entry = (mtime, sorted(os.listdir(directory)))
+            stored[kind] = entry
+            changed = True
+            xbmc.log(f"[Brainrot Manager] Manifeste des images {kind} reconstruit ({len(entry[1])} fichiers)", xbmc.LOGINFO)
+        manifest[kind] = frozenset(entry[1])
+
+    if changed:
+        try:
+            safeio.atomic_write(profile_file(MANIFEST_NAME), marshal.dumps({'format': MANIFEST_FORMAT, 'dirs': stored}))
+        except OSError as e:
+            xbmc.log(f"[Brainrot Manager] Écriture du manifeste impossible : {e}", xbmc.LOGWARNING)
+    _manifest = manifest
+    return manifest
+
+def image_path(kind, filename):
+    """Chemin complet de l'image si elle existe, sinon None (sans appel système)"""
+    if filename and filename in load_manifest()[kind]:
+        return os.path.join(DIRECTORIES[kind], filename)
+    return None
+
+def resolve(kind, filename, missing):
+    """Comme image_path(), en ajoutant les fichiers absents à la liste `missing`"""
+    path = image_path(kind, filename)
+    if path is None:
+        missing.append(filename or '(aucune)')
+    return path
+
+def report_missing(kind, missing):
+    """Signale en une seule ligne de log les images absentes d'un listing"""
+    if missing:
+        names = sorted(set(missing))
+        xbmc.log(f"[Brainrot Manager] {len(names)} image(s) {kind} manquante(s) : {', '.join(names)}", xbmc.LOGWARNING)
+
+# --- Variantes redimensionnées (voir thumbnails.py) ---
+_thumbnail_indexes = {}
+
+def thumbnails_dir(kind):
+    return os.path.join(profile_path, 'thumbnails', kind)
+
+def art(kind, filename, missing):
+    """Dictionnaire pour setArt : miniature pour icon/thumb, poster réduit, original en fanart
+
+    Sans miniatures générées, l'original sert pour tous les types. None si l'image est absente.
+    """
+    path = resolve(kind, filename, missing)
+    if path is None:
+        return None
+    if kind not in _thumbnail_indexes:
+        _thumbnail_indexes[kind] = thumbnails.read_index(thumbnails_dir(kind))
+    entry = _thumbnail_indexes[kind].get(filename)
+    if not entry:
+        return {'icon': path, 'thumb': path, 'poster': path, 'fanart': path}
+    thumb = os.path.join(thumbnails_dir(kind), thumbnails.variant_name(entry[2], 'thumb', entry[3]))
+    poster = os.path.join(thumbnails_dir(kind), thumbnails.variant_name(entry[2], 'poster', entry[3]))
+    return {'icon': thumb, 'thumb': thumb, 'poster': poster, 'fanart': path}
@@ -0,0 +1,119 @@
+﻿# -*- coding: utf-8 -*-
+import heapq
+import marshal
+import xbmc
+
+import refdata
+import safeio
+from paths import profile_file
+
+# --- Revenus : par brainrot, par base et classement global ---
+# Règle du jeu : les multiplicateurs (mutation + traits) s'additionnent,
+# total = somme - (N - 1), soit 1 + somme des bonus de chacun.
+CACHE_NAME = 'income.cache'
+CACHE_FORMAT = 1
+
+def total_multiplier(multipliers):
+    if not multipliers:
+        return 1.0
+    return sum(multipliers) - (len(multipliers) - 1)
+
+def resolved_income(brainrot):
+    """Revenu/s d'une fiche complète (voir inventory.resolve_brainrot)"""
+    mutation = brainrot.get("Mutation") or {}
+    multipliers = []
+    if "Multiplier" in mutation:
+        multipliers.append(mutation["Multiplier"])
+    multipliers += [t.get("Multiplier", 1.0) for t in brainrot.get("Traits", []) if "Multiplier" in t]
+    return brainrot.get("BaseIncomePerSecond", 0) * total_multiplier(multipliers)
+
+def entry_incomes(entries):
+    """Revenus/s d'une liste d'entrées normalisées, sans reconstruire les fiches"""
+    catalog = refdata.lookup('catalog', 'Id')
+    mutations = refdata.lookup('mutations')
+    traits = refdata.lookup('traits')
+    incomes = []
+    for entry in entries:
+        item = catalog.get(entry.get("CatalogId")) or entry
+        multipliers = []
+        mutation = mutations.get(entry.get("Mutation"))
+        if mutation and "Multiplier" in mutation:
+            multipliers.append(mutation["Multiplier"])
+        for name in entry.get("Traits", []):
+            trait = traits.get(name)
+            if trait and "Multiplier" in trait:
+                multipliers.append(trait["Multiplier"])
+        incomes.append(item.get("BaseIncomePerSecond", 0) * total_multiplier(multipliers))
+    return incomes
+
+def leaderboard(bases, n):
+    """Les n brainrots les plus rentables toutes bases confondues : [(revenu, base, entrée)]"""
+    def candidates():
+        for base in bases:
+            entries = base.get("Brainrots", [])
+            for value, entry in zip(entry_incomes(entries), entries):
+                yield value, base.get("Name", ""), entry
+    return heapq.nlargest(n, candidates(), key=lambda c: c[0])
+
+# --- Totaux par base, mis en cache et tenus à jour par les actions ---
+# Le cache est lié à une version de l'inventaire (voir inventory.version()) et aux
+# signatures des données de référence ; chaque commit y applique seulement son delta.
+def _ref_signature():
+    return [list(refdata.source_signature(name)) for name in ('catalog', 'traits', 'mutations')]
+
+def _read_cache():
+    try:
+        with open(profile_file(CACHE_NAME), 'rb') as f:
+            cache = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(cache, dict) or cache.get('format') != CACHE_FORMAT:
+        return None
+    return cache
+
+def _write_cache(version, totals):
+    data = {'format': CACHE_FORMAT, 'version': version, 'ref': _ref_signature(), 'bases': totals}
+    try:
+        safeio.atomic_write(profile_file(CACHE_NAME), marshal.dumps(data))
+    except OSError as e:
+        xbmc.log(f"[Brainrot Manager] Écriture de {CACHE_NAME} impossible : {e}", xbmc.LOGWARNING)
+
+def compute_totals(bases):
+    """[[nom, nombre de brainrots, revenu/s total]] dans l'ordre des bases"""
+    return [[b.get("Name", ""), len(b.get("Brainrots", [])), sum(entry_incomes(b.get("Brainrots", [])))]
+            for b in bases]
+
+def base_totals(version, load_bases):
+    """Totaux par base pour la version `version` ; `load_bases()` n'est appelé qu'en cas de cache périmé"""
+    cache = _read_cache()
+    if cache and cache['version'] == version and cache['ref'] == _ref_signature():
+        return cache['bases']
+    totals = compute_totals(load_bases())
+    _write_cache(version, totals)
+    return totals
+
+def update_totals(op, result, before, after):
+    """Applique le delta d'une opération au cache, s'il correspondait à la version `before`"""
+    cache = _read_cache()
+    if not cache or cache['version'] != before or cache['ref'] != _ref_signature():
+        return
+    totals = cache['bases']
+    rows = {row[0]: row for row in totals}
+    kind = op["op"]
+    try:
+        if kind == "add_base":
+            totals.append([op["name"], 0, 0.0])
+        elif kind == "delete_base":
+            totals.remove(rows[op["name"]])
+        elif kind == "rename_base":
+            rows[op["name"]][0] = op["new_name"]
+        else:
+            source = rows[op["base"]]
+            target = rows[op.get("target", op["base"])]
+            for entries, row, sign in ((result.get("removed", []), source, -1), (result.get("added", []), target, 1)):
+                row[1] += sign * len(entries)
+                row[2] = row[2] + sign * sum(entry_incomes(entries)) if row[1] else 0.0
+    except KeyError:
+        # Cache incohérent : il sera recalculé à la prochaine lecture (version différente)
+        return
+    _write_cache(after, totals)
@@ -0,0 +1,338 @@
+﻿# -*- coding: utf-8 -*-
+import os
+import re
+import hashlib
+import xbmcaddon
+
+import income
+import refdata
+from paths import account_dir
+
+# --- Format normalisé des entrées de l'inventaire ---
+# Chaque brainrot possédé ne stocke que des références vers les données de référence :
+#   {"Id": identifiant d'instance, "CatalogId": Id du catalogue,
+#    "Mutation": nom de la mutation, "Traits": [noms des traits]}
+# Les fiches complètes sont reconstruites à l'affichage par resolve_brainrot().
+
+def is_legacy_entry(entry):
+    """Vrai pour une entrée à l'ancien format (copie complète de la fiche du catalogue)"""
+    return "CatalogId" not in entry
+
+def make_entry(instance_id, catalog_id, mutation_name, trait_names):
+    return {"Id": instance_id, "CatalogId": catalog_id, "Mutation": mutation_name, "Traits": list(trait_names)}
+
+# Identifiant d'instance : 32 caractères hexadécimaux, propre à chaque exemplaire possédé.
+# Les anciennes versions le dérivaient de la fiche, de la mutation et des traits : deux
+# exemplaires identiques partageaient alors le même identifiant.
+_INSTANCE_ID = re.compile(r'[0-9a-f]{32}')
+_HEX = re.compile(r'[0-9a-f]*')
+
+def new_instance_id():
+    """Nouvel identifiant d'instance aléatoire (même forme qu'un uuid4.hex, sans importer uuid)"""
+    return os.urandom(16).hex()
+
+def is_instance_id(value):
+    return isinstance(value, str) and _INSTANCE_ID.fullmatch(value) is not None
+
+def legacy_instance_id(base_name, old_id, rank):
+    """Identifiant unique de la `rank`-ième entrée d'identifiant `old_id` d'une base migrée
+
+    Le même dans tous les processus ; le rang ne dépend pas des autres entrées de la base, ce qui
+    garde les identifiants stables entre un ancien export et l'inventaire migré plus tard.
+    """
+    return hashlib.sha1(f"{base_name}\n{old_id}\n{rank}".encode('utf-8')).hexdigest()[:32]
+
+def stack_key(entry):
+    """Configuration d'un exemplaire : les entrées de même clé sont identiques (même revenu)"""
+    return entry.get("CatalogId") or entry.get("Name"), entry.get("Mutation", ""), tuple(sorted(entry.get("Traits", [])))
+
+def stack_entries(entries):
+    """Regroupe les exemplaires identiques : [[entrées]] dans l'ordre de première apparition"""
+    stacks = {}
+    for entry in entries:
+        stacks.setdefault(stack_key(entry), []).append(entry)
+    return list(stacks.values())
+
+def update_entry(entry, mutation_name=None, trait_names=()):
+    """Copie de `entry` avec une autre mutation et/ou des traits en plus (même identifiant)"""
+    updated = dict(entry)
+    if mutation_name is not None:
+        updated["Mutation"] = mutation_name
+    traits = list(entry.get("Traits", []))
+    updated["Traits"] = traits + [name for name in trait_names if name not in traits]
+    return updated
+
+def normalize_entry(entry):
+    """Convertit une entrée à l'ancien format en références
+
+    Une fiche absente du catalogue garde ses champs embarqués pour rester affichable.
+    """
+    if not is_legacy_entry(entry):
+        return entry
+
+    # L'image est plus fiable que le nom, souvent mal encodé dans les anciennes copies
+    catalog_item = (refdata.lookup('catalog', 'Image').get(entry.get("Image"))
+                    or refdata.lookup('catalog', 'Name').get(entry.get("Name")))
+    mutation = entry.get("Mutation") or {}
+    traits = entry.get("Traits") or []
+    normalized = make_entry(
+        entry.get("Id"),
+        catalog_item.get("Id") if catalog_item else None,
+        mutation.get("Name", "") if isinstance(mutation, dict) else mutation,
+        [t.get("Name", "") if isinstance(t, dict) else t for t in traits]
+    )
+    if not catalog_item:
+        for key, value in entry.items():
+            if key not in normalized and key not in ("Mutation", "Traits", "BaseName"):
+                normalized[key] = value
+    return normalized
+
+def _unique_instance_ids(bases):
+    """Vrai si tous les identifiants sont déjà uniques et bien formés (test rapide avant la migration)"""
+    ids = [b.get("Id") for base in bases for b in base.get("Brainrots", [])]
+    try:
+        joined = ''.join(ids)
+    except TypeError:
+        return False
+    return len(set(ids)) == len(ids) and set(map(len, ids)) <= {32} and _HEX.fullmatch(joined) is not None
+
+def migrate_bases(bases):
+    """Normalise les entrées et rend chaque identifiant d'instance unique ; retourne True si quelque chose a changé"""
+    changed = False
+    for base in bases:
+        brainrots = base.get("Brainrots", [])
+        if any(is_legacy_entry(b) for b in brainrots):
+            base["Brainrots"] = [normalize_entry(b) for b in brainrots]
+            changed = True
+    if _unique_instance_ids(bases):
+        return changed
+    seen = set()
+    for base in bases:
+        ranks = {}
+        for entry in base.get("Brainrots", []):
+            old_id = entry.get("Id")
+            ranks[old_id] = ranks.get(old_id, 0) + 1
+            if not is_instance_id(old_id) or old_id in seen:
+                entry["Id"] = legacy_instance_id(base.get("Name", ""), old_id, ranks[old_id])
+                changed = True
+            seen.add(entry["Id"])
+    return changed
+
+# --- Lecture / écriture (stockage JSON, voir jsonstore.py) ---
+def read_bases():
+    """Retourne (bases, version) : tout l'inventaire JSON du compte actif
+
+    Lève OSError si le dossier du compte est inaccessible et ValueError si un fichier est invalide.
+    """
+    import jsonstore
+    return jsonstore.read_bases()
+
+def load_bases():
+    return read_bases()[0]
+
+def write_bases(bases, expected_version):
+    """Remplace tout l'inventaire JSON s'il est toujours à la version `expected_version` ; None sinon"""
+    import jsonstore
+    return jsonstore.write_bases(bases, expected_version)
+
+def save_bases(bases):
+    """Remplace l'inventaire JSON quel que soit son contenu actuel (export, restauration)"""
+    import jsonstore
+    jsonstore.save_bases(bases)
+
+def find_base(bases, base_name):
+    return next((b for b in bases if b.get("Name") == base_name), None)
+
+# --- Opérations sur l'inventaire ---
+# Chaque action de l'utilisateur est décrite par un petit dictionnaire, par exemple
+#   {"op": "move_brainrots", "base": "A", "ids": [...], "target": "B"}
+# appliqué en mémoire par apply_op() (stockage JSON, voir jsonstore) ou en une transaction par sqlstore.
+
+class InventoryError(Exception):
+    """Opération impossible : base ou brainrot introuvable, nom déjà utilisé..."""
+
+def _require_base(bases, base_name):
+    base = find_base(bases, base_name)
+    if not base:
+        raise InventoryError(f"Base '{base_name}' introuvable.")
+    return base
+
+def _extend(base, entries):
+    if base.get("Brainrots", []) is None:
+        base["Count"] += len(entries)
+    else:
+        base.setdefault("Brainrots", []).extend(entries)
+
+def apply_op(bases, op):
+    """Applique une opération à la liste des bases ; retourne les entrées ajoutées/retirées
+
+    Une base non chargée ({"Brainrots": None, "Count": n}, lecture partielle de jsonstore) n'est
+    pas validée : seul son nombre de brainrots suit les entrées que l'enregistrement du journal porte.
+    """
+    kind = op["op"]
+    if kind == "add_base":
+        if find_base(bases, op["name"]):
+            raise InventoryError(f"La base '{op['name']}' existe déjà.")
+        bases.append({"Name": op["name"], "Brainrots": []})
+        return {}
+    elif kind == "delete_base":
+        base = _require_base(bases, op["name"])
+        bases.remove(base)
+        return {"removed": base.get("Brainrots") or []}
+    elif kind == "rename_base":
+        base = _require_base(bases, op["name"])
+        if find_base(bases, op["new_name"]):
+            raise InventoryError(f"La base '{op['new_name']}' existe déjà.")
+        base["Name"] = op["new_name"]
+        return {}
+    elif kind == "add_brainrots":
+        base = _require_base(bases, op["base"])
+        _extend(base, op["entries"])
+        return {"added": op["entries"]}
+    elif kind in ("delete_brainrots", "move_brainrots"):
+        base = _require_base(bases, op["base"])
+        target = _require_base(bases, op["target"]) if kind == "move_brainrots" else None
+        ids = set(op["ids"])
+        brainrots = base.get("Brainrots", [])
+        if brainrots is None:
+            removed = op["entries"]
+            base["Count"] -= len(removed)
+        else:
+            removed = [b for b in brainrots if b.get("Id") in ids]
+            if not removed:
+                raise InventoryError(f"Brainrot introuvable dans {op['base']}")
+            base["Brainrots"] = [b for b in brainrots if b.get("Id") not in ids]
+        if target is None:
+            return {"removed": removed}
+        _extend(target, removed)
+        return {"removed": removed, "added": removed}
+    elif kind == "copy_brainrots":
+        base = _require_base(bases, op["base"])
+        target = _require_base(bases, op["target"])
+        if base.get("Brainrots", []) is None:
+            copies = op["entries"]
+        else:
+            ids = set(op["ids"])
+            copies = [dict(b) for b in base.get("Brainrots", []) if b.get("Id") in ids]
+            if not copies:
+                raise InventoryError(f"Brainrot introuvable dans {op['base']}")
+            # Identifiants des copies choisis par l'action : le rejeu du journal les retrouve
+            for copy, new_id in zip(copies, op.get("new_ids", ())):
+                copy["Id"] = new_id
+        _extend(target, copies)
+        return {"added": copies}
+    elif kind == "update_brainrots":
+        # Mutation et/ou traits appliqués à une sélection ; les entrées gardent leur place
+        base = _require_base(bases, op["base"])
+        brainrots = base.get("Brainrots", [])
+        if brainrots is None:
+            return {}
+        ids = set(op["ids"])
+        removed, added = [], []
+        for i, b in enumerate(brainrots):
+            if b.get("Id") in ids:
+                brainrots[i] = update_entry(b, op.get("mutation"), op.get("traits", ()))
+                removed.append(b)
+                added.append(brainrots[i])
+        if not removed:
+            raise InventoryError(f"Brainrot introuvable dans {op['base']}")
+        return {"removed": removed, "added": added}
+    raise ValueError(f"Opération inconnue : {kind}")
+
+# --- Choix du moteur de stockage (réglage storage_backend : json ou sqlite) ---
+# Relu à chaque appel, comme paths.data_dir : le service d'arrière-plan vit toute la session.
+def use_sqlite():
+    return xbmcaddon.Addon().getSetting('storage_backend') == 'sqlite'
+
+def base_summaries():
+    """Liste [(nom, nombre de brainrots)] dans l'ordre d'affichage"""
+    if use_sqlite():
+        import sqlstore
+        return sqlstore.base_summaries()
+    import jsonstore
+    return jsonstore.base_summaries()
+
+def stream_bases():
+    """(nombre total de brainrots, générateur de (nom, entrées)) pour parcourir tout l'inventaire
+
+    Avec SQLite, les entrées de chaque base sont lues au fil de l'itération.
+    """
+    if use_sqlite():
+        import sqlstore
+        return sum(count for _, count in sqlstore.base_summaries()), sqlstore.iter_bases()
+    bases = load_bases()
+    return (sum(len(b.get("Brainrots", [])) for b in bases),
+            ((b.get("Name", "Base inconnue"), b.get("Brainrots", [])) for b in bases))
+
+def load_all_bases():
+    """Toutes les bases avec leurs brainrots, quel que soit le moteur de stockage"""
+    if use_sqlite():
+        import sqlstore
+        return sqlstore.load_bases()
+    return load_bases()
+
+def get_base(base_name):
+    """Retourne {"Name", "Brainrots"} pour une base, ou None si elle n'existe pas"""
+    if use_sqlite():
+        import sqlstore
+        return sqlstore.get_base(base_name)
+    import jsonstore
+    return jsonstore.get_base(base_name)
+
+def _qualified(backend_version):
+    # Chaque compte a son propre inventaire : les caches du profil (revenus, recherche) sont
+    # partagés, la version inclut donc le dossier du compte
+    return f"{account_dir()}#{backend_version}" if backend_version is not None else None
+
+def version():
+    """Identifiant de l'état actuel de l'inventaire du compte actif (change à chaque écriture)"""
+    if use_sqlite():
+        import sqlstore
+        return _qualified(sqlstore.version())
+    import jsonstore
+    return _qualified(jsonstore.version())
+
+def base_totals():
+    """[[nom, nombre de brainrots, revenu/s total]] par base, depuis le cache des revenus"""
+    return income.base_totals(version(), load_all_bases)
+
+def commit(op):
+    """Enregistre une opération ; lève InventoryError si elle n'est pas applicable"""
+    if use_sqlite():
+        import sqlstore
+        result, before, after = sqlstore.commit(op)
+    else:
+        import jsonstore
+        result, before, after = jsonstore.commit(op)
+    income.update_totals(op, result, _qualified(before), _qualified(after))
+    import search
+    search.update_owned(op, result, _qualified(before), _qualified(after))
+    return result
+
+# --- Historique et annulation (stockage JSON) ---
+def history():
+    """[(enregistrement, annulé)] des opérations du journal, les plus récentes d'abord"""
+    if use_sqlite():
+        return []
+    import jsonstore
+    return jsonstore.history()
+
+def undo_last():
+    """Annule la dernière opération encore active ; retourne son enregistrement, ou None"""
+    if use_sqlite():
+        raise InventoryError("L'historique n'est disponible qu'avec le stockage JSON.")
+    import jsonstore
+    return jsonstore.undo_last()
+
+def resolve_brainrot(entry):
+    """Reconstruit la fiche complète d'un brainrot possédé (catalogue + mutation + traits)"""
+    catalog_item = refdata.lookup('catalog', 'Id').get(entry.get("CatalogId"))
+    mutations = refdata.lookup('mutations')
+    traits = refdata.lookup('traits')
+
+    resolved = dict(catalog_item) if catalog_item else {k: v for k, v in entry.items() if k not in ("Mutation", "Traits")}
+    resolved["Id"] = entry.get("Id")
+    mutation_name = entry.get("Mutation", "")
+    resolved["Mutation"] = mutations.get(mutation_name, {"Name": mutation_name}) if mutation_name else {}
+    resolved["Traits"] = [traits.get(name, {"Name": name}) for name in entry.get("Traits", [])]
+    return resolved
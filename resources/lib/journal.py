@@ -0,0 +1,99 @@
+﻿# -*- coding: utf-8 -*-
+import os
+import json
+import xbmc
+
+import safeio
+
+# --- Journal des opérations du stockage JSON (voir jsonstore.py) ---
+# Chaque action ajoute une ligne de quelques centaines d'octets (avec fsync) au lieu de
+# réécrire des fichiers : l'inventaire = l'instantané (index et fragments) + rejeu du journal.
+# La première ligne désigne l'instantané auquel le journal s'applique : empreinte de son
+# contenu et (mtime, taille), pour vérifier la cohérence d'un simple stat.
+# Au-delà de COMPACT_SIZE octets, le journal est replié dans un nouvel instantané ; les
+# dernières opérations y restent pour l'historique et l'annulation, au plus KEEP_OPERATIONS
+# et KEEP_SIZE octets : un ajout groupé porte toutes ses entrées, et un journal encore trop
+# gros après le repli serait replié de nouveau à chaque opération.
+SUFFIX = '.journal'
+COMPACT_SIZE = 64 * 1024
+KEEP_OPERATIONS = 50
+KEEP_SIZE = COMPACT_SIZE // 2
+
+def path_for(snapshot_path):
+    return snapshot_path + SUFFIX
+
+def snapshot_stat(snapshot_path):
+    """[mtime_ns, taille] de l'instantané ; lève OSError s'il est absent"""
+    st = os.stat(snapshot_path)
+    return [st.st_mtime_ns, st.st_size]
+
+def _line(record):
+    return (json.dumps(record, separators=(',', ':')) + '\n').encode('ascii')
+
+def read(path):
+    """Retourne (en-tête, enregistrements, taille utile) ; (None, [], 0) sans journal lisible
+
+    Une dernière ligne incomplète (ajout interrompu) est ignorée ; le prochain ajout l'écrase.
+    Une ligne illisible au milieu du journal l'arrête là : les opérations précédentes sont
+    gardées, les suivantes perdues (leur rejeu dépendrait de l'opération manquante) et le
+    prochain ajout réécrit le journal à partir de cette ligne.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None, [], 0
+    records, end = [], 0
+    while True:
+        line_end = data.find(b'\n', end) + 1
+        if not line_end:
+            break
+        try:
+            record = json.loads(data[end:line_end])
+            if not isinstance(record, dict):
+                raise ValueError("enregistrement invalide")
+        except ValueError:
+            lost = data.count(b'\n', line_end)
+            xbmc.log(f"[Brainrot Manager] {os.path.basename(path)} : ligne illisible à l'octet {end}, "
+                     f"{lost} opération(s) suivante(s) ignorée(s)", xbmc.LOGERROR)
+            break
+        records.append(record)
+        end = line_end
+    if not records or "snapshot" not in records[0]:
+        return None, [], 0
+    return records[0], records[1:], end
+
+def append(path, record, offset):
+    """Ajoute `record` à la position `offset` (fin des lignes complètes) ; retourne la nouvelle taille"""
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        f.write(_line(record))
+        f.truncate()
+        f.flush()
+        os.fsync(f.fileno())
+        return f.tell()
+
+def rewrite(path, header, records):
+    """Remplace le journal (nouvel instantané) ; retourne sa taille"""
+    data = b''.join(_line(r) for r in [header] + list(records))
+    safeio.atomic_write(path, data)
+    return len(data)
+
+def last_seq(header, records):
+    return records[-1]["seq"] if records else header.get("seq", 0) if header else 0
+
+def split_kept(operations):
+    """Sépare (opérations à replier, opérations gardées dans le journal)"""
+    budget = KEEP_SIZE
+    start = len(operations)
+    while start > 0 and len(operations) - start < KEEP_OPERATIONS:
+        budget -= len(_line(operations[start - 1]))
+        if budget < 0:
+            break
+        start -= 1
+    return operations[:start], operations[start:]
+
+def active(records):
+    """Opérations non annulées, dans l'ordre d'enregistrement"""
+    undone = {r["undo"] for r in records if "undo" in r}
+    return [r for r in records if "op" in r and r["seq"] not in undone]
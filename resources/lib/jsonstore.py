@@ -0,0 +1,323 @@
+﻿# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import random
+import xbmc
+
+import inventory
+import journal
+import safeio
+from paths import account_file, account_name, bases_data_path, DEFAULT_ACCOUNT
+
+# --- Moteur de stockage JSON (réglage storage_backend = json), un fichier par base ---
+# Dans le dossier du compte (voir paths.account_dir) :
+#   index.json          {"format": 1, "bases": [{"Name", "File", "Count"}]}, dans l'ordre d'affichage
+#   bases/<empreinte>.json  entrées d'une base ; le nom est l'empreinte du contenu, un fichier
+#                       n'est donc jamais modifié : une base inchangée n'est jamais réécrite
+#   index.json.journal  opérations ajoutées depuis l'index (voir journal.py)
+# L'instantané est l'index et les fragments qu'il désigne. Lister les bases ne lit que l'index
+# et le journal ; afficher ou modifier une base ne charge que son fragment (deux pour un déplacement).
+# Les enregistrements du journal portent les entrées déplacées, copiées ou supprimées : ils se
+# rejouent sur une base non chargée ({"Brainrots": None, "Count": n}, voir inventory.apply_op).
+INDEX_NAME = 'index.json'
+INDEX_FORMAT = 1
+SHARDS_DIR = 'bases'
+READ_RETRIES = 5
+COMMIT_RETRIES = 20
+
+def index_path():
+    return account_file(INDEX_NAME)
+
+def journal_path():
+    return journal.path_for(index_path())
+
+def _encode(value):
+    return json.dumps(value, separators=(',', ':')).encode('ascii')
+
+def _version(header, size, index_id):
+    if header and header.get("snapshot") == index_id and header.get("stat") == journal.snapshot_stat(index_path()):
+        return f"{index_id}:{size}"
+    return index_id
+
+# --- Instantané : index + fragments ---
+def _read_shard(name):
+    with open(account_file(name), 'rb') as f:
+        return json.loads(f.read())
+
+def _stubs(index):
+    return [{"Name": b["Name"], "Brainrots": None, "Count": b["Count"], "File": b["File"]} for b in index["bases"]]
+
+def _load(index, records, names):
+    """Bases de l'index avec les opérations rejouées ; seules les bases `names` (None : toutes) sont chargées
+
+    Un premier rejeu sur l'index seul suit les créations et renommages jusqu'au fragment de chaque base voulue.
+    """
+    if names is None:
+        files = {b["File"] for b in index["bases"]}
+    else:
+        bases = _stubs(index)
+        for record in records:
+            inventory.apply_op(bases, record["op"])
+        files = {b.get("File") for b in bases if b["Name"] in names}
+    bases = _stubs(index)
+    for base in bases:
+        if base["File"] in files:
+            base["Brainrots"] = _read_shard(base["File"])
+    for record in records:
+        inventory.apply_op(bases, record["op"])
+    return bases
+
+def _count(base):
+    return base["Count"] if base["Brainrots"] is None else len(base["Brainrots"])
+
+def _public(base):
+    return {"Name": base["Name"], "Brainrots": base["Brainrots"]}
+
+def _write_snapshot(bases, records, seq=0):
+    """Écrit les fragments manquants, l'index et un journal qui s'y rapporte (verrou tenu par l'appelant)
+
+    `bases` doit être entièrement chargé ; `seq` : dernier numéro d'opération déjà attribué.
+    """
+    os.makedirs(account_file(SHARDS_DIR), exist_ok=True)
+    entries = []
+    for base in bases:
+        brainrots = base.get("Brainrots", [])
+        data = _encode(brainrots)
+        name = f"{SHARDS_DIR}/{safeio.content_version(data)[:20]}.json"
+        if not os.path.exists(account_file(name)):
+            safeio.atomic_write(account_file(name), data)
+        entries.append({"Name": base.get("Name", ""), "File": name, "Count": len(brainrots)})
+    index = {"format": INDEX_FORMAT, "bases": entries}
+    data = _encode(index)
+    safeio.atomic_write(index_path(), data)
+    index_id = safeio.content_version(data)
+    header = {"snapshot": index_id, "stat": journal.snapshot_stat(index_path()),
+              "seq": max(seq, journal.last_seq(None, records))}
+    size = journal.rewrite(journal_path(), header, records)
+    _remove_orphans({e["File"] for e in entries})
+    return {'index': index, 'index_id': index_id, 'header': header, 'records': list(records), 'size': size,
+            'applies': True}
+
+def _remove_orphans(keep):
+    """Supprime les fragments que l'index ne désigne plus
+
+    Un lecteur sans verrou qui tenait l'ancien index ne trouve plus son fragment : il relit l'index.
+    """
+    for name in os.listdir(account_file(SHARDS_DIR)):
+        if f"{SHARDS_DIR}/{name}" not in keep and not name.endswith('.tmp'):
+            try:
+                os.remove(account_file(f"{SHARDS_DIR}/{name}"))
+            except OSError:  # fichier ouvert (Windows) : supprimé à la prochaine écriture
+                pass
+
+def _create():
+    """Premier accès au compte : reprise de l'ancien Bases.json (compte principal) ou inventaire vide"""
+    with safeio.file_lock(index_path()):
+        if os.path.exists(index_path()):
+            return
+        bases, seq = _read_legacy() if account_name() == DEFAULT_ACCOUNT else ([], 0)
+        _write_snapshot(bases, [], seq)
+
+def _read_legacy():
+    """Ancien Bases.json du dossier de l'addon avec son journal rejoué ; retourne (bases, dernier numéro)
+
+    Le fichier n'est pas modifié : il reste une copie de l'inventaire d'avant la migration.
+    """
+    data, snapshot_id = safeio.read_versioned(bases_data_path)
+    if data is None:
+        return [], 0
+    bases = json.loads(data.decode('latin-1'))
+    header, records, _ = journal.read(journal.path_for(bases_data_path))
+    seq = 0
+    if header is not None and header.get("snapshot") == snapshot_id:
+        for record in journal.active(records):
+            inventory.apply_op(bases, record["op"])
+        seq = journal.last_seq(header, records)
+    inventory.migrate_bases(bases)
+    xbmc.log(f"[Brainrot Manager] Bases.json repris dans {index_path()} ({len(bases)} bases)", xbmc.LOGINFO)
+    return bases, seq
+
+# --- Lecture ---
+def _read_state(names=None):
+    """Index + journal, sans verrou : dict bases, version, index, index_id, header, records, size, applies
+
+    Seules les bases `names` ont leurs entrées chargées (None : toutes). `records` est vide et
+    `applies` faux si le journal ne s'applique pas à cet index (remplacé hors de l'addon).
+    """
+    for attempt in range(READ_RETRIES):
+        # Journal lu avant l'index : un repli écrit les fragments et l'index, puis le journal
+        header, records, size = journal.read(journal_path())
+        data, index_id = safeio.read_versioned(index_path())
+        if data is None:
+            _create()
+            continue
+        applies = header is not None and header.get("snapshot") == index_id
+        if header is not None and not applies and attempt < READ_RETRIES - 1:
+            time.sleep(0.005 * (attempt + 1))
+            continue
+        if header is not None and not applies:
+            xbmc.log("[Brainrot Manager] Journal ignoré : index.json a été remplacé hors de l'addon", xbmc.LOGWARNING)
+        state = {'index': json.loads(data), 'index_id': index_id, 'header': header,
+                 'records': records if applies else [], 'size': size, 'applies': applies}
+        try:
+            state['bases'] = _load(state['index'], journal.active(state['records']), names)
+        except FileNotFoundError:
+            # Fragment supprimé par un repli concurrent : l'index lu est déjà remplacé
+            if attempt == READ_RETRIES - 1:
+                raise
+            time.sleep(0.005 * (attempt + 1))
+            continue
+        state['version'] = _version(header, size, index_id)
+        return state
+    raise inventory.InventoryError("L'inventaire est modifié en continu par une autre action, réessayez.")
+
+def read_bases():
+    """Retourne (bases, version) : tout l'inventaire, opérations du journal rejouées
+
+    Lève OSError si le dossier du compte est inaccessible et ValueError si un fichier est invalide.
+    """
+    state = _read_state()
+    return [_public(b) for b in state['bases']], state['version']
+
+def load_bases():
+    return read_bases()[0]
+
+def get_base(base_name):
+    """{"Name", "Brainrots"} d'une base (seul son fragment est lu), ou None"""
+    base = inventory.find_base(_read_state({base_name})['bases'], base_name)
+    return _public(base) if base else None
+
+def base_summaries():
+    """[(nom, nombre de brainrots)] depuis l'index et le journal, sans lire les fragments"""
+    return [(b["Name"], _count(b)) for b in _read_state(())['bases']]
+
+def _current_version():
+    """Version actuelle de l'inventaire, ou None si le compte n'en a pas encore"""
+    header, _, size = journal.read(journal_path())
+    try:
+        if header and header.get("stat") == journal.snapshot_stat(index_path()):
+            return f"{header['snapshot']}:{size}"
+    except FileNotFoundError:
+        return None
+    return safeio.read_versioned(index_path())[1]
+
+def version():
+    current = _current_version()
+    if current is None:
+        _create()
+        current = _current_version()
+    return current
+
+# --- Écriture ---
+def write_bases(bases, expected_version):
+    """Remplace tout l'inventaire (nouvel instantané, journal vidé) s'il est toujours à la version `expected_version`
+
+    Retourne la nouvelle version, ou None si l'inventaire a été modifié entre-temps.
+    """
+    with safeio.file_lock(index_path()):
+        if _current_version() != expected_version:
+            return None
+        state = _write_snapshot(bases, [])
+    return _version(state['header'], state['size'], state['index_id'])
+
+def save_bases(bases):
+    """Remplace l'inventaire quel que soit son contenu actuel (export SQLite, restauration)"""
+    with safeio.file_lock(index_path()):
+        _write_snapshot(bases, [])
+
+def _referenced(op):
+    """Bases dont l'opération lit ou modifie les entrées"""
+    if op["op"] == "delete_base":
+        return {op["name"]}
+    return {op[key] for key in ("base", "target") if key in op}
+
+def _journaled(op, result):
+    """Opération telle qu'enregistrée : avec les entrées qui changent de base, pour le rejeu partiel"""
+    if op["op"] in ("delete_brainrots", "move_brainrots"):
+        return dict(op, entries=result["removed"])
+    if op["op"] == "copy_brainrots":
+        return dict(op, entries=result["added"])
+    return op
+
+def commit(op):
+    """Enregistre une opération ; retourne (résultat, version avant, version après)"""
+    # Lecture sans verrou des seules bases concernées, puis sous verrou : rattrapage des
+    # opérations ajoutées entre-temps par d'autres processus, validation et ajout au journal.
+    names = _referenced(op)
+    for attempt in range(COMMIT_RETRIES):
+        state = _read_state(names)
+        with safeio.file_lock(index_path()):
+            # Une base renommée entre-temps peut désigner un fragment qui n'a pas été lu
+            if _catch_up(state) and all(b["Brainrots"] is not None for b in state['bases'] if b["Name"] in names):
+                result = inventory.apply_op(state['bases'], op)
+                return result, state['version'], _append(state, {"op": _journaled(op, result)})
+        xbmc.log(f"[Brainrot Manager] Inventaire réécrit pendant {op['op']}, nouvel essai ({attempt + 1})", xbmc.LOGINFO)
+        time.sleep(random.uniform(0, 0.01 * (attempt + 1)))
+    raise inventory.InventoryError("L'inventaire est modifié en continu par une autre action, réessayez.")
+
+def _catch_up(state):
+    """Rejoue dans `state` les opérations ajoutées au journal depuis sa lecture (verrou tenu)
+
+    Retourne False s'il faut tout relire : instantané replié ou remplacé, ou annulation ajoutée.
+    """
+    header, records, size = journal.read(journal_path())
+    if (header, size) == (state['header'], state['size']):
+        return True
+    if header is None or header != state['header'] or not state['applies']:
+        return False
+    new_records = records[len(state['records']):]
+    if any("undo" in r for r in new_records):
+        return False
+    for record in new_records:
+        inventory.apply_op(state['bases'], record["op"])
+    state.update(records=records, size=size, version=_version(header, size, state['index_id']))
+    return True
+
+def _append(state, fields):
+    """Ajoute un enregistrement au journal (verrou tenu) et replie si besoin ; retourne la nouvelle version"""
+    header, records, size = state['header'], state['records'], state['size']
+    if _version(header, size, state['index_id']) == state['index_id']:
+        # Journal absent, périmé ou index touché : nouvel en-tête avant l'ajout
+        header = {"snapshot": state['index_id'], "stat": journal.snapshot_stat(index_path()),
+                  "seq": journal.last_seq(header, records)}
+        size = journal.rewrite(journal_path(), header, records)
+    record = dict({"seq": journal.last_seq(header, records) + 1, "time": int(time.time())}, **fields)
+    size = journal.append(journal_path(), record, size)
+    records = records + [record]
+    if size > journal.COMPACT_SIZE:
+        header, size = _compact(state['index'], records)
+    return _version(header, size, header["snapshot"])
+
+def _compact(index, records):
+    """Replie les opérations anciennes dans un nouvel instantané ; retourne (en-tête, taille)
+
+    Seuls les fragments des bases modifiées sont écrits : les autres gardent la même empreinte.
+    """
+    operations = journal.active(records)
+    folded, kept = journal.split_kept(operations)
+    bases = _load(index, folded, None)
+    written = _write_snapshot(bases, kept, records[-1]["seq"])
+    xbmc.log(f"[Brainrot Manager] Journal replié : {len(folded)} opérations dans {INDEX_NAME}", xbmc.LOGINFO)
+    return written['header'], written['size']
+
+# --- Historique et annulation ---
+def history():
+    """[(enregistrement, annulé)] des opérations du journal, les plus récentes d'abord"""
+    state = _read_state(())
+    undone = {r["undo"] for r in state['records'] if "undo" in r}
+    return [(r, r["seq"] in undone) for r in reversed(state['records']) if "op" in r]
+
+def undo_last():
+    """Annule la dernière opération encore active ; retourne son enregistrement, ou None"""
+    for attempt in range(COMMIT_RETRIES):
+        state = _read_state(())
+        with safeio.file_lock(index_path()):
+            if _catch_up(state):
+                operations = journal.active(state['records'])
+                if not operations:
+                    return None
+                _append(state, {"undo": operations[-1]["seq"]})
+                return operations[-1]
+        time.sleep(random.uniform(0, 0.01 * (attempt + 1)))
+    raise inventory.InventoryError("L'inventaire est modifié en continu par une autre action, réessayez.")
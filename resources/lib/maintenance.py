@@ -0,0 +1,133 @@
+﻿# -*- coding: utf-8 -*-
+import os
+import xbmc
+import xbmcgui
+
+import images
+
+# --- Actions des réglages : stockage, sauvegardes, miniatures, précompilation ---
+def sqlite_transfer(direction):
+    """Copie l'inventaire du compte actif entre le stockage JSON et inventory.db (réglages > Stockage)"""
+    import sqlstore
+    dialog = xbmcgui.Dialog()
+    try:
+        if direction == 'import':
+            count = sqlstore.import_from_json()
+            message = f"{count} bases copiées du stockage JSON vers SQLite."
+        else:
+            count = sqlstore.export_to_json()
+            message = f"{count} bases copiées de SQLite vers le stockage JSON."
+    except (OSError, ValueError) as e:
+        dialog.ok("Erreur", f"Transfert impossible :\n{e}")
+        return
+    dialog.notification("Stockage", message, xbmcgui.NOTIFICATION_INFO, 3000)
+
+def _progress_reporter(progress, unit):
+    """Rappel de progression pour exchange : met à jour la boîte, False si l'utilisateur annule"""
+    def report(done, total):
+        progress.update(min(100, int(done * 100 / total)) if total else 0,
+                        f"{done} / {total} {unit}" if unit else "")
+        return not progress.iscanceled()
+    return report
+
+def jsonl_export():
+    """Exporte l'inventaire dans un fichier JSON Lines (réglages > Stockage)"""
+    import time
+    import xbmcvfs
+    import exchange
+    dialog = xbmcgui.Dialog()
+    folder = dialog.browse(3, "Dossier de destination de l'export", 'files')
+    if not folder:
+        return
+    path = os.path.join(xbmcvfs.translatePath(folder), time.strftime("brainrots-%Y%m%d-%H%M%S.jsonl"))
+
+    progress = xbmcgui.DialogProgress()
+    progress.create("Export de l'inventaire", "Écriture...")
+    try:
+        bases, brainrots = exchange.export_jsonl(path, _progress_reporter(progress, "brainrots"))
+    except exchange.Cancelled:
+        dialog.notification("Export", "Export annulé.", xbmcgui.NOTIFICATION_WARNING, 2500)
+        return
+    except (OSError, ValueError) as e:
+        dialog.ok("Erreur", f"Export impossible :\n{e}")
+        return
+    finally:
+        progress.close()
+    dialog.notification("Export", f"{bases} bases, {brainrots} brainrots → {os.path.basename(path)}",
+                        xbmcgui.NOTIFICATION_INFO, 4000)
+
+def jsonl_import():
+    """Importe un fichier JSON Lines, en fusion ou en remplacement (réglages > Stockage)"""
+    import xbmcvfs
+    import exchange
+    import inventory
+    dialog = xbmcgui.Dialog()
+    path = dialog.browse(1, "Inventaire à importer", 'files', '.jsonl')
+    if not path:
+        return
+    mode = dialog.select("Mode d'import", ["Fusionner avec l'inventaire (doublons ignorés)",
+                                           "Remplacer tout l'inventaire"])
+    if mode == -1:
+        return
+    if mode == 1 and not dialog.yesno("Remplacer l'inventaire", "Toutes les bases actuelles seront remplacées. Continuer ?"):
+        return
+
+    progress = xbmcgui.DialogProgress()
+    progress.create("Import de l'inventaire", "Lecture...")
+    try:
+        added, skipped = exchange.import_jsonl(xbmcvfs.translatePath(path), merge=mode == 0,
+                                               progress=_progress_reporter(progress, ""))
+    except exchange.Cancelled:
+        dialog.notification("Import", "Import annulé, inventaire inchangé.", xbmcgui.NOTIFICATION_WARNING, 2500)
+        return
+    except inventory.InventoryError as e:
+        dialog.ok("Erreur", str(e))
+        return
+    except (OSError, ValueError) as e:
+        dialog.ok("Erreur", f"Import impossible :\n{e}")
+        return
+    finally:
+        progress.close()
+    dialog.notification("Import", f"{added} brainrots importés, {skipped} doublons ignorés",
+                        xbmcgui.NOTIFICATION_INFO, 4000)
+    xbmc.executebuiltin("Container.Refresh")
+
+def build_thumbnails():
+    """Génère les miniatures des illustrations dans le profil (réglages > Affichage)"""
+    import thumbnails
+    from paths import brainrots_images_path, traits_images_path
+
+    dialog = xbmcgui.Dialog()
+    if not thumbnails.available():
+        dialog.ok("Miniatures", "Le module Pillow (script.module.pil) est requis pour générer les miniatures.")
+        return
+
+    progress = xbmcgui.DialogProgress()
+    progress.create("Miniatures", "Préparation...")
+    summary = []
+    try:
+        for kind, src_dir in (('brainrots', brainrots_images_path), ('traits', traits_images_path)):
+            report = lambda done, total, kind=kind: progress.update(int(done * 100 / total), f"{kind} : {done}/{total}")
+            generated, unchanged, errors = thumbnails.build(src_dir, images.thumbnails_dir(kind),
+                                                            names=images.load_manifest()[kind],
+                                                            use_processes=False, progress=report)
+            summary.append(f"{kind} : {generated} générées, {unchanged} inchangées")
+            if errors:
+                xbmc.log(f"[Brainrot Manager] Miniatures {kind} en erreur : {'; '.join(errors)}", xbmc.LOGWARNING)
+    finally:
+        progress.close()
+    dialog.notification("Miniatures", " / ".join(summary), xbmcgui.NOTIFICATION_INFO, 4000)
+
+def compile_modules():
+    """Compile les modules de resources/lib dans __pycache__ ; False si un fichier a échoué"""
+    import compileall
+    lib_dir = os.path.dirname(os.path.abspath(__file__))
+    return bool(compileall.compile_dir(lib_dir, maxlevels=0, quiet=1))
+
+def warm_bytecode():
+    """Précompile le code de l'addon (réglages > Affichage) pour accélérer le premier affichage de chaque vue"""
+    if compile_modules():
+        xbmcgui.Dialog().notification("Précompilation", "Code de l'addon précompilé.", xbmcgui.NOTIFICATION_INFO, 3000)
+    else:
+        xbmcgui.Dialog().notification("Précompilation", "Certains modules n'ont pas pu être compilés (voir le journal).",
+                                      xbmcgui.NOTIFICATION_WARNING, 4000)
@@ -0,0 +1,37 @@
+﻿# -*- coding: utf-8 -*-
+import xbmcgui
+import xbmcplugin
+
+from plugin import handle, build_url
+
+# --- Menu principal : importe le strict minimum, c'est la vue la plus ouverte ---
+def show_menu():
+    """Affiche le menu principal"""
+    xbmcplugin.setPluginCategory(handle, "Brainrot Manager")
+    xbmcplugin.setContent(handle, "videos")
+
+    menu_items = [
+        ("Mes Bases", "mes_bases", "🧱"),
+        ("Classement des revenus", "classement", "🏆"),
+        ("Optimiser", "optimiser", "💡"),
+        ("Calculateur", "calculateur", "🧮"),
+        ("Rechercher", "rechercher", "🔍"),
+        ("Historique", "historique", "🕘"),
+        ("Tous les Traits", "tous_les_traits", "🧬"),
+        ("Toutes les Brainrots", "toutes_les_brainrots", "🧠"),
+        ("Brainrots triées", "trier", "↕️"),
+        ("Brainrots par rareté", "par_rarete", "💎"),
+        ("Brainrots par événement", "par_evenement", "🎉"),
+        ("Diagnostics", "diagnostics", "⏱️")
+    ]
+
+    for label, action, icon in menu_items:
+        url = build_url({'action': action})
+        li = xbmcgui.ListItem(label=f"{icon} {label}")
+        xbmcplugin.addDirectoryItem(handle=handle, url=url, listitem=li, isFolder=True)
+
+    # Action et non dossier : le choix du compte s'ouvre sans quitter le menu
+    li = xbmcgui.ListItem(label="👤 Changer de compte")
+    xbmcplugin.addDirectoryItem(handle=handle, url=build_url({'action': 'changer_compte'}), listitem=li, isFolder=False)
+
+    xbmcplugin.endOfDirectory(handle)
@@ -0,0 +1,76 @@
+﻿# -*- coding: utf-8 -*-
+import xbmcgui
+import xbmcplugin
+
+import images
+import income
+import inventory
+import planner
+import refdata
+from formatting import format_money, parse_money
+from plugin import handle
+
+# --- Vue de l'optimiseur d'achats (voir planner.py) ---
+def show_optimizer():
+    """Recommande les achats du catalogue qui maximisent le revenu/s pour un budget"""
+    dialog = xbmcgui.Dialog()
+    budget = parse_money(dialog.input("Budget (ex : 2500, 90M, 1.5B)"))
+    if not budget or budget <= 0:
+        return
+    slots = dialog.numeric(0, "Emplacements max (vide = illimité)")
+    slots = int(slots) if slots and slots.isdigit() and int(slots) > 0 else None
+
+    # Boosters : mutation et traits déjà possédés, appliqués à chaque achat
+    owned_mutations, owned_traits = set(), set()
+    try:
+        for base in inventory.load_all_bases():
+            for entry in base.get("Brainrots", []):
+                if entry.get("Mutation"):
+                    owned_mutations.add(entry["Mutation"])
+                owned_traits.update(entry.get("Traits", []))
+    except (OSError, ValueError):
+        pass
+    catalog, mutations, traits = refdata.load('catalog', 'mutations', 'traits')
+    mutation_names = ["Aucune"] + [m["Name"] for m in mutations if m.get("Name") in owned_mutations]
+    multipliers = []
+    if len(mutation_names) > 1:
+        m_index = dialog.select("Booster : mutation possédée", mutation_names)
+        if m_index > 0:
+            multipliers.append(refdata.lookup('mutations')[mutation_names[m_index]].get("Multiplier", 1.0))
+    trait_names = [t["Name"] for t in traits if t.get("Name") in owned_traits]
+    if trait_names:
+        selected = dialog.multiselect("Booster : traits possédés", trait_names) or []
+        trait_index = refdata.lookup('traits')
+        multipliers += [trait_index[trait_names[i]].get("Multiplier", 1.0) for i in selected]
+    boost = income.total_multiplier(multipliers)
+
+    items = [(b.get("Cost", 0), b.get("BaseIncomePerSecond", 0), b.get("Id")) for b in catalog]
+    counts, spent, total = planner.plan(items, budget, slots)
+
+    xbmcplugin.setPluginCategory(handle, "Optimiser")
+    xbmcplugin.setContent(handle, "movies")
+    summary = f"Budget {format_money(budget)} : {sum(counts.values())} achat(s), {format_money(spent)} -> {format_money(total * boost)}/s"
+    list_item = xbmcgui.ListItem(label=summary)
+    list_item.setArt({'icon': 'DefaultAddonInfoProvider.png'})
+    xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=list_item, isFolder=False)
+
+    by_id = refdata.lookup('catalog', 'Id')
+    missing_images = []
+    for catalog_id, count in sorted(counts.items(), key=lambda c: -by_id[c[0]].get("BaseIncomePerSecond", 0)):
+        b = by_id[catalog_id]
+        name = b.get("Name", "Inconnu")
+        income_str = format_money(b.get("BaseIncomePerSecond", 0) * boost)
+        label = f"{count} x {name} - {income_str}/s"
+        list_item = xbmcgui.ListItem(label=label, label2=format_money(b.get("Cost", 0) * count))
+        info_tag = list_item.getVideoInfoTag()
+        info_tag.setTitle(label)
+        info_tag.setGenres([b.get("Rarity", "")])
+        info_tag.setPlot(f"Coût unitaire : {format_money(b.get('Cost', 0))}\n"
+                         f"Coût total : {format_money(b.get('Cost', 0) * count)}\n"
+                         f"Revenu : {income_str}/s (x{boost:g})")
+        art = images.art('brainrots', b.get("Image", ""), missing_images)
+        list_item.setArt(art or {'icon': 'DefaultFolder.png'})
+        xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=list_item, isFolder=False)
+
+    xbmcplugin.endOfDirectory(handle)
+    images.report_missing('brainrots', missing_images)
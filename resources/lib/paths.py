@@ -0,0 +1,59 @@
+﻿# -*- coding: utf-8 -*-
+import os
+import re
+import xbmcaddon
+import xbmcvfs
+
+# --- Chemins de l'addon (données livrées) et du profil (données générées) ---
+addon = xbmcaddon.Addon()
+addon_path = xbmcvfs.translatePath(addon.getAddonInfo('path'))
+profile_path = xbmcvfs.translatePath(addon.getAddonInfo('profile'))
+
+traits_data_path = os.path.join(addon_path, 'resources', 'data', 'Traits.json')
+traits_images_path = os.path.join(addon_path, 'resources', 'images', 'Traits')
+brainrots_images_path = os.path.join(addon_path, 'resources', 'images', 'Brainrots')
+brainrots_data_path = os.path.join(addon_path, 'resources', 'data', 'BrainrotsCatalogue.json')
+# Ancien emplacement de l'inventaire, repris une fois dans le compte principal (voir jsonstore)
+bases_data_path = os.path.join(addon_path, 'resources', 'data', 'Bases.json')
+mutations_data_path = os.path.join(addon_path, 'resources', 'data', 'Mutations.json')
+base_fanart_path = os.path.join(addon_path, 'resources', 'images', 'Base_Fanart.png')
+
+def profile_file(name):
+    """Retourne le chemin d'un fichier du profil, en créant le dossier au besoin"""
+    os.makedirs(profile_path, exist_ok=True)
+    return os.path.join(profile_path, name)
+
+# --- Données de l'utilisateur : dossier du réglage data_path, sinon le profil ---
+# Kodi remplace le dossier de l'addon à chaque mise à jour : l'inventaire n'y est plus stocké.
+# Chaque compte a son dossier accounts/<nom> (inventaire JSON, inventory.db). Les réglages
+# sont relus à chaque appel : le service d'arrière-plan vit toute la session.
+DEFAULT_ACCOUNT = 'default'
+
+def data_dir():
+    folder = xbmcaddon.Addon().getSetting('data_path')
+    return xbmcvfs.translatePath(folder) if folder else profile_path
+
+def account_folder(name):
+    """Nom de dossier d'un compte ('' ou espaces : compte principal)"""
+    return re.sub(r'[^\w\- ]', '_', name).strip() or DEFAULT_ACCOUNT
+
+def account_name():
+    """Nom de dossier du compte actif (réglage account)"""
+    return account_folder(xbmcaddon.Addon().getSetting('account'))
+
+def accounts():
+    """Comptes existants dans le dossier de données, compte principal compris"""
+    try:
+        names = os.listdir(os.path.join(data_dir(), 'accounts'))
+    except FileNotFoundError:
+        names = []
+    return sorted(set(names) | {DEFAULT_ACCOUNT, account_name()})
+
+def account_dir():
+    """Dossier du compte actif, créé au besoin"""
+    path = os.path.join(data_dir(), 'accounts', account_name())
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def account_file(name):
+    return os.path.join(account_dir(), name)
@@ -0,0 +1,123 @@
+﻿# -*- coding: utf-8 -*-
+import time
+import marshal
+import xbmc
+import xbmcgui
+
+import facets
+import images
+import refdata
+import render
+import safeio
+import search
+from paths import profile_file
+
+# --- Sélecteur de brainrot en deux niveaux (rareté puis brainrot), avec illustrations ---
+# Les listes viennent des tables précalculées : positions par rareté (facets, par revenu
+# décroissant) et lignes de rendu du catalogue (render) ; seules les fiches de la rareté
+# ouverte sont lues. Les ListItem d'une liste sont créés une fois et réutilisés quand on
+# revient en arrière. Les raccourcis "ajoutés récemment" et "les plus utilisés" viennent
+# d'un petit cache d'usage dans le profil, lié à la signature du catalogue.
+USAGE_NAME = 'picker.usage'
+USAGE_FORMAT = 1
+USAGE_LIMIT = 200
+SHORTCUT_SIZE = 15
+
+# --- Cache d'usage : {Id du catalogue: [nombre d'ajouts, date du dernier ajout, position]} ---
+def _read_usage():
+    try:
+        with open(profile_file(USAGE_NAME), 'rb') as f:
+            data = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(data, dict) or data.get('format') != USAGE_FORMAT:
+        return None
+    return data
+
+def _write_usage(signature, usage):
+    data = {'format': USAGE_FORMAT, 'signature': signature, 'usage': usage}
+    try:
+        safeio.atomic_write(profile_file(USAGE_NAME), marshal.dumps(data))
+    except OSError as e:
+        refdata.log(f"Écriture de {USAGE_NAME} impossible : {e}", xbmc.LOGWARNING)
+
+def load_usage():
+    """Cache d'usage à jour ; les positions sont recalculées si le catalogue a changé"""
+    signature = list(refdata.source_signature('catalog'))
+    data = _read_usage()
+    if data is None:
+        return {}
+    usage = data['usage']
+    if data['signature'] != signature:
+        positions = {b.get("Id"): i for i, b in enumerate(refdata.get_catalog())}
+        usage = {cid: [count, last, positions[cid]] for cid, (count, last, _) in usage.items() if cid in positions}
+        _write_usage(signature, usage)
+    return usage
+
+def record_use(catalog_id, position):
+    """Compte un ajout de la fiche `catalog_id` (position dans le catalogue)"""
+    usage = load_usage()
+    count = usage.get(catalog_id, [0])[0]
+    usage[catalog_id] = [count + 1, int(time.time()), position]
+    if len(usage) > USAGE_LIMIT:
+        # Les fiches les moins récemment ajoutées sortent du cache
+        for cid, _ in sorted(usage.items(), key=lambda item: item[1][1])[:len(usage) - USAGE_LIMIT]:
+            del usage[cid]
+    _write_usage(list(refdata.source_signature('catalog')), usage)
+
+def shortcuts(usage):
+    """[(libellé, positions)] des raccourcis non vides"""
+    recent = sorted(usage.values(), key=lambda u: -u[1])[:SHORTCUT_SIZE]
+    frequent = sorted(usage.values(), key=lambda u: (-u[0], -u[1]))[:SHORTCUT_SIZE]
+    return [(label, [u[2] for u in entries]) for label, entries in
+            (("🕘 Ajoutés récemment", recent), ("⭐ Les plus utilisés", frequent)) if entries]
+
+# --- Listes affichées ---
+_items = {}
+
+def _row_item(row, label2, missing):
+    li = xbmcgui.ListItem(label=row.label, label2=label2)
+    li.setArt(images.art('brainrots', row.image, missing) or {'icon': 'DefaultFolder.png'})
+    return li
+
+def brainrot_items(key, positions):
+    """ListItem des fiches aux `positions`, créés une fois par liste (`key`) et par processus"""
+    if key not in _items:
+        missing = []
+        _items[key] = [_row_item(row, row.label2, missing) for row in render.catalog_rows(positions)]
+        images.report_missing('brainrots', missing)
+    return _items[key]
+
+def _group_item(label, positions, missing):
+    # Illustration du groupe : sa première fiche (la plus rentable pour une rareté)
+    li = _row_item(render.catalog_rows(positions[:1])[0], f"{len(positions)} brainrots", missing)
+    li.setLabel(label)
+    return li
+
+def choose_brainrot(dialog):
+    """Position dans le catalogue de la fiche choisie, ou None si l'utilisateur annule"""
+    groups = shortcuts(load_usage())
+    groups += [(f"{value} ({count})", facets.positions('income', rarity=value)) for value, count in facets.values('rarity')]
+    missing = []
+    search_item = xbmcgui.ListItem(label="🔍 Filtrer...", label2="Nom, rareté, événement...")
+    search_item.setArt({'icon': 'DefaultAddonsSearch.png'})
+    group_items = [search_item] + [_group_item(label, positions, missing) for label, positions in groups]
+    images.report_missing('brainrots', missing)
+
+    while True:
+        idx = dialog.select("Sélectionnez une rareté", group_items, useDetails=True)
+        if idx == -1:
+            return None
+        if idx == 0:
+            text = dialog.input("Filtrer les brainrots (nom, rareté, événement...)")
+            if not text:
+                continue
+            label, positions = f"🔍 {text}", [doc for _, doc in search.query(text, sources=('catalog',))]
+            if not positions:
+                dialog.notification("Recherche", f"Aucun résultat pour « {text} »", xbmcgui.NOTIFICATION_INFO, 2000)
+                continue
+        else:
+            label, positions = groups[idx - 1]
+        ret = dialog.select(f"Sélectionnez un Brainrot : {label}", brainrot_items(label, positions), useDetails=True)
+        if ret != -1:
+            return positions[ret]
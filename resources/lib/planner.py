@@ -0,0 +1,148 @@
+﻿# -*- coding: utf-8 -*-
+from collections import Counter
+
+# --- Planificateur d'achats : maximiser le revenu/s pour un budget donné ---
+# Chaque brainrot du catalogue peut être acheté plusieurs fois (sac à dos non borné).
+# 1. Élagage par dominance : un brainrot plus cher et pas plus rentable qu'un autre
+#    n'est jamais utile. Il reste la frontière de Pareto (coût croissant, revenu
+#    strictement croissant), quelques dizaines d'entrées même sur 10k fiches.
+# 2. Sans limite d'emplacements : programmation dynamique sur `resolution` paliers de
+#    coût, puis le reliquat est complété par le meilleur rapport revenu/coût.
+# 3. Avec limite d'emplacements : ensembles de Pareto (coût exact, revenu) des paniers
+#    d'au plus n achats, bornés à `resolution` états et combinés par doublement.
+# Ce module n'importe rien de Kodi, pour pouvoir être mesuré hors ligne.
+
+def pareto_front(items, budget):
+    """Garde les (coût, revenu, clé) finançables et non dominés, triés par coût croissant"""
+    candidates = sorted((i for i in items if 0 < i[0] <= budget and i[1] > 0), key=lambda i: (i[0], -i[1]))
+    front = []
+    best_income = 0
+    for item in candidates:
+        if item[1] > best_income:
+            front.append(item)
+            best_income = item[1]
+    return front
+
+def _fill_leftover(front, budget, spent, picks):
+    """Complète avec l'entrée au meilleur rapport revenu/coût qui rentre encore dans le budget"""
+    by_density = sorted(front, key=lambda i: i[1] / i[0], reverse=True)
+    for cost, value, key in by_density:
+        count = int((budget - spent) // cost)
+        if count > 0:
+            picks.extend([key] * count)
+            spent += cost * count
+    return spent
+
+def _plan_unbounded(front, budget, resolution):
+    unit = budget / resolution
+    weights = [max(1, int(cost // unit)) for cost, _, _ in front]
+    # Poids arrondis à l'inférieur : chaque palier garde aussi son coût exact, qui seul décide
+    # si un achat rentre encore dans le budget.
+    best = [0.0] * (resolution + 1)
+    spent = [0] * (resolution + 1)
+    choice = [-1] * (resolution + 1)
+    for w in range(1, resolution + 1):
+        best_w, spent_w, choice_w = best[w - 1], spent[w - 1], -1
+        for idx, weight in enumerate(weights):
+            if weight > w:
+                continue
+            cost = spent[w - weight] + front[idx][0]
+            if cost > budget:
+                continue
+            candidate = best[w - weight] + front[idx][1]
+            if candidate > best_w or (candidate == best_w and cost < spent_w):
+                best_w, spent_w, choice_w = candidate, cost, idx
+        best[w], spent[w], choice[w] = best_w, spent_w, choice_w
+
+    picks = []
+    w = resolution
+    while w > 0:
+        idx = choice[w]
+        if idx == -1:
+            w -= 1
+            continue
+        picks.append(front[idx][2])
+        w -= weights[idx]
+    total_spent = _fill_leftover(front, budget, spent[resolution], picks)
+    return picks, total_spent
+
+def _thin(states, budget, resolution):
+    """Frontière de Pareto des états (coût, revenu, ...), au plus un état par palier de coût"""
+    states.sort(key=lambda s: (s[0], -s[1]))
+    kept = []
+    best_income = -1.0
+    bucket_size = budget / resolution
+    last_bucket = -1
+    for state in states:
+        if state[1] <= best_income:
+            continue
+        bucket = int(state[0] // bucket_size)
+        if bucket == last_bucket and kept[-1][0]:  # le panier vide reste toujours disponible
+            kept[-1] = state
+        else:
+            kept.append(state)
+            last_bucket = bucket
+        best_income = state[1]
+    return kept
+
+def _combine(left, right, budget, resolution):
+    """Somme max-plus de deux ensembles d'états ; garde (i, j) pour retrouver les achats"""
+    states = []
+    same = left is right
+    right_states = right[0]
+    for i, (cost, value) in enumerate(left[0]):
+        for j in range(i if same else 0, len(right_states)):
+            other_cost, other_value = right_states[j]
+            total = cost + other_cost
+            if total > budget:
+                break  # états triés par coût : les suivants sont encore plus chers
+            states.append((total, value + other_value, i, j))
+    kept = _thin(states, budget, resolution)
+    return [(c, v) for c, v, _, _ in kept], [(i, j) for _, _, i, j in kept], left, right
+
+def _expand(node, pos, picks):
+    """Retrouve les achats d'un état en redescendant l'arbre des combinaisons"""
+    if len(node) == 2:  # feuille : (états, clés)
+        if node[1][pos] is not None:
+            picks.append(node[1][pos])
+        return
+    i, j = node[1][pos]
+    _expand(node[2], i, picks)
+    _expand(node[3], j, picks)
+
+def _plan_slots(front, budget, slots, resolution):
+    # S(1) = {rien} ∪ frontière, S(a + b) = S(a) ⊕ S(b) : par exponentiation binaire,
+    # `slots` emplacements coûtent O(log slots) combinaisons d'ensembles bornés.
+    leaf = _thin([(0, 0.0, None)] + list(front), budget, resolution)
+    power = ([(c, v) for c, v, _ in leaf], [key for _, _, key in leaf])
+    result = None
+    while slots:
+        if slots & 1:
+            result = power if result is None else _combine(result, power, budget, resolution)
+        slots >>= 1
+        if slots:
+            power = _combine(power, power, budget, resolution)
+
+    best = max(range(len(result[0])), key=lambda i: result[0][i][1])
+    picks = []
+    _expand(result, best, picks)
+    return picks, result[0][best][0]
+
+def plan(items, budget, slots=None, resolution=1000):
+    """Recommande des achats ; retourne (Counter {clé: nombre}, coût total, revenu/s total)
+
+    `items` : itérable de (coût, revenu/s, clé). `slots` limite le nombre d'achats.
+    """
+    if budget <= 0 or slots == 0:
+        return Counter(), 0, 0.0
+    front = pareto_front(items, budget)
+    if not front:
+        return Counter(), 0, 0.0
+    if slots is not None and slots * front[0][0] >= budget:
+        slots = None  # le budget ne permet pas de remplir tous les emplacements : limite inutile
+    if slots is None:
+        picks, spent = _plan_unbounded(front, budget, resolution)
+    else:
+        picks, spent = _plan_slots(front, budget, slots, resolution)
+    values = {key: value for _, value, key in front}
+    return Counter(picks), spent, sum(values[key] for key in picks)
@@ -0,0 +1,10 @@
+﻿# -*- coding: utf-8 -*-
+import sys
+import urllib.parse
+
+# --- Contexte de l'appel du plugin, partagé par les vues et les actions ---
+handle = int(sys.argv[1])
+
+def build_url(query):
+    """Construit une URL interne pour naviguer dans le plugin"""
+    return sys.argv[0] + '?' + urllib.parse.urlencode(query)
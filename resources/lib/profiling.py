@@ -0,0 +1,309 @@
+﻿# -*- coding: utf-8 -*-
+import os
+import re
+import sys
+import math
+import time
+import marshal
+import builtins
+import xbmc
+
+import safeio
+from paths import profile_file
+
+# --- Profilage des routes (réglages > Diagnostics) ---
+# Activé, il découpe le temps d'une route en phases : chaque phase mesure son temps
+# propre (une lecture faite pendant la construction d'un élément n'est comptée qu'en
+# lecture). Les fonctions concernées sont enveloppées à l'exécution, au fil des imports :
+# désactivé, le profilage ne coûte rien, aucun code des vues n'est instrumenté.
+STATS_NAME = 'profiling.stats'
+STATS_FORMAT = 1
+PROFILES_DIR = 'profiles'
+ROLLING_SIZE = 100
+
+PHASES = [
+    ('import', "Imports"),
+    ('read', "Lecture disque"),
+    ('parse', "Analyse JSON / marshal"),
+    ('sqlite', "SQLite"),
+    ('items', "Construction des éléments"),
+    ('art', "Illustrations"),
+    ('end', "endOfDirectory"),
+    ('write', "Écriture"),
+    ('dialog', "Dialogues"),
+    ('other', "Autre"),
+]
+
+_stack = []
+_totals = {}
+_counters = {'items': 0, 'depth': 0}
+_pending = {}
+_OS_FUNCTIONS = ('stat', 'listdir', 'scandir')
+_os_functions = {}
+
+def _enter(phase):
+    now = time.perf_counter()
+    if _stack:
+        _totals[_stack[-1][0]] += now - _stack[-1][1]
+    _stack.append([phase, now])
+
+def _leave():
+    now = time.perf_counter()
+    phase, start = _stack.pop()
+    _totals[phase] += now - start
+    if _stack:
+        _stack[-1][1] = now
+
+def _timed(phase, fn):
+    def wrapper(*args, **kwargs):
+        _enter(phase)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _leave()
+    return wrapper
+
+# --- Enveloppes ---
+class _TimedFile:
+    """Fichier dont les read() et write() comptent dans la phase de son ouverture (lecture ou écriture)"""
+    def __init__(self, f, phase):
+        self._f = f
+        self._phase = phase
+
+    def read(self, *args):
+        _enter(self._phase)
+        try:
+            return self._f.read(*args)
+        finally:
+            _leave()
+
+    def write(self, data):
+        _enter(self._phase)
+        try:
+            return self._f.write(data)
+        finally:
+            _leave()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._f.close()
+
+    def __iter__(self):
+        return iter(self._f)
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+def _open(file, mode='r', *args, **kwargs):
+    phase = 'write' if any(c in mode for c in 'wax+') else 'read'
+    return _TimedFile(_timed(phase, _builtin_open)(file, mode, *args, **kwargs), phase)
+
+def _list_item(*args, **kwargs):
+    # La phase « éléments » court de la création du ListItem à son ajout dans la liste
+    if not _stack or _stack[-1][0] != 'items':
+        _enter('items')
+    return _ListItem(*args, **kwargs)
+
+def _adding(fn, count):
+    def wrapper(*args, **kwargs):
+        if not _stack or _stack[-1][0] != 'items':
+            _enter('items')
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _leave()
+            _counters['items'] += count(args, kwargs)
+    return wrapper
+
+def _patch_xbmcgui(module):
+    global _ListItem
+    _ListItem = module.ListItem
+    module.ListItem = _list_item
+
+    class Dialog(module.Dialog):
+        pass
+    for name in ('select', 'multiselect', 'input', 'numeric', 'yesno', 'browse', 'ok'):
+        if hasattr(module.Dialog, name):
+            setattr(Dialog, name, _timed('dialog', getattr(module.Dialog, name)))
+    module.Dialog = Dialog
+
+def _patch_xbmcplugin(module):
+    module.addDirectoryItem = _adding(module.addDirectoryItem, lambda args, kwargs: 1)
+    module.addDirectoryItems = _adding(module.addDirectoryItems,
+                                       lambda args, kwargs: len(kwargs['items'] if 'items' in kwargs else args[1]))
+    end = _timed('end', module.endOfDirectory)
+
+    def end_of_directory(*args, **kwargs):
+        while _stack and _stack[-1][0] == 'items':
+            _leave()
+        return end(*args, **kwargs)
+    module.endOfDirectory = end_of_directory
+
+def _patch_sqlite3(module):
+    class Connection(module.Connection):
+        execute = _timed('sqlite', module.Connection.execute)
+        executemany = _timed('sqlite', module.Connection.executemany)
+        executescript = _timed('sqlite', module.Connection.executescript)
+        commit = _timed('sqlite', module.Connection.commit)
+    connect = module.connect
+    module.connect = _timed('sqlite', lambda *args, **kwargs: connect(*args, factory=Connection, **kwargs))
+
+def _patch_functions(phase, *names):
+    def patch(module):
+        for name in names:
+            setattr(module, name, _timed(phase, getattr(module, name)))
+    return patch
+
+def _import(*args, **kwargs):
+    _enter('import')
+    _counters['depth'] += 1
+    try:
+        return _builtin_import(*args, **kwargs)
+    finally:
+        _counters['depth'] -= 1
+        _leave()
+        # Un module n'est enveloppé qu'une fois l'import le plus externe terminé (entièrement initialisé)
+        if _pending and not _counters['depth']:
+            for name in [n for n in _pending if n in sys.modules]:
+                _pending.pop(name)(sys.modules[name])
+
+def _install():
+    global _builtin_open, _builtin_import
+    _pending.update({
+        'xbmcgui': _patch_xbmcgui,
+        'xbmcplugin': _patch_xbmcplugin,
+        'sqlite3': _patch_sqlite3,
+        'json': _patch_functions('parse', 'loads'),
+        'marshal': _patch_functions('parse', 'loads'),
+        'safeio': _patch_functions('write', 'atomic_write'),
+        'images': _patch_functions('art', 'art', 'image_path', 'resolve'),
+    })
+    for name in [n for n in _pending if n in sys.modules]:
+        _pending.pop(name)(sys.modules[name])
+    for name in _OS_FUNCTIONS:
+        _os_functions[name] = getattr(os, name)
+        setattr(os, name, _timed('read', _os_functions[name]))
+    _builtin_open, _builtin_import = builtins.open, builtins.__import__
+    builtins.open, builtins.__import__ = _open, _import
+
+def _uninstall():
+    builtins.open, builtins.__import__ = _builtin_open, _builtin_import
+    for name, fn in _os_functions.items():
+        setattr(os, name, fn)
+
+# --- Exécution d'une route ---
+def run(route, paramstring, use_cprofile=False):
+    """Exécute route(paramstring) en mesurant ses phases, puis enregistre la mesure"""
+    from urllib.parse import parse_qsl
+    action = dict(parse_qsl(paramstring)).get('action') or '(menu)'
+    _totals.update({phase: 0.0 for phase, _ in PHASES})
+    _install()
+    profiler = None
+    if use_cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+    start = time.perf_counter()
+    _enter('other')
+    try:
+        if profiler:
+            profiler.runcall(route, paramstring)
+        else:
+            route(paramstring)
+    finally:
+        while _stack:
+            _leave()
+        total = time.perf_counter() - start
+        _uninstall()
+        phases = {phase: round(seconds * 1000, 2) for phase, seconds in _totals.items() if seconds}
+        # Le temps passé dans les dialogues dépend de l'utilisateur, pas de l'addon
+        elapsed = round(total * 1000 - phases.get('dialog', 0), 2)
+        xbmc.log(f"[Brainrot Manager] Profil {action} : {elapsed:.1f} ms, {_counters['items']} éléments ("
+                 + ", ".join(f"{label} {phases[phase]:.1f}" for phase, label in PHASES if phase in phases) + ")",
+                 xbmc.LOGINFO)
+        slowest = record(action, elapsed, phases, _counters['items'])
+        if profiler and slowest:
+            _dump_profile(profiler, action)
+
+def _dump_name(action):
+    """Nom de fichier du profil d'une action : `action` vient de l'URL, seuls [A-Za-z0-9_] sont gardés"""
+    return re.sub(r'[^A-Za-z0-9_]', '', action) or 'menu'
+
+def _dump_profile(profiler, action):
+    import io
+    import pstats
+    directory = profile_file(PROFILES_DIR)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, _dump_name(action))
+    profiler.dump_stats(f"{path}.prof")
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(30)
+    with open(f"{path}.txt", 'w', encoding='utf-8') as f:
+        f.write(text.getvalue())
+    xbmc.log(f"[Brainrot Manager] Profil cProfile le plus lent de {action} : {path}.prof", xbmc.LOGINFO)
+
+def profile_dump_path(action):
+    """Chemin du profil cProfile de l'appel le plus lent de `action`, ou None"""
+    path = os.path.join(profile_file(PROFILES_DIR), f"{_dump_name(action)}.prof")
+    return path if os.path.exists(path) else None
+
+# --- Statistiques glissantes ---
+def _read_stats(path):
+    try:
+        with open(path, 'rb') as f:
+            data = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return {}
+    if not isinstance(data, dict) or data.get('format') != STATS_FORMAT:
+        return {}
+    return data.get('actions', {})
+
+def load_stats():
+    """{action: [[ms, {phase: ms}, éléments], ...]} des ROLLING_SIZE dernières mesures"""
+    return _read_stats(profile_file(STATS_NAME))
+
+def record(action, elapsed, phases, items):
+    """Ajoute une mesure aux statistiques ; vrai si c'est la plus lente connue pour l'action"""
+    path = profile_file(STATS_NAME)
+    try:
+        with safeio.file_lock(path):
+            actions = _read_stats(path)
+            samples = actions.setdefault(action, [])
+            slowest = all(elapsed > s[0] for s in samples)
+            samples.append([elapsed, phases, items])
+            del samples[:-ROLLING_SIZE]
+            safeio.atomic_write(path, marshal.dumps({'format': STATS_FORMAT, 'actions': actions}))
+    except OSError as e:
+        xbmc.log(f"[Brainrot Manager] Statistiques de profilage non enregistrées : {e}", xbmc.LOGWARNING)
+        return False
+    return slowest
+
+def reset():
+    """Efface les statistiques et les profils cProfile"""
+    path = profile_file(STATS_NAME)
+    with safeio.file_lock(path):
+        safeio.atomic_write(path, marshal.dumps({'format': STATS_FORMAT, 'actions': {}}))
+    directory = profile_file(PROFILES_DIR)
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+
+def percentile(values, p):
+    """Percentile au rang le plus proche (values non vide)"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+def summary():
+    """[(action, mesures, p50, p95, {phase: (p50, p95)})], actions les plus lentes (p95) d'abord"""
+    rows = []
+    for action, samples in load_stats().items():
+        if not samples:
+            continue
+        totals = [s[0] for s in samples]
+        phases = {phase: (percentile(v, 50), percentile(v, 95))
+                  for phase, _ in PHASES
+                  for v in [[s[1].get(phase, 0.0) for s in samples]] if any(v)}
+        rows.append((action, len(samples), percentile(totals, 50), percentile(totals, 95), phases))
+    rows.sort(key=lambda r: -r[3])
+    return rows
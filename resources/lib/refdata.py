@@ -0,0 +1,199 @@
+﻿# -*- coding: utf-8 -*-
+import os
+import sys
+import json
+import marshal
+import struct
+import time
+from array import array
+import xbmc
+
+import safeio
+from paths import brainrots_data_path, traits_data_path, mutations_data_path, profile_file
+
+# --- Snapshot binaire des données de référence (catalogue, traits, mutations) ---
+# Le JSON source n'est relu que si sa date de modification ou sa taille change.
+# marshal suffit (types JSON uniquement) et se relit plus vite que pickle ;
+# le format dépend de la version de Python, d'où la clé SNAPSHOT_FORMAT.
+SNAPSHOT_NAME = 'refdata.snapshot'
+SNAPSHOT_FORMAT = (1, sys.version_info[0], sys.version_info[1])
+
+SOURCES = {
+    'catalog': (brainrots_data_path, 'utf-8-sig'),
+    'traits': (traits_data_path, 'latin-1'),
+    'mutations': (mutations_data_path, 'latin-1'),
+}
+
+stats = {'hits': 0, 'misses': 0}
+_loaded = {}
+_snapshot = None
+
+def log(message, level=xbmc.LOGDEBUG):
+    xbmc.log(f"[Brainrot Manager] {message}", level)
+
+def source_signature(name):
+    """Signature (mtime, taille) du fichier source ; lève OSError s'il est absent"""
+    st = os.stat(SOURCES[name][0])
+    return (st.st_mtime_ns, st.st_size)
+
+def _read_snapshot():
+    global _snapshot
+    if _snapshot is None:
+        _snapshot = _read_snapshot_file()
+    return _snapshot
+
+def _read_snapshot_file():
+    try:
+        with open(profile_file(SNAPSHOT_NAME), 'rb') as f:
+            snapshot = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return {}
+    if not isinstance(snapshot, dict) or snapshot.get('format') != SNAPSHOT_FORMAT:
+        return {}
+    return snapshot.get('entries', {})
+
+def _write_snapshot(entries):
+    try:
+        safeio.atomic_write(profile_file(SNAPSHOT_NAME), marshal.dumps({'format': SNAPSHOT_FORMAT, 'entries': entries}))
+    except OSError as e:
+        # Le cache est facultatif : on continue avec les données déjà parsées
+        log(f"Écriture du snapshot impossible : {e}", xbmc.LOGWARNING)
+
+def _parse_source(name):
+    path, encoding = SOURCES[name]
+    with open(path, 'r', encoding=encoding) as f:
+        return json.load(f)
+
+def load(*names):
+    """Charge une ou plusieurs sources depuis le snapshot, en reconstruisant celles qui ont changé
+
+    Lève OSError si un fichier source est absent et ValueError si son JSON est invalide.
+    """
+    wanted = [n for n in names if n not in _loaded]
+    if wanted:
+        start = time.perf_counter()
+        entries = _read_snapshot()
+        stale = False
+        for name in wanted:
+            signature = list(source_signature(name))
+            entry = entries.get(name)
+            if entry and entry.get('signature') == signature:
+                stats['hits'] += 1
+                log(f"Cache {name} : hit")
+            else:
+                stats['misses'] += 1
+                log(f"Cache {name} : miss, relecture de {SOURCES[name][0]}", xbmc.LOGINFO)
+                entry = {'signature': signature, 'data': _parse_source(name)}
+                entries[name] = entry
+                stale = True
+            _loaded[name] = entry['data']
+        if stale:
+            _write_snapshot(entries)
+        log(f"Données de référence {', '.join(wanted)} prêtes en {(time.perf_counter() - start) * 1000:.1f} ms "
+            f"(hits={stats['hits']}, misses={stats['misses']})", xbmc.LOGINFO)
+    return tuple(_loaded[n] for n in names)
+
+def get_catalog():
+    return load('catalog')[0]
+
+def get_traits():
+    return load('traits')[0]
+
+def get_mutations():
+    return load('mutations')[0]
+
+_indexes = {}
+
+def lookup(name, key='Name'):
+    """Dictionnaire {valeur de `key`: entrée} construit une fois par processus"""
+    if (name, key) not in _indexes:
+        _indexes[(name, key)] = {e.get(key): e for e in load(name)[0]}
+    return _indexes[(name, key)]
+
+# --- Fichiers d'enregistrements, pour l'affichage paginé ---
+# Chaque enregistrement est sérialisé séparément ; l'en-tête contient la table des positions,
+# si bien que lire la page N ne désérialise que les enregistrements de cette page.
+#   [taille de l'en-tête sur 8 octets][en-tête marshal][enregistrement 0][enregistrement 1]...
+RECORDS_NAME = 'catalog.records'
+_HEADER_SIZE = struct.Struct('<Q')
+_records = None
+
+def write_records(path, signature, items):
+    """Écrit `items` dans un fichier d'enregistrements lié à `signature`"""
+    blobs = [marshal.dumps(item) for item in items]
+    offsets = array('Q', [0])
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+    header = marshal.dumps({'format': SNAPSHOT_FORMAT, 'signature': signature, 'offsets': offsets.tobytes()})
+    try:
+        safeio.atomic_write(path, _HEADER_SIZE.pack(len(header)) + header + b''.join(blobs))
+    except OSError as e:
+        log(f"Écriture de {os.path.basename(path)} impossible : {e}", xbmc.LOGWARNING)
+
+def open_records(path, signature):
+    """Retourne (fichier, positions, début des données), ou None si le fichier est absent ou périmé"""
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        return None
+    try:
+        (size,) = _HEADER_SIZE.unpack(f.read(_HEADER_SIZE.size))
+        header = marshal.loads(f.read(size))
+        if header.get('format') == SNAPSHOT_FORMAT and header.get('signature') == signature:
+            offsets = array('Q')
+            offsets.frombytes(header['offsets'])
+            return (f, offsets, _HEADER_SIZE.size + size)
+    except (struct.error, EOFError, ValueError, TypeError, AttributeError):
+        pass
+    f.close()
+    return None
+
+def read_records(records, positions):
+    """Enregistrements aux positions demandées, dans l'ordre demandé"""
+    f, offsets, start = records
+    items = []
+    for pos in positions:
+        f.seek(start + offsets[pos])
+        items.append(marshal.loads(f.read(offsets[pos + 1] - offsets[pos])))
+    return items
+
+def read_page(records, offset, limit):
+    """Retourne (enregistrements de la page, nombre total) en une seule lecture contiguë"""
+    f, offsets, start = records
+    total = len(offsets) - 1
+    first, last = max(0, min(offset, total)), max(0, min(offset + limit, total))
+    f.seek(start + offsets[first])
+    chunk = f.read(offsets[last] - offsets[first])
+    base = offsets[first]
+    return [marshal.loads(chunk[offsets[i] - base:offsets[i + 1] - base]) for i in range(first, last)], total
+
+def _open_records():
+    global _records
+    if _records is not None:
+        return _records
+
+    path = profile_file(RECORDS_NAME)
+    signature = list(source_signature('catalog'))
+    _records = open_records(path, signature)
+    if _records is not None:
+        stats['hits'] += 1
+        return _records
+    stats['misses'] += 1
+    catalog = get_catalog()
+    write_records(path, signature, catalog)
+    log(f"Index paginé du catalogue reconstruit ({len(catalog)} fiches)", xbmc.LOGINFO)
+    _records = open_records(path, signature)
+    if _records is None:
+        raise ValueError(f"Index paginé {RECORDS_NAME} illisible")
+    return _records
+
+def catalog_count():
+    return len(_open_records()[1]) - 1
+
+def catalog_records(positions):
+    """Fiches du catalogue aux positions demandées, dans l'ordre demandé"""
+    return read_records(_open_records(), positions)
+
+def catalog_page(offset, limit):
+    """Retourne (fiches de la page, nombre total de fiches) en une seule lecture contiguë"""
+    return read_page(_open_records(), offset, limit)
@@ -0,0 +1,169 @@
+﻿# -*- coding: utf-8 -*-
+import marshal
+import struct
+import xbmc
+
+import income
+import inventory
+import refdata
+import safeio
+from formatting import format_money
+from paths import profile_file
+
+# --- Cache de rendu : champs des listings calculés une fois par version des données ---
+# Une ligne (Row) contient tout ce que Kodi affiche : libellés, genres, résumé, année...
+# Le catalogue est stocké ligne par ligne dans un fichier d'enregistrements (voir
+# refdata.write_records) pour ne relire que la page affichée. Les brainrots possédées
+# sont indexées par (CatalogId, mutation, traits) : une même combinaison n'est mise en
+# forme qu'une fois, quelle que soit la base, et les actions n'invalident rien. Les
+# nouvelles lignes sont ajoutées en fin de fichier ; au premier ajout après un changement
+# d'inventaire, le fichier est réécrit avec les seules combinaisons encore possédées.
+CATALOG_ROWS_NAME = 'catalog.rows'
+OWNED_ROWS_NAME = 'owned.rows'
+ROWS_FORMAT = 2
+BLOCK_SIZE = struct.Struct('<I')  # taille de chaque bloc marshal du fichier des lignes possédées
+
+class Row:
+    """Ligne de listing prête à afficher"""
+    __slots__ = ('label', 'label2', 'title', 'genres', 'plot', 'year', 'date_added', 'image', 'trait_images')
+
+    def __init__(self, values):
+        (self.label, self.label2, self.title, self.genres, self.plot,
+         self.year, self.date_added, self.image, self.trait_images) = values
+
+def _dates(added):
+    year = int(added.split("-")[0]) if added and added[:4].isdigit() else 2025
+    return year, f"{added if added else '2025-01-01'} 00:00:00"
+
+def catalog_row(b):
+    """Tuple de rendu d'une fiche du catalogue"""
+    name = b.get("Name", "Inconnu")
+    rarity = b.get("Rarity", "???")
+    cost_str = format_money(b.get("Cost", 0))
+    income_str = format_money(b.get("BaseIncomePerSecond", 0))
+    acquisition = b.get("Acquisition", {})
+    plot = (f"{b.get('Description', '')} {acquisition.get('Purchase', '')} {acquisition.get('Steal', '')} "
+            f"{acquisition.get('Strategy', '')} {b.get('Controversy', '')}")
+    year, date_added = _dates(b.get("AddedAt", ""))
+    return (name, f"{rarity} - {cost_str} - {income_str}/s", name, [rarity, f"Prix: {cost_str}", f"Revenu: {income_str}/s"],
+            plot, year, date_added, b.get("Image", ""), [])
+
+def owned_row(b):
+    """Tuple de rendu d'une brainrot possédée (fiche complète, voir inventory.resolve_brainrot)"""
+    name = b.get("Name", "Inconnu")
+    rarity = b.get("Rarity", "???")
+    cost_str = format_money(b.get("Cost", 0))
+    income_str = format_money(income.resolved_income(b))
+    acquisition = b.get("Acquisition", {})
+    traits = b.get("Traits", [])
+    genres = [m for m in [b.get("Mutation", {}).get("Name", "")] if m] + [t.get("Name", "") for t in traits if t.get("Name")]
+    plot = (f"{b.get('Description', '')}\n\n{acquisition.get('Purchase', '')}\n{acquisition.get('Steal', '')}\n"
+            f"{acquisition.get('Strategy', '')}\n{b.get('Controversy', '')}")
+    if traits:
+        plot += "\n\nTraits associés:\n" + "".join(
+            f"• {t.get('Name')} (x{t.get('Multiplier')}) - {t.get('Description', '')}\n" for t in traits)
+    label = f"{name} - {rarity} - {income_str}/s"
+    year, date_added = _dates(b.get("AddedAt", ""))
+    return (label, f"{rarity} - {cost_str} - {income_str}/s", label, genres, plot, year, date_added,
+            b.get("Image", ""), [t.get("Image", "") for t in traits])
+
+# --- Catalogue ---
+_catalog_rows = None
+
+def _open_catalog_rows():
+    global _catalog_rows
+    if _catalog_rows is not None:
+        return _catalog_rows
+    path = profile_file(CATALOG_ROWS_NAME)
+    signature = [ROWS_FORMAT, list(refdata.source_signature('catalog'))]
+    _catalog_rows = refdata.open_records(path, signature)
+    if _catalog_rows is None:
+        catalog = refdata.get_catalog()
+        refdata.write_records(path, signature, [catalog_row(b) for b in catalog])
+        refdata.log(f"Cache de rendu du catalogue reconstruit ({len(catalog)} lignes)", xbmc.LOGINFO)
+        _catalog_rows = refdata.open_records(path, signature)
+        if _catalog_rows is None:
+            raise ValueError(f"Cache de rendu {CATALOG_ROWS_NAME} illisible")
+    return _catalog_rows
+
+def catalog_rows(positions):
+    return [Row(values) for values in refdata.read_records(_open_catalog_rows(), positions)]
+
+def catalog_page(offset, limit):
+    """Retourne (lignes de la page, nombre total de lignes) ; limit <= 0 : jusqu'à la fin"""
+    records = _open_catalog_rows()
+    rows, total = refdata.read_page(records, offset, limit if limit > 0 else len(records[1]))
+    return [Row(values) for values in rows], total
+
+# --- Brainrots possédées ---
+def _owned_signature():
+    return [ROWS_FORMAT] + [list(refdata.source_signature(name)) for name in ('catalog', 'traits', 'mutations')]
+
+def _row_key(entry):
+    return entry.get("CatalogId"), entry.get("Mutation", ""), tuple(entry.get("Traits", []))
+
+def _pack(value):
+    data = marshal.dumps(value)
+    return BLOCK_SIZE.pack(len(data)) + data
+
+def _unpack(data, offset):
+    """(valeur, position suivante) du bloc à la position offset"""
+    size, = BLOCK_SIZE.unpack_from(data, offset)
+    offset += BLOCK_SIZE.size
+    if offset + size > len(data):
+        raise EOFError("bloc tronqué")
+    return marshal.loads(data[offset:offset + size]), offset + size
+
+def _read_owned(signature):
+    """(version de l'inventaire, lignes) ; version None si le fichier doit être réécrit"""
+    rows = {}
+    try:
+        with open(profile_file(OWNED_ROWS_NAME), 'rb') as f:
+            data = f.read()
+        header, offset = _unpack(data, 0)
+        if not isinstance(header, dict) or header.get('signature') != signature:
+            return None, {}
+        while offset < len(data):
+            chunk, offset = _unpack(data, offset)
+            if not isinstance(chunk, dict):
+                raise ValueError("bloc de lignes invalide")
+            rows.update(chunk)
+        return header.get('version'), rows
+    except (OSError, EOFError, ValueError, TypeError, struct.error):
+        # Ajout interrompu : on garde les blocs lus, la prochaine écriture compacte
+        return None, rows
+
+def _write_owned(signature, version, cached_version, cache, added):
+    path = profile_file(OWNED_ROWS_NAME)
+    if version is not None and version == cached_version:
+        with open(path, 'ab') as f:
+            f.write(_pack(added))
+        return
+    # Nouvel inventaire : seules les combinaisons encore possédées sont conservées
+    owned = {_row_key(entry) for _, entries in inventory.stream_bases()[1] for entry in entries}
+    rows = {key: values for key, values in cache.items() if key in owned or key in added}
+    safeio.atomic_write(path, _pack({'signature': signature, 'version': version}) + _pack(rows))
+
+def owned_rows(entries):
+    """Lignes des entrées normalisées d'une base ; seules les combinaisons inédites sont mises en forme"""
+    signature = _owned_signature()
+    cached_version, cache = _read_owned(signature)
+    catalog = refdata.lookup('catalog', 'Id')
+    rows = []
+    added = {}
+    for entry in entries:
+        if entry.get("CatalogId") not in catalog:
+            # Entrée orpheline : ses propres champs, jamais mis en cache
+            rows.append(Row(owned_row(inventory.resolve_brainrot(entry))))
+            continue
+        key = _row_key(entry)
+        values = cache.get(key)
+        if values is None:
+            values = cache[key] = added[key] = owned_row(inventory.resolve_brainrot(entry))
+        rows.append(Row(values))
+    if added:
+        try:
+            _write_owned(signature, inventory.version(), cached_version, cache, added)
+        except OSError as e:
+            refdata.log(f"Écriture de {OWNED_ROWS_NAME} impossible : {e}", xbmc.LOGWARNING)
+    return rows
@@ -0,0 +1,103 @@
+﻿# -*- coding: utf-8 -*-
+import os
+import time
+import hashlib
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# --- Écritures sûres : verrou consultatif + fichier temporaire, fsync et renommage atomique ---
+# Plusieurs RunPlugin(...) peuvent s'exécuter en même temps : un lecteur voit toujours
+# soit l'ancien fichier complet, soit le nouveau, jamais un fichier tronqué.
+LOCK_TIMEOUT = 10.0
+
+class LockTimeout(OSError):
+    """Le verrou n'a pas pu être obtenu dans le délai imparti"""
+
+def _try_lock(fd):
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+def _unlock(fd):
+    if fcntl:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+@contextmanager
+def file_lock(path, timeout=LOCK_TIMEOUT):
+    """Verrou exclusif inter-processus sur `path` (via le fichier `path`.lock)"""
+    fd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        deadline = time.monotonic() + timeout
+        delay = 0.005
+        while not _try_lock(fd):
+            if time.monotonic() > deadline:
+                raise LockTimeout(f"Verrou indisponible : {path}")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+def atomic_write(path, data):
+    """Écrit `data` (bytes) dans un fichier temporaire voisin puis le renomme sur `path`"""
+    with atomic_writer(path) as f:
+        f.write(data)
+
+@contextmanager
+def atomic_writer(path):
+    """Fichier binaire temporaire voisin de `path`, renommé sur `path` si le bloc se termine sans erreur
+
+    Permet d'écrire un gros fichier au fil de l'eau avec les mêmes garanties qu'atomic_write.
+    """
+    directory = os.path.dirname(path) or '.'
+    # Nom unique par processus et par appel (tempfile coûterait un import lourd à chaque clic)
+    tmp = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.{time.monotonic_ns()}.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    # Rend le renommage durable (impossible d'ouvrir un dossier sous Windows)
+    if fcntl:
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def content_version(data):
+    """Version d'un contenu : empreinte de ses octets (None pour un fichier absent)"""
+    return hashlib.sha1(data).hexdigest() if data is not None else None
+
+def read_versioned(path):
+    """Retourne (octets, version) ; (None, None) si le fichier n'existe pas"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None, None
+    return data, content_version(data)
@@ -0,0 +1,255 @@
+﻿# -*- coding: utf-8 -*-
+import os
+import re
+import time
+import bisect
+import hashlib
+import marshal
+import unicodedata
+import xbmc
+
+import inventory
+import refdata
+import safeio
+from paths import profile_file
+
+# --- Recherche plein texte et par préfixe (catalogue, traits, brainrots possédées) ---
+# Un index par source : liste triée des mots (recherche de préfixe par bisect) et, alignées
+# sur elle, les listes de documents qui les contiennent. Chaque source a son fichier, lié à
+# la signature de ses données : seule une source modifiée est réindexée et réécrite, et une
+# recherche dans le catalogue ne lit pas l'inventaire.
+# Les brainrots possédées ont un index par base (dossier OWNED_DIR) : chaque action de
+# l'inventaire ne réindexe que les bases qu'elle modifie (update_owned, appelé par inventory.commit).
+# Tous les mots de la requête doivent correspondre (chacun comme préfixe), si bien que
+# "lir lar" trouve "Lirilì Larilà" ; les correspondances dans le nom passent en tête.
+INDEX_NAME = 'search.{}.index'
+INDEX_FORMAT = 3
+OWNED_DIR = 'search.owned'
+SOURCES = ('catalog', 'traits', 'owned')
+
+_WORD = re.compile(r"[a-z0-9]+")
+_indexes = {}
+
+def tokens(text):
+    """Mots normalisés : minuscules, sans accents"""
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode('ascii')
+    return _WORD.findall(text.lower())
+
+# --- Construction ---
+def _catalog_documents():
+    for position, b in enumerate(refdata.get_catalog()):
+        other = [b.get("Id", ""), b.get("Rarity", ""), b.get("Event") or "", b.get("Description", "")]
+        yield position, b.get("Name", ""), other
+
+def _traits_documents():
+    for position, t in enumerate(refdata.get_traits()):
+        yield position, t.get("Name", ""), [t.get("Description", "")]
+
+def _base_documents(base):
+    catalog = refdata.lookup('catalog', 'Id')
+    for entry in base.get("Brainrots", []):
+        item = catalog.get(entry.get("CatalogId")) or entry
+        other = [base.get("Name", ""), entry.get("Mutation", ""), item.get("Rarity", "")] + list(entry.get("Traits", []))
+        yield (base.get("Name", ""), entry.get("Id", "")), item.get("Name", ""), other
+
+_DOCUMENTS = {'catalog': _catalog_documents, 'traits': _traits_documents}
+
+def _signature(source):
+    if source == 'catalog':
+        return [list(refdata.source_signature('catalog'))]
+    if source == 'traits':
+        return [list(refdata.source_signature('traits'))]
+    return [inventory.version(), list(refdata.source_signature('catalog'))]
+
+def _index(documents):
+    """Index de documents (doc, nom, autres textes) : {'docs', 'words', 'postings', 'names'}"""
+    docs = []
+    postings = {}
+    names = {}
+    for doc, name, other in documents:
+        position = len(docs)
+        docs.append(doc)
+        name_words = set(tokens(name))
+        for word in name_words:
+            names.setdefault(word, []).append(position)
+        for word in name_words.union(*(tokens(text) for text in other)):
+            postings.setdefault(word, []).append(position)
+    words = sorted(postings)
+    return {
+        'docs': docs,
+        'words': words,
+        'postings': [postings[w] for w in words],
+        'names': [names.get(w, []) for w in words],
+    }
+
+def _read(path):
+    try:
+        with open(path, 'rb') as f:
+            data = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(data, dict) or data.get('format') != INDEX_FORMAT:
+        return None
+    return data.get('index')
+
+def _write(path, index):
+    try:
+        safeio.atomic_write(path, marshal.dumps({'format': INDEX_FORMAT, 'index': index}))
+    except OSError as e:
+        refdata.log(f"Écriture de {os.path.basename(path)} impossible : {e}", xbmc.LOGWARNING)
+
+# --- Index des brainrots possédées : une partie par base ---
+# INDEX_NAME.format('owned') ne contient que la signature et l'ordre des bases ; l'index de
+# chaque base est dans OWNED_DIR, sous l'empreinte de son nom.
+def _part_path(base_name):
+    folder = profile_file(OWNED_DIR)
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, hashlib.sha1(base_name.encode('utf-8')).hexdigest()[:20] + '.index')
+
+def _write_part(base):
+    _write(_part_path(base.get("Name", "")), _index(_base_documents(base)))
+
+def _build_owned(signature):
+    """Réindexe toutes les bases ; retourne le manifeste {'signature', 'bases'}"""
+    bases = inventory.load_all_bases()
+    folder = profile_file(OWNED_DIR)
+    if os.path.isdir(folder):
+        for name in os.listdir(folder):
+            os.remove(os.path.join(folder, name))
+    for base in bases:
+        _write_part(base)
+    manifest = {'signature': signature, 'bases': [base.get("Name", "") for base in bases]}
+    _write(profile_file(INDEX_NAME.format('owned')), manifest)
+    return manifest
+
+def _load_owned(manifest):
+    """{'signature', 'parts'} depuis le manifeste, ou None s'il manque une partie"""
+    parts = [_read(_part_path(name)) for name in manifest['bases']]
+    if any(part is None for part in parts):
+        return None
+    return {'signature': manifest['signature'], 'parts': parts}
+
+def update_owned(op, result, before, after):
+    """Applique une opération à l'index des brainrots possédées, s'il correspondait à la version `before`
+
+    Seules les bases lues ou modifiées par l'opération sont relues et réindexées.
+    """
+    path = profile_file(INDEX_NAME.format('owned'))
+    manifest = _read(path)
+    if not manifest or before is None:
+        return
+    catalog = list(refdata.source_signature('catalog'))
+    if manifest.get('signature') != [before, catalog]:
+        return
+    names = manifest['bases']
+    kind = op["op"]
+    try:
+        if kind == "add_base":
+            names.append(op["name"])
+            changed, removed = [op["name"]], []
+        elif kind == "delete_base":
+            names.remove(op["name"])
+            changed, removed = [], [op["name"]]
+        elif kind == "rename_base":
+            # Le nom de la base fait partie des textes indexés de ses brainrots
+            names[names.index(op["name"])] = op["new_name"]
+            changed, removed = [op["new_name"]], [op["name"]]
+        else:
+            changed, removed = list(dict.fromkeys([op["base"], op.get("target", op["base"])])), []
+        for name in changed:
+            base = inventory.get_base(name)
+            if base is None:
+                return
+            _write_part(base)
+        for name in removed:
+            os.remove(_part_path(name))
+    except (KeyError, ValueError, OSError):
+        # Index incohérent : il sera reconstruit à la prochaine lecture (version différente)
+        return
+    _write(path, {'signature': [after, catalog], 'bases': names})
+    _indexes.pop('owned', None)
+
+# --- Chargement ---
+def _load_source(source):
+    """Index d'une source, reconstruit si ses données ont changé ; None s'il est indisponible"""
+    try:
+        signature = _signature(source)
+    except OSError:
+        return None
+    entry = _read(profile_file(INDEX_NAME.format(source)))
+    if entry and entry.get('signature') == signature:
+        if source != 'owned':
+            return entry
+        owned = _load_owned(entry)
+        if owned:
+            return owned
+    start = time.perf_counter()
+    try:
+        if source == 'owned':
+            entry = _load_owned(_build_owned(signature))
+        else:
+            entry = dict(_index(_DOCUMENTS[source]()), signature=signature)
+            _write(profile_file(INDEX_NAME.format(source)), entry)
+    except (OSError, ValueError) as e:
+        refdata.log(f"Index de recherche {source} impossible : {e}", xbmc.LOGWARNING)
+        return None
+    documents = sum(len(part['docs']) for part in entry['parts']) if source == 'owned' else len(entry['docs'])
+    refdata.log(f"Index de recherche {source} reconstruit ({documents} documents) "
+                f"en {(time.perf_counter() - start) * 1000:.1f} ms", xbmc.LOGINFO)
+    return entry
+
+def load_index(sources=SOURCES):
+    """{source: index} pour `sources`, en ne reconstruisant que celles dont les données ont changé"""
+    for source in sources:
+        if source not in _indexes:
+            _indexes[source] = _load_source(source)
+    return {source: _indexes[source] for source in sources if _indexes[source]}
+
+# --- Requêtes ---
+def _prefix_matches(index, prefix, key):
+    """Union des documents dont un mot commence par `prefix`"""
+    words = index['words']
+    first = bisect.bisect_left(words, prefix)
+    last = bisect.bisect_left(words, prefix + '\x7f', first)
+    if last - first == 1:
+        return set(index[key][first])
+    found = set()
+    for lists in index[key][first:last]:
+        found.update(lists)
+    return found
+
+def _search(index, terms):
+    """[(hors du nom, position)] des documents de `index` qui contiennent tous les termes"""
+    matches = None
+    for term in sorted(terms, key=len, reverse=True):  # le plus sélectif d'abord
+        found = _prefix_matches(index, term, 'postings')
+        matches = found if matches is None else matches & found
+        if not matches:
+            return []
+    in_name = set(matches)
+    for term in terms:
+        in_name &= _prefix_matches(index, term, 'names')
+    return [(position not in in_name, position) for position in matches]
+
+def query(text, sources=SOURCES, limit=None):
+    """Documents correspondant à tous les mots de `text` : [(source, document)]
+
+    Document : position dans le catalogue ou la liste des traits, (base, Id) pour une brainrot possédée.
+    Les correspondances dans le nom passent en tête, puis l'ordre de la source.
+    """
+    terms = tokens(text)
+    if not terms:
+        return []
+    indexes = load_index(sources)
+    results = []
+    for source in sources:
+        index = indexes.get(source)
+        if not index:
+            continue
+        parts = index['parts'] if source == 'owned' else [index]
+        found = sorted((outside, number, position) for number, part in enumerate(parts)
+                       for outside, position in _search(part, terms))
+        results += [(source, parts[number]['docs'][position]) for _, number, position in found]
+        if limit is not None and len(results) >= limit:
+            return results[:limit]
+    return results
@@ -0,0 +1,68 @@
+﻿# -*- coding: utf-8 -*-
+import xbmcgui
+import xbmcplugin
+
+import images
+import income
+import inventory
+import refdata
+import search
+from formatting import format_money
+from plugin import handle, build_url
+
+# --- Vue des résultats de recherche (voir search.py) ---
+def show_search(text=None):
+    """Recherche dans le catalogue, les traits et les brainrots possédées"""
+    if text is None:
+        text = xbmcgui.Dialog().input("Rechercher (nom, rareté, événement, trait...)")
+    if not text:
+        return
+    xbmcplugin.setPluginCategory(handle, f"Recherche : {text}")
+    xbmcplugin.setContent(handle, "movies")
+
+    try:
+        results = search.query(text)
+        catalog, traits = refdata.load('catalog', 'traits')
+    except OSError as e:
+        xbmcgui.Dialog().ok("Erreur", f"Fichier introuvable : {e.filename}")
+        return
+    except ValueError as e:
+        xbmcgui.Dialog().ok("Erreur JSON", f"Impossible de lire les données :\n{e}")
+        return
+
+    owned = {}
+    if any(source == 'owned' for source, _ in results):
+        owned = {(base.get("Name"), e.get("Id")): e for base in inventory.load_all_bases() for e in base.get("Brainrots", [])}
+    missing_images = []
+    for source, doc in results:
+        url, is_folder = "", False
+        if source == 'traits':
+            t = traits[doc]
+            list_item = xbmcgui.ListItem(label=f"🧬 {t.get('Name', 'Inconnu')}", label2=f"{t.get('Multiplier', 1.0)}X")
+            list_item.getVideoInfoTag().setPlot(t.get("Description", ""))
+            art = images.art('traits', t.get("Image", ""), missing_images)
+        else:
+            if source == 'catalog':
+                b = catalog[doc]
+                label = b.get("Name", "Inconnu")
+            else:
+                base_name = doc[0]
+                entry = owned.get(tuple(doc))
+                if entry is None:
+                    continue
+                b = inventory.resolve_brainrot(entry)
+                label = f"🧱 {b.get('Name', 'Inconnu')} ({base_name})"
+                url, is_folder = build_url({'action': 'show_base_brainrots', 'base': base_name}), True
+            cost_str = format_money(b.get("Cost", 0))
+            income_str = format_money(income.resolved_income(b) if source == 'owned' else b.get("BaseIncomePerSecond", 0))
+            list_item = xbmcgui.ListItem(label=label, label2=f"{b.get('Rarity', '???')} - {cost_str} - {income_str}/s")
+            info_tag = list_item.getVideoInfoTag()
+            info_tag.setTitle(label)
+            info_tag.setGenres([b.get("Rarity", "???")])
+            info_tag.setPlot(b.get("Description", ""))
+            art = images.art('brainrots', b.get("Image", ""), missing_images)
+        list_item.setArt(art or {'icon': 'DefaultFolder.png'})
+        xbmcplugin.addDirectoryItem(handle=handle, url=url, listitem=list_item, isFolder=is_folder)
+
+    xbmcplugin.endOfDirectory(handle)
+    images.report_missing('brainrots', missing_images)
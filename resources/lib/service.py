@@ -0,0 +1,219 @@
+﻿# -*- coding: utf-8 -*-
+import os
+import sys
+import time
+import importlib
+import threading
+import xbmc
+import xbmcaddon
+
+# --- Service d'arrière-plan : caches du profil préparés dès le démarrage de Kodi ---
+# Kodi lance ce script une fois par session (extension xbmc.service). Un thread exécute les
+# tâches de préchauffage ; chaque cache vérifie lui-même la signature de ses sources et ne se
+# reconstruit que s'il est périmé. Le script relève ensuite régulièrement les dates de
+# modification des fichiers surveillés et ne relance que les tâches qui en dépendent.
+# Pendant la lecture d'une vidéo, le travail est suspendu puis repris à l'arrêt.
+STARTUP_DELAY = 10
+POLL_INTERVAL = 30
+PAUSE_CHECK = 1
+
+# Modules qui gardent leurs données en mémoire pour la durée d'un clic : rechargés avant
+# chaque tâche pour que ce processus de longue durée relise les caches à jour
+CACHED_MODULES = ('refdata', 'images', 'render', 'search', 'facets')
+
+def log(message, level=xbmc.LOGINFO):
+    xbmc.log(f"[Brainrot Manager] Service : {message}", level)
+
+# --- Tâches de préchauffage, dans l'ordre d'exécution ---
+# Chaque tâche reçoit `keep_going()` et retourne False si elle a été interrompue.
+def _warm_bytecode(keep_going):
+    import maintenance
+    maintenance.compile_modules()
+
+def _warm_refdata(keep_going):
+    import refdata
+    refdata.load('catalog', 'traits', 'mutations')
+    refdata.catalog_count()
+
+def _warm_facets(keep_going):
+    import facets
+    facets.values('rarity')
+
+def _warm_catalog_rows(keep_going):
+    import render
+    render.catalog_page(0, 1)
+
+def _warm_images(keep_going):
+    import images
+    images.load_manifest()
+
+def _warm_search(keep_going):
+    import search
+    search.load_index()
+
+def _warm_income(keep_going):
+    import inventory
+    inventory.base_totals()
+
+def _warm_whatif(keep_going):
+    import whatif
+    whatif.results()
+
+def _warm_owned_rows(keep_going):
+    import inventory
+    import render
+    for _, entries in inventory.stream_bases()[1]:
+        if not keep_going():
+            return False
+        # Les lignes sont indexées par configuration : un exemplaire de chaque suffit
+        render.owned_rows([stack[0] for stack in inventory.stack_entries(entries)])
+
+def _warm_thumbnails(keep_going):
+    import images
+    import thumbnails
+    if not thumbnails.available():
+        return
+    for kind, src_dir in images.DIRECTORIES.items():
+        if not keep_going():
+            return False
+        generated, _, errors = thumbnails.build(src_dir, images.thumbnails_dir(kind), names=images.load_manifest()[kind],
+                                                workers=2, use_processes=False,
+                                                progress=lambda done, total: keep_going())
+        if not keep_going():
+            return False
+        if generated or errors:
+            log(f"miniatures {kind} : {generated} générées, {len(errors)} en erreur")
+
+TASKS = [
+    ('bytecode', _warm_bytecode),
+    ('refdata', _warm_refdata),
+    ('facets', _warm_facets),
+    ('catalog_rows', _warm_catalog_rows),
+    ('images', _warm_images),
+    ('search', _warm_search),
+    ('income', _warm_income),
+    ('whatif', _warm_whatif),
+    ('owned_rows', _warm_owned_rows),
+    ('thumbnails', _warm_thumbnails),
+]
+
+def _task_order(name):
+    return [n for n, _ in TASKS].index(name)
+
+# --- Fichiers surveillés : groupe -> (chemins, tâches à relancer quand l'un d'eux change) ---
+def watched():
+    import images
+    import jsonstore
+    import refdata
+    import sqlstore
+    lib_dir = os.path.dirname(os.path.abspath(__file__))
+    # Fichiers du compte actif : un changement de compte ou de dossier de données change la liste
+    inventory_paths = [jsonstore.index_path(), jsonstore.journal_path(), sqlstore.db_path(), sqlstore.db_path() + '-wal']
+    return {
+        'code': ([lib_dir], ['bytecode']),
+        'refdata': ([path for path, _ in refdata.SOURCES.values()],
+                    ['refdata', 'facets', 'catalog_rows', 'search', 'income', 'whatif', 'owned_rows']),
+        'inventory': (inventory_paths, ['search', 'income', 'whatif', 'owned_rows']),
+        'images': (list(images.DIRECTORIES.values()), ['images', 'thumbnails']),
+    }
+
+def signature(paths):
+    """(mtime, taille) de chaque chemin, None pour un chemin absent"""
+    result = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            result.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            result.append(None)
+    return result
+
+def changed_tasks(signatures):
+    """Tâches dont un fichier surveillé a changé depuis le relevé précédent (`signatures` est mis à jour)"""
+    tasks = set()
+    for group, (paths, group_tasks) in watched().items():
+        current = signature(paths)
+        if signatures.get(group) != current:
+            signatures[group] = current
+            tasks.update(group_tasks)
+    return tasks
+
+def run_task(name, keep_going):
+    """Exécute une tâche avec des modules de cache neufs ; retourne False si elle a été interrompue"""
+    for module_name in CACHED_MODULES:
+        if module_name in sys.modules:
+            importlib.reload(sys.modules[module_name])
+    start = time.perf_counter()
+    try:
+        completed = dict(TASKS)[name](keep_going) is not False
+    except Exception as e:  # le service ne doit jamais s'arrêter : la vue concernée refera le cache
+        log(f"tâche {name} en échec : {e}", xbmc.LOGWARNING)
+        return True
+    log(f"tâche {name} {'terminée' if completed else 'interrompue'} en {(time.perf_counter() - start) * 1000:.0f} ms",
+        xbmc.LOGDEBUG if completed else xbmc.LOGINFO)
+    return completed
+
+class Warmer(threading.Thread):
+    """Exécute les tâches demandées une à une, en pause pendant la lecture d'une vidéo"""
+
+    def __init__(self, monitor):
+        super().__init__(name="BrainrotManagerWarmer", daemon=True)
+        self.monitor = monitor
+        self.player = xbmc.Player()
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+
+    def request(self, tasks):
+        with self.lock:
+            self.pending.update(tasks)
+        self.wake.set()
+
+    def paused(self):
+        return self.player.isPlayingVideo() or not xbmcaddon.Addon().getSettingBool('service_warmup')
+
+    def keep_going(self):
+        return not self.monitor.abortRequested() and not self.paused()
+
+    def run(self):
+        while not self.monitor.abortRequested():
+            self.wake.wait(PAUSE_CHECK)
+            if self.paused():
+                continue
+            with self.lock:
+                name = min(self.pending, key=_task_order) if self.pending else None
+            if name is None:
+                self.wake.clear()
+                continue
+            if run_task(name, self.keep_going):
+                with self.lock:
+                    self.pending.discard(name)
+
+class Monitor(xbmc.Monitor):
+    def __init__(self):
+        super().__init__()
+        self.warmer = None
+
+    def onSettingsChanged(self):
+        # Changement de moteur de stockage ou de compte : les caches de l'inventaire changent de source
+        if self.warmer:
+            self.warmer.request(['search', 'income', 'whatif', 'owned_rows'])
+
+def main():
+    monitor = Monitor()
+    monitor.warmer = Warmer(monitor)
+    monitor.warmer.start()
+    signatures = {}
+    if not monitor.waitForAbort(STARTUP_DELAY):
+        while True:
+            tasks = changed_tasks(signatures)
+            if tasks:
+                log(f"préchauffage : {', '.join(sorted(tasks, key=_task_order))}", xbmc.LOGDEBUG)
+                monitor.warmer.request(tasks)
+            if monitor.waitForAbort(POLL_INTERVAL):
+                break
+    monitor.warmer.wake.set()
+    monitor.warmer.join(5)
+
+if __name__ == '__main__':
+    main()
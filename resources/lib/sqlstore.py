@@ -0,0 +1,379 @@
+﻿# -*- coding: utf-8 -*-
+import os
+import json
+import sqlite3
+import xbmc
+
+import inventory
+import refdata
+from paths import account_file, account_name, profile_path, DEFAULT_ACCOUNT
+
+# --- Moteur de stockage SQLite (optionnel, réglage storage_backend = sqlite) ---
+# Chaque action devient une petite transaction ; un fichier inventory.db par compte (voir paths.account_dir).
+DB_NAME = 'inventory.db'
+SEPARATOR = '\x1f'
+# Schéma créé une fois (PRAGMA user_version) : ouvrir la base pour lire n'écrit rien
+SCHEMA_VERSION = 1
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('unique_ids', 0);
+CREATE TABLE IF NOT EXISTS bases (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_bases_name ON bases(name);
+CREATE TABLE IF NOT EXISTS brainrots (
+    id INTEGER PRIMARY KEY,
+    instance_id TEXT NOT NULL,
+    base_id INTEGER NOT NULL REFERENCES bases(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    catalog_id TEXT,
+    mutation TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_brainrots_instance ON brainrots(instance_id);
+CREATE INDEX IF NOT EXISTS ix_brainrots_base ON brainrots(base_id, seq);
+CREATE TABLE IF NOT EXISTS brainrot_traits (
+    brainrot_id INTEGER NOT NULL REFERENCES brainrots(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    trait TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_brainrot_traits ON brainrot_traits(brainrot_id, position);
+CREATE TABLE IF NOT EXISTS mutations (name TEXT PRIMARY KEY, multiplier REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS traits (
+    name TEXT PRIMARY KEY,
+    multiplier REAL NOT NULL,
+    image TEXT,
+    description TEXT
+);
+'''
+
+# Colonnes d'une entrée : les traits sont regroupés dans l'ordre de saisie
+ENTRY_COLUMNS = f'''
+b.instance_id, b.catalog_id, b.mutation, b.extra,
+(SELECT group_concat(trait, '{SEPARATOR}') FROM
+    (SELECT trait FROM brainrot_traits WHERE brainrot_id = b.id ORDER BY position))
+'''
+
+def db_path():
+    return account_file(DB_NAME)
+
+def connect():
+    """Ouvre la base du compte actif ; la remplit depuis le stockage JSON lors du premier passage en SQLite"""
+    is_new = not os.path.exists(db_path())
+    conn = sqlite3.connect(db_path(), timeout=10, isolation_level=None)
+    if is_new and account_name() == DEFAULT_ACCOUNT:
+        is_new = not _adopt_legacy(conn)
+    conn.execute('PRAGMA foreign_keys = ON')
+    if conn.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+        _create_schema(conn)
+    if is_new:
+        try:
+            bases = inventory.load_bases()
+        except (OSError, ValueError):
+            bases = []
+        xbmc.log(f"[Brainrot Manager] Création de {DB_NAME} depuis le stockage JSON", xbmc.LOGINFO)
+        import_bases(conn, bases)
+    elif not conn.execute("SELECT value FROM meta WHERE key = 'unique_ids'").fetchone()[0]:
+        _transaction(conn, _migrate_instance_ids)
+    return conn
+
+def _create_schema(conn):
+    # Mode WAL persistant (enregistré dans le fichier) ; le schéma est idempotent, un second
+    # processus qui le crée en même temps ne change rien
+    try:
+        conn.execute('PRAGMA journal_mode = WAL')
+    except sqlite3.DatabaseError:
+        pass
+    conn.executescript(f'BEGIN IMMEDIATE;{SCHEMA}PRAGMA user_version = {SCHEMA_VERSION};COMMIT;')
+
+def _adopt_legacy(conn):
+    """Copie l'ancien inventory.db du profil (avant les comptes) dans `conn` ; False s'il n'existe pas"""
+    legacy = os.path.join(profile_path, DB_NAME)
+    if not os.path.exists(legacy):
+        return False
+    # API de sauvegarde : copie cohérente, y compris les pages encore dans le -wal de l'ancien fichier
+    source = sqlite3.connect(legacy, timeout=10)
+    try:
+        source.backup(conn)
+    finally:
+        source.close()
+    xbmc.log(f"[Brainrot Manager] {legacy} repris dans {db_path()}", xbmc.LOGINFO)
+    return True
+
+def _migrate_instance_ids(conn):
+    """Identifiants d'instance uniques (mêmes valeurs que inventory.migrate_bases pour les mêmes données)"""
+    if conn.execute("SELECT value FROM meta WHERE key = 'unique_ids'").fetchone()[0]:
+        return
+    rows = conn.execute('''SELECT b.id, ba.name, b.instance_id FROM brainrots b JOIN bases ba ON ba.id = b.base_id
+                          ORDER BY ba.position, b.seq''').fetchall()
+    seen, updates, ranks = set(), [], {}
+    for row_id, base_name, old_id in rows:
+        ranks[base_name, old_id] = rank = ranks.get((base_name, old_id), 0) + 1
+        instance_id = old_id
+        if not inventory.is_instance_id(old_id) or old_id in seen:
+            instance_id = inventory.legacy_instance_id(base_name, old_id, rank)
+            updates.append((instance_id, row_id))
+        seen.add(instance_id)
+    conn.executemany('UPDATE brainrots SET instance_id = ? WHERE id = ?', updates)
+    conn.execute("UPDATE meta SET value = 1 WHERE key = 'unique_ids'")
+    xbmc.log(f"[Brainrot Manager] {DB_NAME} : {len(updates)} identifiants d'instance rendus uniques", xbmc.LOGINFO)
+
+def _version(conn):
+    return conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+def _transaction(conn, fn, *args):
+    """Exécute fn dans une transaction ; retourne (résultat, version avant, version après)"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        before = _version(conn)
+        result = fn(conn, *args)
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
+    return result, before, before + 1
+
+# --- Lecture ---
+def _row_to_entry(row):
+    instance_id, catalog_id, mutation, extra, traits = row
+    entry = inventory.make_entry(instance_id, catalog_id, mutation or "", traits.split(SEPARATOR) if traits else [])
+    if extra:
+        entry.update(json.loads(extra))
+    return entry
+
+def _base_id(conn, base_name):
+    row = conn.execute('SELECT id FROM bases WHERE name = ?', (base_name,)).fetchone()
+    if not row:
+        raise inventory.InventoryError(f"Base '{base_name}' introuvable.")
+    return row[0]
+
+def _base_entries(conn, base_id):
+    rows = conn.execute(f'SELECT {ENTRY_COLUMNS} FROM brainrots b WHERE b.base_id = ? ORDER BY b.seq', (base_id,))
+    return [_row_to_entry(r) for r in rows]
+
+def version():
+    conn = connect()
+    try:
+        return _version(conn)
+    finally:
+        conn.close()
+
+def base_summaries():
+    conn = connect()
+    try:
+        return conn.execute('''
+            SELECT ba.name, (SELECT count(*) FROM brainrots b WHERE b.base_id = ba.id)
+            FROM bases ba ORDER BY ba.position''').fetchall()
+    finally:
+        conn.close()
+
+def get_base(base_name):
+    conn = connect()
+    try:
+        # Une seule requête : une ligne vide (LEFT JOIN) pour une base sans brainrot, aucune si elle n'existe pas
+        rows = conn.execute(f'''
+            SELECT ba.id, b.id, {ENTRY_COLUMNS}
+            FROM bases ba LEFT JOIN brainrots b ON b.base_id = ba.id
+            WHERE ba.name = ?
+            ORDER BY b.seq''', (base_name,)).fetchall()
+    finally:
+        conn.close()
+    if not rows:
+        return None
+    return {"Name": base_name, "Brainrots": [_row_to_entry(r[2:]) for r in rows if r[1] is not None]}
+
+def export_bases(conn):
+    """Reconstruit la liste des bases au format {"Name", "Brainrots"} du stockage JSON"""
+    return [{"Name": name, "Brainrots": _base_entries(conn, base_id)}
+            for base_id, name in conn.execute('SELECT id, name FROM bases ORDER BY position').fetchall()]
+
+def iter_bases():
+    """Générateur de (nom, entrées) ; les entrées sont lues au fil de l'itération"""
+    conn = connect()
+    try:
+        for base_id, name in conn.execute('SELECT id, name FROM bases ORDER BY position').fetchall():
+            rows = conn.execute(f'SELECT {ENTRY_COLUMNS} FROM brainrots b WHERE b.base_id = ? ORDER BY b.seq', (base_id,))
+            yield name, (_row_to_entry(r) for r in rows)
+    finally:
+        conn.close()
+
+def load_bases():
+    conn = connect()
+    try:
+        return export_bases(conn)
+    finally:
+        conn.close()
+
+# --- Écriture ---
+def _insert_entries(conn, base_id, entries):
+    seq = conn.execute('SELECT coalesce(max(seq), 0) FROM brainrots').fetchone()[0]
+    for entry in entries:
+        seq += 1
+        extra = {k: v for k, v in entry.items() if k not in ("Id", "CatalogId", "Mutation", "Traits")}
+        cur = conn.execute(
+            'INSERT INTO brainrots (instance_id, base_id, seq, catalog_id, mutation, extra) VALUES (?, ?, ?, ?, ?, ?)',
+            (entry.get("Id"), base_id, seq, entry.get("CatalogId"), entry.get("Mutation", ""),
+             json.dumps(extra, ensure_ascii=False) if extra else None))
+        conn.executemany(
+            'INSERT INTO brainrot_traits (brainrot_id, position, trait) VALUES (?, ?, ?)',
+            [(cur.lastrowid, i, name) for i, name in enumerate(entry.get("Traits", []))])
+
+def _select_rows(conn, base_id, ids):
+    marks = ','.join('?' * len(ids))
+    return conn.execute(f'''SELECT b.id, {ENTRY_COLUMNS} FROM brainrots b
+                            WHERE b.base_id = ? AND b.instance_id IN ({marks}) ORDER BY b.seq''', (base_id, *ids)).fetchall()
+
+def _select_entries(conn, base_id, ids):
+    return [_row_to_entry(r[1:]) for r in _select_rows(conn, base_id, ids)]
+
+def _apply(conn, op):
+    kind = op["op"]
+    if kind == "add_base":
+        if conn.execute('SELECT 1 FROM bases WHERE name = ?', (op["name"],)).fetchone():
+            raise inventory.InventoryError(f"La base '{op['name']}' existe déjà.")
+        conn.execute('INSERT INTO bases (name, position) VALUES (?, (SELECT coalesce(max(position), 0) + 1 FROM bases))',
+                     (op["name"],))
+        return {}
+    elif kind == "delete_base":
+        base_id = _base_id(conn, op["name"])
+        removed = _base_entries(conn, base_id)
+        conn.execute('DELETE FROM bases WHERE id = ?', (base_id,))
+        return {"removed": removed}
+    elif kind == "rename_base":
+        base_id = _base_id(conn, op["name"])
+        if conn.execute('SELECT 1 FROM bases WHERE name = ?', (op["new_name"],)).fetchone():
+            raise inventory.InventoryError(f"La base '{op['new_name']}' existe déjà.")
+        conn.execute('UPDATE bases SET name = ? WHERE id = ?', (op["new_name"], base_id))
+        return {}
+    elif kind == "add_brainrots":
+        _insert_entries(conn, _base_id(conn, op["base"]), op["entries"])
+        return {"added": op["entries"]}
+    elif kind in ("delete_brainrots", "move_brainrots"):
+        base_id = _base_id(conn, op["base"])
+        target_id = _base_id(conn, op["target"]) if kind == "move_brainrots" else None
+        ids = list(op["ids"])
+        removed = _select_entries(conn, base_id, ids)
+        if not removed:
+            raise inventory.InventoryError(f"Brainrot introuvable dans {op['base']}")
+        marks = ','.join('?' * len(ids))
+        if target_id is None:
+            conn.execute(f'DELETE FROM brainrots WHERE base_id = ? AND instance_id IN ({marks})', (base_id, *ids))
+            return {"removed": removed}
+        # Les brainrots déplacés passent en fin de base cible, comme avec le stockage JSON
+        seq = conn.execute('SELECT coalesce(max(seq), 0) FROM brainrots').fetchone()[0]
+        conn.execute(f'''UPDATE brainrots SET base_id = ?, seq = seq + ?
+                         WHERE base_id = ? AND instance_id IN ({marks})''', (target_id, seq, base_id, *ids))
+        return {"removed": removed, "added": removed}
+    elif kind == "copy_brainrots":
+        base_id = _base_id(conn, op["base"])
+        target_id = _base_id(conn, op["target"])
+        copies = _select_entries(conn, base_id, list(op["ids"]))
+        if not copies:
+            raise inventory.InventoryError(f"Brainrot introuvable dans {op['base']}")
+        for copy, new_id in zip(copies, op.get("new_ids", ())):
+            copy["Id"] = new_id
+        _insert_entries(conn, target_id, copies)
+        return {"added": copies}
+    elif kind == "update_brainrots":
+        rows = _select_rows(conn, _base_id(conn, op["base"]), list(op["ids"]))
+        if not rows:
+            raise inventory.InventoryError(f"Brainrot introuvable dans {op['base']}")
+        removed, added = [], []
+        for row in rows:
+            entry = _row_to_entry(row[1:])
+            updated = inventory.update_entry(entry, op.get("mutation"), op.get("traits", ()))
+            conn.execute('UPDATE brainrots SET mutation = ? WHERE id = ?', (updated["Mutation"], row[0]))
+            conn.execute('DELETE FROM brainrot_traits WHERE brainrot_id = ?', (row[0],))
+            conn.executemany('INSERT INTO brainrot_traits (brainrot_id, position, trait) VALUES (?, ?, ?)',
+                             [(row[0], i, name) for i, name in enumerate(updated["Traits"])])
+            removed.append(entry)
+            added.append(updated)
+        return {"removed": removed, "added": added}
+    raise ValueError(f"Opération inconnue : {kind}")
+
+def commit(op):
+    conn = connect()
+    try:
+        return _transaction(conn, _apply, op)
+    finally:
+        conn.close()
+
+# --- Import / export avec le stockage JSON ---
+def _sync_reference(conn):
+    mutations, traits = refdata.load('mutations', 'traits')
+    conn.execute('DELETE FROM mutations')
+    conn.executemany('INSERT OR REPLACE INTO mutations (name, multiplier) VALUES (?, ?)',
+                     [(m.get("Name"), m.get("Multiplier", 1.0)) for m in mutations])
+    conn.execute('DELETE FROM traits')
+    conn.executemany('INSERT OR REPLACE INTO traits (name, multiplier, image, description) VALUES (?, ?, ?, ?)',
+                     [(t.get("Name"), t.get("Multiplier", 1.0), t.get("Image", ""), t.get("Description", ""))
+                      for t in traits])
+
+def _replace_all(conn, bases):
+    # `bases` vient de inventory.load_bases() : identifiants déjà uniques
+    conn.execute('DELETE FROM bases')
+    conn.execute("UPDATE meta SET value = 1 WHERE key = 'unique_ids'")
+    for position, base in enumerate(bases, 1):
+        cur = conn.execute('INSERT INTO bases (name, position) VALUES (?, ?)', (base.get("Name"), position))
+        _insert_entries(conn, cur.lastrowid, base.get("Brainrots", []))
+    _sync_reference(conn)
+
+def import_bases(conn, bases):
+    """Remplace tout le contenu de la base SQLite par `bases` (format du stockage JSON)"""
+    _transaction(conn, _replace_all, bases)
+
+def _import_records(conn, records, merge):
+    if not merge:
+        conn.execute('DELETE FROM bases')
+    existing = {row[0] for row in conn.execute('SELECT instance_id FROM brainrots')} if merge else set()
+    base_id, batch, added, skipped = None, [], 0, 0
+    for kind, value in records:
+        if kind == 'base':
+            _insert_entries(conn, base_id, batch)
+            batch = []
+            row = conn.execute('SELECT id FROM bases WHERE name = ?', (value,)).fetchone()
+            base_id = row[0] if row else conn.execute(
+                'INSERT INTO bases (name, position) VALUES (?, (SELECT coalesce(max(position), 0) + 1 FROM bases))',
+                (value,)).lastrowid
+        elif value.get("Id") in existing:
+            skipped += 1
+        else:
+            batch.append(value)
+            existing.add(value.get("Id"))
+            added += 1
+            if len(batch) >= 500:
+                _insert_entries(conn, base_id, batch)
+                batch = []
+    _insert_entries(conn, base_id, batch)
+    if not merge:
+        _sync_reference(conn)
+    return added, skipped
+
+def import_records(records, merge):
+    """Importe des enregistrements (exchange.read_records) en une transaction ; retourne (ajoutés, doublons)"""
+    conn = connect()
+    try:
+        return _transaction(conn, _import_records, records, merge)[0]
+    finally:
+        conn.close()
+
+def import_from_json():
+    """Importe l'inventaire JSON dans inventory.db ; retourne le nombre de bases importées"""
+    bases = inventory.load_bases()
+    conn = connect()
+    try:
+        import_bases(conn, bases)
+    finally:
+        conn.close()
+    return len(bases)
+
+def export_to_json():
+    """Écrit le contenu de inventory.db dans l'inventaire JSON ; retourne le nombre de bases exportées"""
+    bases = load_bases()
+    inventory.save_bases(bases)
+    return len(bases)
@@ -0,0 +1,135 @@
+﻿# -*- coding: utf-8 -*-
+import os
+import sys
+import marshal
+import hashlib
+
+import safeio
+
+# --- Miniatures des illustrations (icon/thumb et poster) ---
+# Les variantes sont nommées d'après l'empreinte du fichier source : une image dont le
+# contenu n'a pas changé n'est jamais recalculée, même renommée. L'index garde, pour
+# chaque source, (mtime, taille, empreinte, extension) afin de ne relire que les fichiers modifiés.
+# Ce module n'importe rien de Kodi : il sert aussi hors ligne, en ligne de commande.
+# Pillow et concurrent.futures ne sont importés que pour générer : images.py lit l'index
+# à chaque listing et ne doit pas payer ces imports.
+INDEX_NAME = 'index.marshal'
+INDEX_FORMAT = 1
+VARIANTS = {'thumb': 256, 'poster': 512}
+
+class ThumbnailError(Exception):
+    """Génération impossible (Pillow absent, dossier illisible...)"""
+
+def variant_name(digest, variant, ext):
+    return f"{digest}-{variant}.{ext}"
+
+def read_index(out_dir):
+    try:
+        with open(os.path.join(out_dir, INDEX_NAME), 'rb') as f:
+            data = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return {}
+    if not isinstance(data, dict) or data.get('format') != INDEX_FORMAT:
+        return {}
+    return data.get('sources', {})
+
+def _write_index(out_dir, sources):
+    safeio.atomic_write(os.path.join(out_dir, INDEX_NAME), marshal.dumps({'format': INDEX_FORMAT, 'sources': sources}))
+
+def available():
+    import importlib.util
+    return importlib.util.find_spec('PIL') is not None
+
+def _render(src_path, out_dir):
+    """Tâche d'un worker : hache la source et produit les variantes manquantes"""
+    from PIL import Image, features
+
+    st = os.stat(src_path)
+    with open(src_path, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()[:20]
+    fmt, ext = ('WEBP', 'webp') if features.check('webp') else ('PNG', 'png')
+    targets = {v: os.path.join(out_dir, variant_name(digest, v, ext)) for v in VARIANTS}
+    if not all(os.path.exists(p) for p in targets.values()):
+        with Image.open(src_path) as img:
+            img.load()
+            for variant, size in sorted(VARIANTS.items(), key=lambda item: -item[1]):
+                copy = img.copy()
+                copy.thumbnail((size, size), Image.LANCZOS)
+                tmp = f"{targets[variant]}.{os.getpid()}.tmp"
+                if fmt == 'WEBP':
+                    copy.save(tmp, fmt, quality=85, method=4)
+                else:
+                    copy.save(tmp, fmt, optimize=True)
+                os.replace(tmp, targets[variant])
+    return (st.st_mtime_ns, st.st_size, digest, ext)
+
+def build(src_dir, out_dir, names=None, workers=None, use_processes=True, progress=None):
+    """Met à jour les variantes de `src_dir` dans `out_dir` ; retourne (générées, inchangées, erreurs)
+
+    `progress(done, total)` est appelé après chaque image traitée ; s'il renvoie False, les images
+    restantes sont abandonnées (celles déjà générées sont conservées). Kodi embarque Python sans
+    pouvoir lancer de sous-processus : depuis l'addon on passe use_processes=False
+    (Pillow libère le GIL pendant le décodage et le redimensionnement).
+    """
+    if not available():
+        raise ThumbnailError("Pillow (script.module.pil) est requis pour générer les miniatures.")
+    os.makedirs(out_dir, exist_ok=True)
+
+    index = read_index(out_dir)
+    names = sorted(names if names is not None else os.listdir(src_dir))
+    todo = []
+    sources = {}
+    for name in names:
+        try:
+            st = os.stat(os.path.join(src_dir, name))
+        except OSError:
+            continue
+        entry = index.get(name)
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            sources[name] = entry
+        else:
+            todo.append(name)
+
+    errors = []
+    generated = 0
+    if todo:
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+        executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with executor_cls(max_workers=workers or os.cpu_count() or 2) as executor:
+            futures = {executor.submit(_render, os.path.join(src_dir, n), out_dir): n for n in todo}
+            for done, future in enumerate(as_completed(futures), 1):
+                name = futures[future]
+                try:
+                    sources[name] = future.result()
+                    generated += 1
+                except Exception as e:  # image corrompue ou format non géré : on garde l'original
+                    errors.append(f"{name}: {e}")
+                if progress and progress(done, len(todo)) is False:
+                    for pending in futures:
+                        pending.cancel()
+                    break
+
+    _write_index(out_dir, sources)
+    _remove_orphans(out_dir, sources)
+    return generated, len(sources) - generated, errors
+
+def _remove_orphans(out_dir, sources):
+    """Supprime les variantes dont plus aucune source n'a l'empreinte"""
+    keep = {variant_name(e[2], v, e[3]) for e in sources.values() for v in VARIANTS}
+    keep.add(INDEX_NAME)
+    for name in os.listdir(out_dir):
+        if name not in keep and not name.endswith('.tmp'):
+            try:
+                os.remove(os.path.join(out_dir, name))
+            except OSError:
+                pass
+
+if __name__ == '__main__':
+    # Génération hors ligne : python thumbnails.py <dossier des images> <dossier de sortie>
+    if len(sys.argv) != 3:
+        sys.exit("usage: thumbnails.py SRC_DIR OUT_DIR")
+    generated, unchanged, failed = build(sys.argv[1], sys.argv[2],
+                                         progress=lambda d, t: print(f"\r{d}/{t}", end='', file=sys.stderr))
+    print(f"\n{generated} générées, {unchanged} inchangées, {len(failed)} erreurs", file=sys.stderr)
+    for line in failed:
+        print(line, file=sys.stderr)
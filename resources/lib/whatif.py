@@ -0,0 +1,190 @@
+﻿# -*- coding: utf-8 -*-
+import time
+import heapq
+import marshal
+from array import array
+import xbmc
+
+import inventory
+import refdata
+import safeio
+from paths import profile_file
+
+try:
+    import numpy
+except ImportError:  # NumPy n'est pas fourni par Kodi : calcul en tableaux array('d')
+    numpy = None
+
+# --- Calculateur "et si" : gains des améliorations et temps pour acheter le catalogue ---
+# Une ligne par configuration possédée (voir inventory.stack_key), une colonne par option
+# (chaque mutation puis chaque trait ayant un multiplicateur). Avec la règle des bonus
+# additifs (voir income.py), le gain d'une option vaut revenu de base x (bonus de l'option
+# - bonus qu'elle remplace) : la mutation actuelle pour une mutation, le trait lui-même
+# s'il est déjà présent. Toute la matrice est calculée en une passe ; seuls le classement
+# des meilleurs gains et le temps d'achat de chaque fiche du catalogue sont mis en cache,
+# pour une version de l'inventaire (voir inventory.version()) et des données de référence.
+CACHE_NAME = 'whatif.cache'
+CACHE_FORMAT = 1
+RANKING_SIZE = 500
+_TYPECODE = 'd'
+
+def _ref_signature():
+    return [list(refdata.source_signature(name)) for name in ('catalog', 'traits', 'mutations')]
+
+def _bonus(item):
+    return item["Multiplier"] - 1 if item and "Multiplier" in item else 0.0
+
+# --- Calcul ---
+def _collect(bases):
+    """Configurations possédées : [[clé, revenu de base, nombre, [bases]]] ; `bases` : (nom, entrées)"""
+    catalog = refdata.lookup('catalog', 'Id')
+    configs = {}
+    for base_name, entries in bases:
+        for entry in entries:
+            key = inventory.stack_key(entry)
+            config = configs.get(key)
+            if config is None:
+                item = catalog.get(entry.get("CatalogId")) or entry
+                config = configs[key] = [list(key), item.get("BaseIncomePerSecond", 0) or 0, 0, []]
+            config[2] += 1
+            if base_name not in config[3]:
+                config[3].append(base_name)
+    return list(configs.values())
+
+def _options():
+    """[[type, nom]] des colonnes et bonus de chacune"""
+    mutations, traits = refdata.load('mutations', 'traits')
+    options = [['mutation', m["Name"]] for m in mutations if m.get("Name") and "Multiplier" in m]
+    options += [['trait', t["Name"]] for t in traits if t.get("Name") and "Multiplier" in t]
+    lookups = {'mutation': refdata.lookup('mutations'), 'trait': refdata.lookup('traits')}
+    return options, [_bonus(lookups[kind][name]) for kind, name in options]
+
+def _replaced(configs, options, bonuses):
+    """Bonus actuel de chaque configuration et cases (colonne, ligne, bonus remplacé) non nulles"""
+    mutations = refdata.lookup('mutations')
+    traits = refdata.lookup('traits')
+    columns = {(kind, name): j for j, (kind, name) in enumerate(options)}
+    mutation_columns = [j for j, (kind, _) in enumerate(options) if kind == 'mutation']
+    current, cells = [], []
+    for i, ((_, mutation, trait_names), _, _, _) in enumerate(configs):
+        mutation_bonus = _bonus(mutations.get(mutation))
+        trait_bonus = 0.0
+        for name in trait_names:
+            trait_bonus += _bonus(traits.get(name))
+        for name in set(trait_names):
+            j = columns.get(('trait', name))
+            if j is not None:
+                cells.append((j, i, bonuses[j]))
+        if mutation_bonus:
+            cells += [(j, i, mutation_bonus) for j in mutation_columns]
+        current.append(1 + mutation_bonus + trait_bonus)
+    return current, cells
+
+# Matrice des gains : une ligne par option, une colonne par configuration (indice j * n + i).
+# Les deux moteurs retournent [(indice, gain)] des RANKING_SIZE meilleurs gains positifs.
+def _deltas_numpy(base_incomes, bonuses, cells):
+    base = numpy.array(base_incomes, dtype=numpy.float64)
+    replaced = numpy.zeros((len(bonuses), len(base)))
+    if cells:
+        cols, rows, values = zip(*cells)
+        replaced[cols, rows] = values
+    deltas = numpy.outer(numpy.array(bonuses, dtype=numpy.float64), base) - replaced * base
+    flat = deltas.ravel()
+    size = min(RANKING_SIZE, flat.size)
+    best = numpy.argpartition(-flat, size - 1)[:size] if size else flat[:0].astype(numpy.intp)
+    best = numpy.sort(best)  # à gain égal, le même ordre que heapq.nlargest
+    best = best[numpy.argsort(-flat[best], kind='stable')]
+    best = best[flat[best] > 0]
+    return list(zip(best.tolist(), flat[best].tolist()))
+
+def _deltas_array(base_incomes, bonuses, cells):
+    n = len(base_incomes)
+    deltas = array(_TYPECODE)
+    for bonus in bonuses:
+        deltas.extend([value * bonus for value in base_incomes])
+    for j, i, bonus in cells:
+        deltas[j * n + i] -= base_incomes[i] * bonus
+    best = heapq.nlargest(RANKING_SIZE, range(len(deltas)), key=deltas.__getitem__)
+    return [(k, deltas[k]) for k in best if deltas[k] > 0]
+
+def _seconds(income_per_second):
+    """Temps pour acheter chaque fiche du catalogue (dans son ordre) avec `income_per_second`"""
+    costs = [b.get("Cost", 0) or 0 for b in refdata.get_catalog()]
+    if income_per_second <= 0:
+        return array(_TYPECODE, [float('inf')] * len(costs)).tobytes()
+    if numpy is not None:
+        return (numpy.array(costs, dtype=numpy.float64) / income_per_second).tobytes()
+    return array(_TYPECODE, [cost / income_per_second for cost in costs]).tobytes()
+
+def compute(bases, use_numpy=None):
+    """Résultats pour `bases` (itérable de (nom, entrées)) ; `use_numpy` force le moteur de calcul"""
+    start = time.perf_counter()
+    use_numpy = numpy is not None if use_numpy is None else use_numpy and numpy is not None
+    configs = _collect(bases)
+    options, bonuses = _options()
+    current, cells = _replaced(configs, options, bonuses)
+    base_incomes = [config[1] for config in configs]
+    ranking = (_deltas_numpy if use_numpy else _deltas_array)(base_incomes, bonuses, cells)
+    income_per_second = sum(value * multiplier * config[2] for value, multiplier, config in zip(base_incomes, current, configs))
+    upgrades = []
+    for k, delta in ranking:
+        j, i = divmod(k, len(configs))
+        upgrades.append([delta, base_incomes[i] * current[i], configs[i], options[j]])
+    refdata.log(f"Calculateur : {len(configs)} configurations x {len(options)} options en "
+                f"{(time.perf_counter() - start) * 1000:.0f} ms ({'NumPy' if use_numpy else 'array'})", xbmc.LOGINFO)
+    return {'format': CACHE_FORMAT, 'upgrades': upgrades, 'income': income_per_second,
+            'seconds': _seconds(income_per_second)}
+
+# --- Cache par version de l'inventaire ---
+_results = None
+
+def _read_cache():
+    try:
+        with open(profile_file(CACHE_NAME), 'rb') as f:
+            data = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(data, dict) or data.get('format') != CACHE_FORMAT:
+        return None
+    return data
+
+def _unpack(raw):
+    values = array(_TYPECODE)
+    values.frombytes(raw)
+    return values
+
+def results():
+    """Résultats de l'inventaire actuel ; la matrice n'est recalculée que si la version a changé"""
+    global _results
+    version = inventory.version()
+    signature = _ref_signature()
+    if _results is not None and _results['version'] == version and _results['ref'] == signature:
+        return _results
+    data = _read_cache()
+    if not data or data['version'] != version or data['ref'] != signature:
+        data = compute(inventory.stream_bases()[1])
+        data['version'], data['ref'] = version, signature
+        try:
+            safeio.atomic_write(profile_file(CACHE_NAME), marshal.dumps(data))
+        except OSError as e:
+            refdata.log(f"Écriture de {CACHE_NAME} impossible : {e}", xbmc.LOGWARNING)
+    data['seconds'] = _unpack(data['seconds'])
+    _results = data
+    return data
+
+def total_income():
+    """Revenu/s total de l'inventaire, toutes bases confondues"""
+    return results()['income']
+
+def best_upgrades(n):
+    """Les n meilleurs gains : [[gain/s par exemplaire, revenu/s actuel, configuration, option]]
+
+    configuration : [clé (CatalogId, mutation, traits), revenu de base, nombre, [bases]] ;
+    option : [type ('mutation' ou 'trait'), nom].
+    """
+    return results()['upgrades'][:n]
+
+def time_to_afford(positions):
+    """Secondes de revenu nécessaires pour acheter les fiches du catalogue aux `positions`"""
+    seconds = results()['seconds']
+    return [seconds[i] for i in positions]
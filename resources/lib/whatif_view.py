@@ -0,0 +1,105 @@
+﻿# -*- coding: utf-8 -*-
+import xbmcgui
+import xbmcplugin
+
+import facets
+import images
+import render
+import whatif
+from formatting import format_money, format_duration
+from paths import addon
+from plugin import handle, build_url
+
+# --- Vues du calculateur "et si" (voir whatif.py) ---
+def _load_error(e):
+    if isinstance(e, OSError):
+        xbmcgui.Dialog().ok("Erreur", f"Inventaire inaccessible :\n{e}")
+    else:
+        xbmcgui.Dialog().ok("Erreur JSON", f"Impossible de lire les données :\n{e}")
+
+def show_calculator():
+    """Point d'entrée : revenu total actuel et les deux calculs proposés"""
+    xbmcplugin.setPluginCategory(handle, "Calculateur")
+    try:
+        total = whatif.total_income()
+    except (OSError, ValueError) as e:
+        _load_error(e)
+        return
+
+    list_item = xbmcgui.ListItem(label=f"Revenu actuel : {format_money(total)}/s")
+    list_item.setArt({'icon': 'DefaultAddonInfoProvider.png'})
+    xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=list_item, isFolder=False)
+    for label, action in (("✨ Meilleures améliorations (mutation ou trait)", 'ameliorations'),
+                          ("⏱️ Temps pour acheter le catalogue", 'temps_achat')):
+        list_item = xbmcgui.ListItem(label=label)
+        list_item.setArt({'icon': 'DefaultFolder.png'})
+        xbmcplugin.addDirectoryItem(handle=handle, url=build_url({'action': action}), listitem=list_item, isFolder=True)
+    xbmcplugin.endOfDirectory(handle)
+
+def show_upgrades():
+    """Les gains de revenu les plus forts en ajoutant un trait ou en changeant de mutation"""
+    xbmcplugin.setPluginCategory(handle, "Meilleures améliorations")
+    xbmcplugin.setContent(handle, "movies")
+    try:
+        upgrades = whatif.best_upgrades(addon.getSettingInt('leaderboard_size') or 25)
+    except (OSError, ValueError) as e:
+        _load_error(e)
+        return
+
+    entries = [{"CatalogId": key[0], "Mutation": key[1], "Traits": list(key[2])} for _, _, (key, _, _, _), _ in upgrades]
+    missing_images = []
+    for (delta, current, (_, _, count, base_names), (kind, name)), row in zip(upgrades, render.owned_rows(entries)):
+        change = f"la mutation {name}" if kind == 'mutation' else f"le trait {name}"
+        label = f"{row.title} → {name} (+{format_money(delta)}/s)"
+        list_item = xbmcgui.ListItem(label=label, label2=", ".join(base_names))
+        info_tag = list_item.getVideoInfoTag()
+        info_tag.setTitle(label)
+        info_tag.setGenres(row.genres)
+        info_tag.setPlot(f"Avec {change} : {format_money(current)}/s → {format_money(current + delta)}/s "
+                         f"(+{format_money(delta)}/s par exemplaire)\n"
+                         f"Exemplaires : {count} ({', '.join(base_names)}), gain total +{format_money(delta * count)}/s\n\n{row.plot}")
+        art = images.art('brainrots', row.image, missing_images)
+        list_item.setArt(art or {'icon': 'DefaultFolder.png'})
+        xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=list_item, isFolder=False)
+
+    xbmcplugin.endOfDirectory(handle)
+    images.report_missing('brainrots', missing_images)
+
+def show_affordability(offset=0, limit=None):
+    """Le catalogue par prix croissant, avec le temps de revenu actuel nécessaire pour chaque fiche"""
+    xbmcplugin.setPluginCategory(handle, "Temps pour acheter")
+    xbmcplugin.setContent(handle, "movies")
+    if limit is None:
+        limit = addon.getSettingInt('page_size')
+
+    try:
+        total = whatif.total_income()
+        ids = facets.positions('cost')
+        page = ids[offset:offset + limit] if limit > 0 else ids
+        rows = render.catalog_rows(page)
+        seconds = whatif.time_to_afford(page)
+    except (OSError, ValueError) as e:
+        _load_error(e)
+        return
+
+    missing_images = []
+    for row, duration in zip(rows, seconds):
+        list_item = xbmcgui.ListItem(label=row.label, label2=format_duration(duration))
+        info_tag = list_item.getVideoInfoTag()
+        info_tag.setTitle(row.title)
+        info_tag.setGenres(row.genres)
+        info_tag.setPlot(f"Temps nécessaire avec {format_money(total)}/s : {format_duration(duration)}\n\n{row.plot}")
+        info_tag.setYear(row.year)
+        art = images.art('brainrots', row.image, missing_images)
+        list_item.setArt(art or {'icon': 'DefaultFolder.png'})
+        xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=list_item, isFolder=False)
+
+    # --- Lien vers la page suivante ---
+    if limit > 0 and offset + limit < len(ids):
+        pages = (len(ids) + limit - 1) // limit
+        list_item = xbmcgui.ListItem(label=f"Page suivante ({offset // limit + 2}/{pages}) »")
+        list_item.setArt({'icon': 'DefaultFolder.png'})
+        url = build_url({'action': 'temps_achat', 'offset': offset + limit, 'limit': limit})
+        xbmcplugin.addDirectoryItem(handle=handle, url=url, listitem=list_item, isFolder=True)
+    xbmcplugin.endOfDirectory(handle)
+    images.report_missing('brainrots', missing_images)
@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+"""Benchmark hors ligne de toutes les routes du plugin sur des données synthétiques
+
+usage :
+    python tools/bench.py [--sizes 1000,10000,100000] [--bases 10] [--per-base 2000]
+                          [--backends json,sqlite] [--runs 5] [--writers 8x20] [--json FICHIER]
+    python tools/bench.py --compare AVANT.json APRES.json
+
+Pour chaque taille de catalogue et chaque moteur de stockage, un addon et un profil
+temporaires sont générés, puis chaque route est lancée dans un nouvel interpréteur, comme
+Kodi le fait à chaque clic (modules Kodi de tools/kodistubs.py). Par route :
+    - premier lancement (caches du profil à construire) puis médiane de --runs lancements ;
+    - temps de la route, pic mémoire (tracemalloc, lancement séparé), appels système
+      (lectures/écritures de /proc/self/io sous Linux) et fichiers ouverts/listés/remplacés
+      (événements d'audit Python), nombre d'éléments affichés.
+Toutes les actions de main.route sont lancées : le benchmark s'arrête si l'une d'elles n'a
+pas d'entrée dans ROUTES. Le scénario « écrivains concurrents » lance N processus qui
+ajoutent chacun M brainrots en même temps et vérifie qu'aucune écriture n'est perdue.
+"""
+import os
+import sys
+import json
+import time
+import re
+import random
+import shutil
+import platform
+import tempfile
+import statistics
+import subprocess
+from urllib.parse import parse_qsl, quote
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDON_DIR = os.path.dirname(TOOLS_DIR)
+LIB_DIR = os.path.join(ADDON_DIR, 'resources', 'lib')
+
+# (requête, réponses des dialogues), dans l'ordre d'exécution. Remplacements : {run} numéro du
+# lancement, {profile} dossier du profil, {stack} clé d'une pile de Base 0 et {import} fichier
+# JSON Lines à importer (voir make_dataset)
+ROUTES = [
+    ('', []),
+    ('action=mes_bases', []),
+    ('action=show_base_brainrots&base=Base 0', []),
+    ('action=show_stack&base=Base 0&key={stack}', []),
+    ('action=classement', []),
+    ('action=tous_les_traits', []),
+    ('action=toutes_les_brainrots', []),
+    ('action=toutes_les_brainrots&offset=500&limit=50', []),
+    ('action=toutes_les_brainrots&tri=income', []),
+    ('action=toutes_les_brainrots&rarete=Secret&tri=cost', []),
+    ('action=trier', []),
+    ('action=par_rarete', []),
+    ('action=par_evenement', []),
+    ('action=rechercher&q=sahur', []),
+    ('action=optimiser', ['1B', '10', 0, []]),
+    ('action=calculateur', []),
+    ('action=ameliorations', []),
+    ('action=temps_achat', []),
+    ('action=add_brainrot&base=Base 1', [1, 0, 0, []]),
+    ('action=move_brainrot&base=Base 2&id=0000000000000002{run:016x}', [0]),
+    ('action=delete_brainrot&base=Base 3&id=0000000000000003{run:016x}', []),
+    # Mutation appliquée à trois brainrots : une seule écriture, sans changer les effectifs
+    ('action=bulk_brainrots&base=Base 4', [[0, 1, 2], 3, 0]),
+    ('action=add_base', ['Nouvelle {run}']),
+    ('action=rename_base&name=Nouvelle {run}', ['Renommée {run}']),
+    ('action=delete_base&name=Renommée {run}', []),
+    ('action=historique', []),
+    ('action=annuler', []),
+    ('action=changer_compte', [0]),  # compte déjà actif : liste des comptes seulement
+    ('action=diagnostics', []),
+    ('action=diagnostics_reset', []),
+    ('action=jsonl_export', ['{profile}']),
+    ('action=jsonl_import', ['{import}', 0]),
+    ('action=sqlite_import', []),
+    ('action=sqlite_export', []),
+    ('action=build_thumbnails', []),
+    ('action=warm_bytecode', []),
+]
+
+RARITIES = ['Common', 'Rare', 'Epic', 'Legendary', 'Mythic', 'Brainrot God', 'Secret', 'OG']
+EVENTS = ['none', 'none', 'none', 'Taco Tuesday', 'Witch Fuse Event', 'Admin War']
+SYLLABLES = ['tung', 'sahur', 'brr', 'patapim', 'tralalero', 'bombardiro', 'lirili', 'cappuccino', 'assassino',
+             'chimpanzini', 'bananini', 'trippi', 'troppi', 'ballerina', 'frigo', 'camelo', 'bobrito', 'gangster']
+
+def missing_routes():
+    """Actions de main.route sans entrée dans ROUTES"""
+    with open(os.path.join(LIB_DIR, 'main.py'), encoding='utf-8-sig') as f:
+        actions = set(re.findall(r"action == '(\w+)'", f.read()))
+    return sorted(actions - {dict(parse_qsl(query)).get('action') for query, _ in ROUTES})
+
+# --- Données synthétiques ---
+def make_dataset(dest, catalog_size, bases, per_base, seed=0):
+    """Addon temporaire : catalogue de `catalog_size` fiches et `bases` bases de `per_base` brainrots
+
+    Retourne les remplacements des requêtes de ROUTES propres à ces données ({stack}, {import}).
+    """
+    rng = random.Random(seed)
+    data_dir = os.path.join(dest, 'resources', 'data')
+    os.makedirs(data_dir, exist_ok=True)
+    for name in ('Traits.json', 'Mutations.json'):
+        shutil.copyfile(os.path.join(ADDON_DIR, 'resources', 'data', name), os.path.join(data_dir, name))
+    images = os.path.join(dest, 'resources', 'images')
+    if not os.path.exists(images):
+        try:
+            os.symlink(os.path.join(ADDON_DIR, 'resources', 'images'), images, target_is_directory=True)
+        except OSError:
+            shutil.copytree(os.path.join(ADDON_DIR, 'resources', 'images'), images)
+    image_names = sorted(os.listdir(os.path.join(ADDON_DIR, 'resources', 'images', 'Brainrots')))
+
+    catalog = []
+    for i in range(catalog_size):
+        words = rng.sample(SYLLABLES, 3)
+        cost = round(10 ** rng.uniform(1, 12))
+        catalog.append({
+            "Id": f"synth-{i}-{'-'.join(words)}",
+            "Name": f"{' '.join(w.capitalize() for w in words)} {i}",
+            "Rarity": rng.choice(RARITIES),
+            "Cost": cost,
+            "BaseIncomePerSecond": round(cost ** 0.9 * rng.uniform(0.002, 0.02), 1),
+            "SpawnRate": "Inconnu",
+            "Secret": rng.random() < 0.3,
+            "Acquisition": {"Purchase": "Achat au tapis.", "Steal": "Vol possible.", "Strategy": "Placer en base."},
+            "Controversy": "",
+            "Description": f"Brainrot synthétique n°{i} : {' '.join(rng.sample(SYLLABLES, 8))}.",
+            "Event": rng.choice(EVENTS),
+            "AddedAt": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "Image": image_names[i % len(image_names)] if image_names else "",
+        })
+    with open(os.path.join(data_dir, 'BrainrotsCatalogue.json'), 'w', encoding='utf-8-sig') as f:
+        json.dump(catalog, f, ensure_ascii=False, indent=2)
+
+    with open(os.path.join(data_dir, 'Mutations.json'), encoding='latin-1') as f:
+        mutations = [m["Name"] for m in json.load(f)]
+    with open(os.path.join(data_dir, 'Traits.json'), encoding='latin-1') as f:
+        traits = [t["Name"] for t in json.load(f)]
+    inventory = [{"Name": "Concurrence", "Brainrots": []}]
+    for b in range(bases):
+        # Identifiants d'instance au format de inventory.new_instance_id() : base puis rang, en hexadécimal
+        entries = [{"Id": f"{b:016x}{i:016x}", "CatalogId": rng.choice(catalog)["Id"], "Mutation": rng.choice(mutations),
+                    "Traits": rng.sample(traits, rng.randint(0, 3))} for i in range(per_base)]
+        inventory.append({"Name": f"Base {b}", "Brainrots": entries})
+    # Pile de 20 exemplaires identiques en tête de Base 0 (vue show_stack)
+    stack = [catalog[0]["Id"], "", []]
+    for entry in inventory[1]["Brainrots"][:20]:
+        entry.update(CatalogId=stack[0], Mutation=stack[1], Traits=list(stack[2]))
+    # Ancien emplacement de l'inventaire : repris dans le compte principal du profil au premier accès
+    with open(os.path.join(data_dir, 'Bases.json'), 'wb') as f:
+        f.write(json.dumps(inventory, ensure_ascii=False, separators=(',', ':')).encode('latin-1'))
+
+    # Export JSON Lines à importer en fusion : Base 0 (doublons) et une base de nouvelles brainrots
+    import_path = os.path.join(dest, 'Import.jsonl')
+    with open(import_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({"type": "header", "format": "brainrot-inventory", "version": 1}) + '\n')
+        imported = [("Base 0", inventory[1]["Brainrots"]),
+                    ("Importée", [dict(e, Id=f"{bases:016x}{i:016x}") for i, e in enumerate(inventory[1]["Brainrots"])])]
+        for name, entries in imported:
+            f.write(json.dumps({"type": "base", "name": name}, ensure_ascii=False) + '\n')
+            for entry in entries:
+                f.write(json.dumps({"type": "brainrot", **entry}, ensure_ascii=False) + '\n')
+    return {'stack': quote(json.dumps(stack)), 'import': import_path}
+
+# --- Processus enfant : exécute une route et mesure ---
+def _io_counters():
+    try:
+        with open('/proc/self/io') as f:
+            fields = dict(line.split(': ') for line in f.read().splitlines())
+        return int(fields['syscr']), int(fields['syscw'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+def child_route(addon, profile, settings, query, answers, memory):
+    import runpy
+    import tracemalloc
+    sys.path[:0] = [TOOLS_DIR, LIB_DIR]
+    import kodistubs
+    kodistubs.install(addon, profile, settings)
+    kodistubs.reset(answers)
+    sys.argv = ['plugin://plugin.video.brainrot/', '1', f'?{query}' if query else '']
+
+    audit = {'open': 0, 'os.listdir': 0, 'os.scandir': 0, 'os.replace': 0, 'os.rename': 0, 'os.remove': 0}
+    def hook(event, args):
+        if event in audit:
+            audit[event] += 1
+    sys.addaudithook(hook)
+
+    if memory:
+        tracemalloc.start()
+    io_before = _io_counters()
+    start = time.perf_counter()
+    runpy.run_path(os.path.join(LIB_DIR, 'main.py'), run_name='__main__')
+    elapsed = time.perf_counter() - start
+    io_after = _io_counters()
+    result = {
+        'ms': elapsed * 1000,
+        'items': sum(1 for c in kodistubs.calls if c[0] == 'addDirectoryItem'),
+        'files': {k.replace('os.', ''): v for k, v in audit.items() if v},
+        'errors': [c[1:] for c in kodistubs.calls if c[0] == 'Dialog.ok'],
+    }
+    if io_before and io_after:
+        result['syscalls'] = {'read': io_after[0] - io_before[0], 'write': io_after[1] - io_before[1]}
+    if memory:
+        result['peak_kb'] = tracemalloc.get_traced_memory()[1] // 1024
+    print(json.dumps(result))
+
+def child_writer(addon, profile, settings, count, worker):
+    sys.path[:0] = [TOOLS_DIR, LIB_DIR]
+    import kodistubs
+    kodistubs.install(addon, profile, settings)
+    import inventory
+    for i in range(count):
+        entry = inventory.make_entry(inventory.new_instance_id(), "synth-0", "", [])
+        inventory.commit({"op": "add_brainrots", "base": "Concurrence", "entries": [entry]})
+
+def child_count(addon, profile, settings, base_name):
+    sys.path[:0] = [TOOLS_DIR, LIB_DIR]
+    import kodistubs
+    kodistubs.install(addon, profile, settings)
+    import inventory
+    print(json.dumps(len(inventory.get_base(base_name)["Brainrots"])))
+
+# --- Processus parent ---
+def _spawn(*args):
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', json.dumps(args)],
+                          capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'erreur')
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def _format(value, run, context):
+    return value.format(run=run, **context) if isinstance(value, str) else value
+
+def bench_route(addon, profile, settings, query, answers, runs, context):
+    context = dict(context, profile=profile)
+    samples = []
+    for run in range(runs + 1):
+        samples.append(_spawn('route', addon, profile, settings, _format(query, run, context),
+                              [_format(a, run, context) for a in answers], False))
+    memory = _spawn('route', addon, profile, settings, _format(query, runs + 1, context),
+                    [_format(a, runs + 1, context) for a in answers], True)
+    cold, warm = samples[0], samples[1:]
+    ms = sorted(s['ms'] for s in warm)
+    result = {
+        'cold_ms': round(cold['ms'], 2),
+        'ms': round(statistics.median(ms), 2),
+        'p95_ms': round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 2),
+        'peak_kb': memory['peak_kb'],
+        'items': warm[-1]['items'],
+        'files': warm[-1]['files'],
+    }
+    if 'syscalls' in warm[-1]:
+        result['syscalls'] = warm[-1]['syscalls']
+    if warm[-1]['errors']:
+        result['errors'] = warm[-1]['errors']
+    return result
+
+def bench_writers(addon, profile, settings, writers, count):
+    before = _spawn('count', addon, profile, settings, 'Concurrence')
+    start = time.perf_counter()
+    procs = [subprocess.Popen([sys.executable, os.path.abspath(__file__), '--child',
+                               json.dumps(['writer', addon, profile, settings, count, w])],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True) for w in range(writers)]
+    failed = [p.communicate()[1].strip() for p in procs if p.wait()]
+    elapsed = time.perf_counter() - start
+    after = _spawn('count', addon, profile, settings, 'Concurrence')
+    return {
+        'writers': writers, 'commits_each': count, 'ms': round(elapsed * 1000, 1),
+        'commits_per_s': round(writers * count / elapsed, 1),
+        'lost': writers * count - (after - before), 'failed_processes': len(failed),
+    }
+
+def run(sizes, bases, per_base, backends, runs, writers):
+    report = {
+        'python': platform.python_version(), 'platform': platform.platform(),
+        'revision': _revision(), 'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'parameters': {'sizes': sizes, 'bases': bases, 'per_base': per_base, 'runs': runs, 'writers': writers},
+        'results': [],
+    }
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            started = time.perf_counter()
+            context = make_dataset(os.path.join(tmp, 'addon'), size, bases, per_base)
+            print(f"\n== catalogue {size} fiches, {bases} bases x {per_base} brainrots "
+                  f"(généré en {time.perf_counter() - started:.1f} s)", file=sys.stderr)
+            for backend in backends:
+                addon = os.path.join(tmp, f'addon-{backend}')
+                shutil.copytree(os.path.join(tmp, 'addon'), addon, symlinks=True)
+                profile = os.path.join(tmp, f'profile-{backend}')
+                settings = {'storage_backend': backend, 'page_size': 50, 'leaderboard_size': 25}
+                for query, answers in ROUTES:
+                    result = bench_route(addon, profile, settings, query, answers, runs, context)
+                    result.update({'catalog': size, 'backend': backend, 'route': query or '(menu)'})
+                    report['results'].append(result)
+                    print(f"{backend:<6} {query or '(menu)':<52} {result['cold_ms']:>9.1f} {result['ms']:>9.1f} "
+                          f"{result['peak_kb']:>8} Ko {result['items']:>5} él.", file=sys.stderr)
+                if writers:
+                    result = bench_writers(addon, profile, settings, *writers)
+                    result.update({'catalog': size, 'backend': backend, 'route': '(écrivains concurrents)'})
+                    report['results'].append(result)
+                    print(f"{backend:<6} écrivains {writers[0]}x{writers[1]} : {result['ms']} ms, "
+                          f"{result['commits_per_s']} commits/s, perdus : {result['lost']}", file=sys.stderr)
+    return report
+
+def _revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ADDON_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(before_path, after_path):
+    """Affiche l'évolution du temps médian route par route entre deux rapports"""
+    with open(before_path, encoding='utf-8') as f:
+        before = {(r['catalog'], r['backend'], r['route']): r for r in json.load(f)['results']}
+    with open(after_path, encoding='utf-8') as f:
+        after = json.load(f)['results']
+    print(f"{'catalogue':>9} {'moteur':<6} {'route':<52} {'avant':>9} {'après':>9} {'écart':>7}")
+    for r in after:
+        old = before.get((r['catalog'], r['backend'], r['route']))
+        if old and old.get('ms') and r.get('ms'):
+            delta = (r['ms'] - old['ms']) / old['ms'] * 100
+            flag = '  <-- régression' if delta > 20 else ''
+            print(f"{r['catalog']:>9} {r['backend']:<6} {r['route']:<52} {old['ms']:>9.1f} {r['ms']:>9.1f} {delta:>+6.0f}%{flag}")
+
+def main(argv):
+    if argv[:1] == ['--child']:
+        kind, *args = json.loads(argv[1])
+        {'route': child_route, 'writer': child_writer, 'count': child_count}[kind](*args)
+        return
+    if argv[:1] == ['--compare']:
+        compare(argv[1], argv[2])
+        return
+
+    options = {'--sizes': '1000,10000,100000', '--bases': '10', '--per-base': '2000',
+               '--backends': 'json,sqlite', '--runs': '5', '--writers': '8x20', '--json': None}
+    args = iter(argv)
+    for arg in args:
+        if arg not in options:
+            sys.exit(__doc__)
+        options[arg] = next(args)
+    missing = missing_routes()
+    if missing:
+        sys.exit(f"Actions de main.route absentes de ROUTES : {', '.join(missing)}")
+    writers = tuple(int(n) for n in options['--writers'].split('x')) if options['--writers'] != '0' else None
+    report = run([int(n) for n in options['--sizes'].split(',')], int(options['--bases']),
+                 int(options['--per-base']), options['--backends'].split(','), int(options['--runs']), writers)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if options['--json']:
+        with open(options['--json'], 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
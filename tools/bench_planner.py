@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""Mesure planner.plan() sur des catalogues synthétiques (hors Kodi)
+
+usage : python tools/bench_planner.py [taille ...]
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'resources', 'lib'))
+import planner
+
+def synthetic_catalog(size, seed=0):
+    """(coût, revenu/s, id) : coûts log-uniformes de 10 à 10T, revenu ~ coût^0.9 bruité"""
+    rng = random.Random(seed)
+    items = []
+    for i in range(size):
+        cost = round(10 ** rng.uniform(1, 13))
+        items.append((cost, cost ** 0.9 * rng.uniform(0.002, 0.02), f"synth-{i}"))
+    return items
+
+def bench(items, budget, slots, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        counts, spent, total = planner.plan(items, budget, slots)
+        best = min(best, time.perf_counter() - start)
+    return best, sum(counts.values()), spent, total
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [279, 10_000, 100_000]
+    print(f"{'entrées':>8} {'budget':>8} {'emplac.':>8} {'front':>6} {'temps ms':>9} {'achats':>7} {'revenu/s':>12}")
+    for size in sizes:
+        items = synthetic_catalog(size)
+        for budget in (1e6, 1e9, 1e12):
+            front = len(planner.pareto_front(items, budget))
+            for slots in (None, 10, 40):
+                elapsed, count, spent, total = bench(items, budget, slots)
+                print(f"{size:>8} {budget:>8.0e} {slots or '-':>8} {front:>6} {elapsed * 1000:>9.1f} {count:>7} {total:>12.4g}")
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""Modules xbmc, xbmcgui, xbmcplugin, xbmcaddon et xbmcvfs de remplacement, en mémoire
+
+Permettent d'exécuter les vues de l'addon hors de Kodi (mesures, benchmarks) :
+    import kodistubs
+    kodistubs.install(addon_path, profile_path, {'page_size': 50})
+Les appels d'affichage sont enregistrés dans kodistubs.calls ; les dialogues
+renvoient les réponses de `answers` dans l'ordre, puis "annuler".
+Les tests (tools/test_*.py) utilisent install_sandbox() : une copie temporaire de l'addon
+partagée par tout le processus, chaque test choisissant son compte.
+"""
+import os
+import sys
+import atexit
+import shutil
+import tempfile
+import types
+
+LOGDEBUG, LOGINFO, LOGWARNING, LOGERROR = 0, 1, 2, 3
+
+calls = []
+log_lines = []
+answers = []
+settings = {}
+_paths = {}
+
+def reset(new_answers=None):
+    """Vide les enregistrements et remplace les réponses des dialogues"""
+    calls.clear()
+    log_lines.clear()
+    answers[:] = list(new_answers or [])
+
+def _answer(default):
+    return answers.pop(0) if answers else default
+
+# --- xbmc ---
+def _log(message, level=LOGDEBUG):
+    log_lines.append((level, message))
+
+def _executebuiltin(command, wait=False):
+    calls.append(('executebuiltin', command))
+
+class _Monitor:
+    def abortRequested(self):
+        return False
+
+    def waitForAbort(self, timeout=0):
+        return True
+
+class _Player:
+    def isPlaying(self):
+        return False
+
+    def isPlayingVideo(self):
+        return False
+
+# --- xbmcgui ---
+class _InfoTag:
+    __slots__ = ('fields',)
+
+    def __init__(self):
+        self.fields = {}
+
+    def __getattr__(self, name):
+        if name.startswith('set'):
+            def setter(*args, **kwargs):
+                self.fields[name[3:]] = args[0] if args else kwargs
+                calls.append(('InfoTag.' + name, args[0] if args else kwargs))
+            return setter
+        if name.startswith('get'):
+            return lambda: self.fields.get(name[3:], '')
+        raise AttributeError(name)
+
+class _ListItem:
+    def __init__(self, label='', label2='', path='', offscreen=False):
+        self.label, self.label2, self.path = label, label2, path
+        self.art, self.properties, self.context = {}, {}, []
+        self.tag = _InfoTag()
+
+    def getLabel(self):
+        return self.label
+
+    def getLabel2(self):
+        return self.label2
+
+    def setLabel(self, label):
+        self.label = label
+
+    def setLabel2(self, label):
+        self.label2 = label
+
+    def setArt(self, art):
+        self.art.update(art)
+        calls.append(('setArt', art))
+
+    def getVideoInfoTag(self):
+        return self.tag
+
+    def addContextMenuItems(self, items, replaceItems=False):
+        self.context = list(items)
+
+    def addAvailableArtwork(self, url, art_type='', *args, **kwargs):
+        calls.append(('addAvailableArtwork', url))
+
+    def setProperty(self, key, value):
+        self.properties[key] = value
+
+    def getProperty(self, key):
+        return self.properties.get(key, '')
+
+    def setIsFolder(self, is_folder):
+        pass
+
+    def setInfo(self, kind, values):
+        pass
+
+class _Dialog:
+    def ok(self, heading, message):
+        calls.append(('Dialog.ok', heading, message))
+        return True
+
+    def notification(self, heading, message, icon='', time=0, sound=True):
+        calls.append(('Dialog.notification', heading, message))
+
+    def yesno(self, heading, message, *args, **kwargs):
+        return bool(_answer(False))
+
+    def select(self, heading, items, autoclose=0, preselect=-1, useDetails=False):
+        return _answer(-1)
+
+    def multiselect(self, heading, items, autoclose=0, preselect=None, useDetails=False):
+        return _answer(None)
+
+    def input(self, heading, defaultt='', type=0, option=0, autoclose=0):
+        return _answer('')
+
+    def numeric(self, type, heading, defaultt='', bHiddenInput=False):
+        return str(_answer(''))
+
+    def browse(self, type, heading, shares, mask='', *args, **kwargs):
+        return _answer('')
+
+class _DialogProgress:
+    def create(self, heading, message=''):
+        pass
+
+    def update(self, percent, message=''):
+        pass
+
+    def iscanceled(self):
+        return False
+
+    def close(self):
+        pass
+
+# --- xbmcplugin ---
+def _addDirectoryItem(handle, url, listitem, isFolder=False, totalItems=0):
+    calls.append(('addDirectoryItem', url, listitem, isFolder))
+    return True
+
+def _addDirectoryItems(handle, items, totalItems=0):
+    for url, listitem, is_folder in items:
+        _addDirectoryItem(handle, url, listitem, is_folder)
+    return True
+
+def _endOfDirectory(handle, succeeded=True, updateListing=False, cacheToDisc=True):
+    calls.append(('endOfDirectory', succeeded))
+
+# --- xbmcaddon ---
+class _Addon:
+    def __init__(self, id=None):
+        pass
+
+    def getAddonInfo(self, key):
+        return _paths.get(key, '')
+
+    def getSetting(self, key):
+        return str(settings.get(key, ''))
+
+    def getSettingBool(self, key):
+        return bool(settings.get(key, False))
+
+    def getSettingInt(self, key):
+        return int(settings.get(key, 0))
+
+    def setSetting(self, key, value):
+        settings[key] = value
+
+def _module(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    sys.modules[name] = module
+    return module
+
+def install(addon_path, profile_path, settings_values=None, addon_id='plugin.video.brainrot'):
+    """Enregistre les modules de remplacement dans sys.modules"""
+    _paths.update({'path': addon_path, 'profile': profile_path, 'id': addon_id, 'version': 'stub'})
+    settings.clear()
+    settings.update(settings_values or {})
+    _module('xbmc', LOGDEBUG=LOGDEBUG, LOGINFO=LOGINFO, LOGWARNING=LOGWARNING, LOGERROR=LOGERROR,
+            log=_log, executebuiltin=_executebuiltin, Monitor=_Monitor, Player=_Player,
+            getCondVisibility=lambda condition: False, sleep=lambda ms: None)
+    _module('xbmcgui', ListItem=_ListItem, Dialog=_Dialog, DialogProgress=_DialogProgress,
+            DialogProgressBG=_DialogProgress, INPUT_ALPHANUM=0, INPUT_NUMERIC=1,
+            NOTIFICATION_INFO='info', NOTIFICATION_WARNING='warning', NOTIFICATION_ERROR='error')
+    sort_methods = ['UNSORTED', 'LABEL', 'LABEL_IGNORE_THE', 'TITLE', 'VIDEO_YEAR', 'DATEADDED', 'VIDEO_RATING']
+    _module('xbmcplugin', addDirectoryItem=_addDirectoryItem, addDirectoryItems=_addDirectoryItems,
+            endOfDirectory=_endOfDirectory, setPluginCategory=lambda handle, category: None,
+            setContent=lambda handle, content: None, addSortMethod=lambda handle, method, *args, **kwargs: None,
+            **{f'SORT_METHOD_{name}': i for i, name in enumerate(sort_methods)})
+    _module('xbmcaddon', Addon=_Addon)
+    _module('xbmcvfs', translatePath=lambda path: path, exists=os.path.exists)
+
+def addon_sandbox(dest, addon_path):
+    """Copie de travail de l'addon dans `dest` : données copiées (elles seront modifiées), images liées"""
+    os.makedirs(os.path.join(dest, 'resources'), exist_ok=True)
+    shutil.copytree(os.path.join(addon_path, 'resources', 'data'), os.path.join(dest, 'resources', 'data'),
+                    ignore=shutil.ignore_patterns('*.lock'), dirs_exist_ok=True)
+    images = os.path.join(dest, 'resources', 'images')
+    if not os.path.exists(images):
+        try:
+            os.symlink(os.path.join(addon_path, 'resources', 'images'), images, target_is_directory=True)
+        except OSError:  # pas de liens symboliques (Windows sans droits)
+            shutil.copytree(os.path.join(addon_path, 'resources', 'images'), images)
+    return dest
+
+_sandbox = None
+
+def install_sandbox(settings_values=None):
+    """Installe les modules dans une copie temporaire de cet addon (une par processus) ; retourne son dossier
+
+    Les modules de resources/lib deviennent importables. Les réglages sont remplacés à chaque appel :
+    un dossier de données (data_path) ou un compte (account) propre à chaque test isole son inventaire.
+    """
+    global _sandbox
+    if _sandbox is None:
+        addon_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        _sandbox = tempfile.mkdtemp(prefix='brainrot-')
+        atexit.register(shutil.rmtree, _sandbox, True)
+        addon_sandbox(os.path.join(_sandbox, 'addon'), addon_dir)
+        sys.path.insert(0, os.path.join(addon_dir, 'resources', 'lib'))
+        install(os.path.join(_sandbox, 'addon'), os.path.join(_sandbox, 'profile'))
+    settings.clear()
+    settings.update(settings_values or {})
+    reset()
+    return _sandbox
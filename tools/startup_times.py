@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""Coût de démarrage de chaque route du plugin, mesuré avec python -X importtime
+
+usage : python tools/startup_times.py [--runs N] [--json FICHIER] [action ...]
+
+Chaque route est lancée dans un nouvel interpréteur, comme Kodi le fait à chaque clic,
+avec les modules Kodi de tools/kodistubs.py, une copie des données de l'addon et un
+profil temporaire déjà chauffé.
+On rapporte le temps total, le temps passé dans les imports déclenchés par la route
+et les modules les plus coûteux.
+"""
+import os
+import sys
+import json
+import tempfile
+import statistics
+import subprocess
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDON_DIR = os.path.dirname(TOOLS_DIR)
+LIB_DIR = os.path.join(ADDON_DIR, 'resources', 'lib')
+MARKER = '--- route ---'
+
+ACTIONS = [
+    '', 'mes_bases', 'show_base_brainrots&base=MagixCRial00003', 'classement', 'optimiser', 'rechercher&q=tung',
+    'tous_les_traits', 'toutes_les_brainrots', 'trier', 'par_rarete', 'par_evenement', 'add_brainrot&base=x',
+    'add_base', 'sqlite_import', 'build_thumbnails',
+]
+
+BOOTSTRAP = '''
+import sys, time, runpy
+sys.path[:0] = [{tools!r}, {lib!r}]
+import kodistubs
+kodistubs.install({addon!r}, {profile!r}, {{'page_size': 50, 'leaderboard_size': 25}})
+sys.argv = ['plugin://plugin.video.brainrot/', '1', {query!r}]
+print({marker!r}, file=sys.stderr, flush=True)
+start = time.perf_counter()
+runpy.run_path({main!r}, run_name='__main__')
+print('route_ms', (time.perf_counter() - start) * 1000, file=sys.stderr)
+'''
+
+def parse_importtime(stderr):
+    """Retourne (durée de la route en ms, [(module, self µs, cumul µs, profondeur)] après le marqueur)"""
+    imports, route_ms, started = [], None, False
+    for line in stderr.splitlines():
+        if line.startswith(MARKER):
+            started = True
+        elif line.startswith('route_ms'):
+            route_ms = float(line.split()[1])
+        elif started and line.startswith('import time:') and '|' in line:
+            fields = line[len('import time:'):].split('|')
+            if not fields[0].strip().isdigit():
+                continue
+            name = fields[2].rstrip()
+            imports.append((name.strip(), int(fields[0]), int(fields[1]), len(name) - len(name.lstrip())))
+    return route_ms, imports
+
+def measure(action, addon, profile, runs):
+    query = f'?action={action}' if action else ''
+    code = BOOTSTRAP.format(tools=TOOLS_DIR, lib=LIB_DIR, addon=addon, profile=profile, query=query,
+                            marker=MARKER, main=os.path.join(LIB_DIR, 'main.py'))
+    samples = []
+    for _ in range(runs + 1):  # le premier lancement chauffe les caches du profil et __pycache__
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True)
+        if proc.returncode:
+            raise RuntimeError(f"{action or '(menu)'} : {proc.stderr.strip().splitlines()[-1]}")
+        samples.append(parse_importtime(proc.stderr))
+    samples = samples[1:]
+    route_ms = statistics.median(s[0] for s in samples)
+    imports = samples[len(samples) // 2][1]
+    top_depth = min((depth for _, _, _, depth in imports), default=0)
+    top = sorted((i for i in imports if i[3] == top_depth), key=lambda i: -i[2])[:5]
+    return {
+        'action': action or '(menu)',
+        'route_ms': round(route_ms, 2),
+        'import_ms': round(sum(i[1] for i in imports) / 1000, 2),
+        'modules': len(imports),
+        'heaviest': [(name, round(cumulative / 1000, 2)) for name, _, cumulative, _ in top],
+    }
+
+def main(argv):
+    runs, output, actions = 5, None, []
+    args = iter(argv)
+    for arg in args:
+        if arg == '--runs':
+            runs = int(next(args))
+        elif arg == '--json':
+            output = next(args)
+        else:
+            actions.append(arg)
+    sys.path.insert(0, TOOLS_DIR)
+    import kodistubs
+    with tempfile.TemporaryDirectory() as tmp:
+        addon = kodistubs.addon_sandbox(os.path.join(tmp, 'addon'), ADDON_DIR)
+        profile = os.path.join(tmp, 'profile')
+        results = [measure(action, addon, profile, runs) for action in actions or ACTIONS]
+    print(f"{'route':<42} {'total ms':>9} {'imports ms':>10} {'modules':>8}  plus lourds")
+    for r in results:
+        heaviest = ', '.join(f"{name} {ms}" for name, ms in r['heaviest'][:3])
+        print(f"{r['action']:<42} {r['route_ms']:>9.2f} {r['import_ms']:>10.2f} {r['modules']:>8}  {heaviest}")
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
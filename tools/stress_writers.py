@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Test de charge des écritures concurrentes de l'inventaire
+
+usage :
+    python tools/stress_writers.py [--writers 8] [--commits 25] [--backends json,sqlite]
+
+Pour chaque moteur de stockage, N processus lancent en même temps M fois l'action
+« Ajouter un Brainrot » (actions.add_brainrot, dialogues de tools/kodistubs.py), comme
+autant de RunPlugin(...) simultanés. Le test échoue si un processus plante, si une action
+affiche une erreur ou si la base ne contient pas exactement N x M brainrots de plus.
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDON_DIR = os.path.dirname(TOOLS_DIR)
+LIB_DIR = os.path.join(ADDON_DIR, 'resources', 'lib')
+
+BASE_NAME = 'Stress'
+# Rareté ou raccourci (premier groupe après « Filtrer »), première fiche, mutation, aucun trait
+ANSWERS = [1, 0, 0, []]
+
+def _install(addon, profile, settings):
+    sys.path[:0] = [TOOLS_DIR, LIB_DIR]
+    sys.argv = ['plugin://plugin.video.brainrot/', '1', '']
+    import kodistubs
+    kodistubs.install(addon, profile, settings)
+    return kodistubs
+
+# --- Processus enfants ---
+def child_writer(addon, profile, settings, count):
+    kodistubs = _install(addon, profile, settings)
+    import actions
+    added, errors = 0, []
+    for _ in range(count):
+        kodistubs.reset(ANSWERS)
+        actions.add_brainrot(BASE_NAME)
+        errors += [c[1:] for c in kodistubs.calls if c[0] == 'Dialog.ok']
+        added += any(c[0] == 'Dialog.notification' and c[1] == "Brainrot ajouté" for c in kodistubs.calls)
+    print(json.dumps({'added': added, 'errors': errors}))
+
+def child_count(addon, profile, settings, create):
+    _install(addon, profile, settings)
+    import inventory
+    if create and inventory.get_base(BASE_NAME) is None:
+        inventory.commit({"op": "add_base", "name": BASE_NAME})
+    # Base introuvable (inventaire écrasé par un écrivain) : comptée vide
+    print(json.dumps(len((inventory.get_base(BASE_NAME) or {}).get("Brainrots", []))))
+
+# --- Processus parent ---
+def _command(*args):
+    return [sys.executable, os.path.abspath(__file__), '--child', json.dumps(args)]
+
+def _run(*args):
+    proc = subprocess.run(_command(*args), capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip() or 'erreur')
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def stress(addon, profile, settings, writers, count):
+    """Lance `writers` processus de `count` ajouts ; retourne le bilan (dict)"""
+    before = _run('count', addon, profile, settings, True)
+    start = time.perf_counter()
+    procs = [subprocess.Popen(_command('writer', addon, profile, settings, count),
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True) for _ in range(writers)]
+    reports, crashes = [], []
+    for proc in procs:
+        out, err = proc.communicate()
+        if proc.returncode:
+            crashes.append(err.strip().splitlines()[-1] if err.strip() else f"code {proc.returncode}")
+        else:
+            reports.append(json.loads(out.strip().splitlines()[-1]))
+    elapsed = time.perf_counter() - start
+    after = _run('count', addon, profile, settings, False)
+    return {
+        'expected': writers * count, 'stored': after - before, 'confirmed': sum(r['added'] for r in reports),
+        'errors': [e for r in reports for e in r['errors']], 'crashes': crashes, 'ms': round(elapsed * 1000),
+    }
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--commits', type=int, default=25)
+    parser.add_argument('--backends', default='json,sqlite')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, TOOLS_DIR)
+    import kodistubs
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        addon = kodistubs.addon_sandbox(os.path.join(tmp, 'addon'), ADDON_DIR)
+        for backend in args.backends.split(','):
+            settings = {'storage_backend': backend, 'data_path': os.path.join(tmp, 'data'), 'account': f'stress-{backend}'}
+            result = stress(addon, os.path.join(tmp, 'profile'), settings, args.writers, args.commits)
+            ok = (result['stored'] == result['confirmed'] == result['expected']
+                  and not result['errors'] and not result['crashes'])
+            failed |= not ok
+            print(f"{backend:<6} {args.writers} x {args.commits} ajouts en {result['ms']} ms : "
+                  f"{result['stored']}/{result['expected']} enregistrés, {result['confirmed']} confirmés, "
+                  f"{len(result['errors'])} erreur(s), {len(result['crashes'])} plantage(s) - {'OK' if ok else 'ÉCHEC'}")
+            for message in result['errors'][:5] + result['crashes'][:5]:
+                print(f"    {message}")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == '--child':
+        kind, *child_args = json.loads(sys.argv[2])
+        {'writer': child_writer, 'count': child_count}[kind](*child_args)
+    else:
+        sys.exit(main(sys.argv[1:]))
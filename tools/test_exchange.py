@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""Import d'un export JSON Lines : identifiants d'instance en double (voir exchange.py)
+
+usage : python -m unittest discover -s tools   (ou python -m pytest tools)
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import kodistubs
+kodistubs.install_sandbox()
+
+import exchange
+import inventory
+import refdata
+import sqlstore
+
+CATALOG_ID = refdata.get_catalog()[0]["Id"]
+
+def records(*bases):
+    """Enregistrements au format de exchange.read_records : [(nom, [identifiants])]"""
+    for name, ids in bases:
+        yield 'base', name
+        for instance_id in ids:
+            yield 'brainrot', inventory.make_entry(instance_id, CATALOG_ID, "", [])
+
+def write_export(path, *bases):
+    """Fichier d'export JSON Lines réel contenant [(nom, [identifiants])]"""
+    with open(path, 'wb') as f:
+        f.write(exchange._line({"type": "header", "format": exchange.FORMAT, "version": exchange.FORMAT_VERSION}))
+        for kind, value in records(*bases):
+            f.write(exchange._line({"type": "base", "name": value} if kind == 'base' else {"type": "brainrot", **value}))
+    return path
+
+def all_ids(bases):
+    return [e["Id"] for base in bases for e in base["Brainrots"]]
+
+def stored_ids():
+    return [e["Id"] for _, entries in inventory.stream_bases()[1] for e in entries]
+
+class ImportTest(unittest.TestCase):
+    def use_backend(self, backend):
+        self.data = tempfile.mkdtemp(dir=kodistubs.install_sandbox())
+        kodistubs.install_sandbox({'storage_backend': backend, 'data_path': self.data, 'account': 'test'})
+
+    def test_repeated_ids_are_counted_as_duplicates(self):
+        x, y = inventory.new_instance_id(), inventory.new_instance_id()
+        for merge in (True, False):
+            bases = [{"Name": "A", "Brainrots": [inventory.make_entry(y, CATALOG_ID, "", [])]}]
+            added, skipped = exchange.merge_records(bases, records(("A", [x, x]), ("B", [x, y])), merge)
+            self.assertEqual(all_ids(bases), [y, x] if merge else [x, y])
+            self.assertEqual((added, skipped), (1, 3) if merge else (2, 2))
+
+    def test_repeated_ids_are_counted_as_duplicates_in_sqlite(self):
+        self.use_backend('sqlite')
+        x, y = inventory.new_instance_id(), inventory.new_instance_id()
+        inventory.commit({"op": "add_base", "name": "A"})
+        inventory.commit({"op": "add_brainrots", "base": "A", "entries": [inventory.make_entry(y, CATALOG_ID, "", [])]})
+        self.assertEqual(sqlstore.import_records(records(("A", [x, x]), ("B", [x, y])), True), (1, 3))
+        self.assertEqual(stored_ids(), [y, x])
+        self.assertEqual(sqlstore.import_records(records(("A", [x, x]), ("B", [x, y])), False), (2, 2))
+        self.assertEqual(stored_ids(), [x, y])
+
+    def test_repeated_ids_in_a_file_are_counted_as_duplicates(self):
+        x, y = inventory.new_instance_id(), inventory.new_instance_id()
+        for backend in ('json', 'sqlite'):
+            self.use_backend(backend)
+            path = write_export(os.path.join(self.data, 'import.jsonl'), ("A", [x, x]), ("B", [x, y]))
+            self.assertEqual(exchange.import_jsonl(path, merge=False), (2, 2))
+            self.assertEqual(stored_ids(), [x, y])
+            self.assertEqual(exchange.import_jsonl(path), (0, 4))
+            self.assertEqual(stored_ids(), [x, y])
+
+    def test_repeated_legacy_ids_in_a_file_get_distinct_ids(self):
+        self.use_backend('json')
+        path = write_export(os.path.join(self.data, 'import.jsonl'), ("A", ["Tung_Default_"] * 2))
+        self.assertEqual(exchange.import_jsonl(path, merge=False), (2, 0))
+        ids = stored_ids()
+        self.assertEqual(ids, [inventory.legacy_instance_id("A", "Tung_Default_", rank) for rank in (1, 2)])
+        # Réimporter le même ancien export retrouve les mêmes identifiants
+        self.assertEqual(exchange.import_jsonl(path), (0, 2))
+
+    def test_export_round_trip_on_both_backends(self):
+        for backend in ('json', 'sqlite'):
+            self.use_backend(backend)
+            inventory.commit({"op": "add_base", "name": "A"})
+            entries = [inventory.make_entry(inventory.new_instance_id(), CATALOG_ID, "", []) for _ in range(3)]
+            inventory.commit({"op": "add_brainrots", "base": "A", "entries": entries})
+            path = os.path.join(self.data, 'export.jsonl')
+            self.assertEqual(exchange.export_jsonl(path), (1, 3))
+            self.assertEqual(exchange.import_jsonl(path), (0, 3))
+            self.assertEqual(exchange.import_jsonl(path, merge=False), (3, 0))
+            self.assertEqual(stored_ids(), [e["Id"] for e in entries])
+
+if __name__ == '__main__':
+    unittest.main()
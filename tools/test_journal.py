@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""Journal des opérations du stockage JSON : rejeu, repli et annulation (voir journal.py)
+
+usage : python -m unittest discover -s tools   (ou python -m pytest tools)
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import kodistubs
+kodistubs.install_sandbox()
+
+import inventory
+import journal
+import jsonstore
+import refdata
+import safeio
+
+CATALOG_IDS = [b["Id"] for b in refdata.get_catalog()[:3]]
+
+def new_entries(count, catalog_id=CATALOG_IDS[0]):
+    return [inventory.make_entry(inventory.new_instance_id(), catalog_id, "", []) for _ in range(count)]
+
+def ids(base):
+    return [e["Id"] for e in base["Brainrots"]]
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        # Un dossier de données par test : inventaire vide (compte non principal, sans reprise de Bases.json)
+        data = tempfile.mkdtemp(dir=kodistubs.install_sandbox())
+        kodistubs.install_sandbox({'storage_backend': 'json', 'data_path': data, 'account': 'test'})
+
+    def small_journal(self):
+        """Seuils réduits pour déclencher le repli en quelques opérations"""
+        return mock.patch.multiple(journal, COMPACT_SIZE=4096, KEEP_SIZE=2048, KEEP_OPERATIONS=10)
+
+    def bases(self):
+        return {b["Name"]: ids(b) for b in inventory.load_bases()}
+
+    def test_operations_are_replayed_on_the_snapshot(self):
+        first, second = new_entries(3), new_entries(1)
+        inventory.commit({"op": "add_base", "name": "A"})
+        inventory.commit({"op": "add_base", "name": "B"})
+        inventory.commit({"op": "add_brainrots", "base": "A", "entries": first + second})
+        inventory.commit({"op": "move_brainrots", "base": "A", "target": "B", "ids": [first[1]["Id"]]})
+        inventory.commit({"op": "rename_base", "name": "B", "new_name": "C"})
+        inventory.commit({"op": "delete_brainrots", "base": "A", "ids": [second[0]["Id"]]})
+
+        # Rien n'a été replié : l'index est toujours vide, tout vient du journal
+        index, _ = safeio.read_versioned(jsonstore.index_path())
+        self.assertIn(b'"bases":[]', index)
+        self.assertEqual(len(journal.active(journal.read(jsonstore.journal_path())[1])), 6)
+        self.assertEqual(self.bases(), {"A": [first[0]["Id"], first[2]["Id"]], "C": [first[1]["Id"]]})
+        # Lecture partielle : le renommage est suivi jusqu'aux entrées déplacées
+        self.assertEqual(ids(inventory.get_base("C")), [first[1]["Id"]])
+        self.assertEqual(inventory.base_summaries(), [("A", 2), ("C", 1)])
+
+    def test_incomplete_last_line_is_ignored(self):
+        inventory.commit({"op": "add_base", "name": "A"})
+        inventory.commit({"op": "add_brainrots", "base": "A", "entries": new_entries(2)})
+        with open(jsonstore.journal_path(), 'ab') as f:
+            f.write(b'{"seq":3,"op":{"op":"add_ba')  # ajout interrompu
+        self.assertEqual(inventory.base_summaries(), [("A", 2)])
+        inventory.commit({"op": "add_base", "name": "B"})
+        self.assertEqual(inventory.base_summaries(), [("A", 2), ("B", 0)])
+        self.assertEqual([r["seq"] for r in journal.read(jsonstore.journal_path())[1]], [1, 2, 3])
+
+    def test_corrupt_middle_line_keeps_the_operations_before_it(self):
+        first, second = new_entries(2), new_entries(1)
+        inventory.commit({"op": "add_base", "name": "A"})
+        inventory.commit({"op": "add_brainrots", "base": "A", "entries": first})
+        inventory.commit({"op": "add_brainrots", "base": "A", "entries": second})
+        inventory.commit({"op": "add_base", "name": "B"})
+        path = jsonstore.journal_path()
+        with open(path, 'rb') as f:
+            lines = f.read().splitlines(keepends=True)
+        lines[3] = lines[3][:20] + b'\x00' + lines[3][21:]  # un octet abîmé dans le second ajout
+        with open(path, 'wb') as f:
+            f.write(b''.join(lines))
+
+        # Les opérations d'avant la ligne abîmée restent, avec leur historique
+        self.assertEqual(self.bases(), {"A": [e["Id"] for e in first]})
+        self.assertEqual([r["op"]["op"] for r, _ in inventory.history()], ["add_brainrots", "add_base"])
+        # Le prochain ajout reprend après elles, sans vider le journal
+        inventory.commit({"op": "add_base", "name": "C"})
+        self.assertEqual(self.bases(), {"A": [e["Id"] for e in first], "C": []})
+        self.assertEqual([r["seq"] for r in journal.read(path)[1]], [1, 2, 3])
+        self.assertEqual(inventory.undo_last()["op"]["name"], "C")
+        self.assertEqual(inventory.undo_last()["op"]["entries"], first)
+        self.assertEqual(self.bases(), {"A": []})
+
+    def test_compaction_folds_old_operations(self):
+        added = []
+        with self.small_journal():
+            inventory.commit({"op": "add_base", "name": "A"})
+            with mock.patch.object(jsonstore, '_compact', wraps=jsonstore._compact) as compact:
+                for _ in range(40):
+                    added += new_entries(1)
+                    inventory.commit({"op": "add_brainrots", "base": "A", "entries": added[-1:]})
+            self.assertGreater(compact.call_count, 0)
+            self.assertLessEqual(os.path.getsize(jsonstore.journal_path()), journal.COMPACT_SIZE)
+            self.assertLess(len(inventory.history()), 41)
+        self.assertEqual(self.bases(), {"A": [e["Id"] for e in added]})
+        # Le fragment de l'index contient les opérations repliées, le journal le reste
+        index = jsonstore._read_state(())['index']
+        self.assertGreater(index["bases"][0]["Count"], 0)
+        pending = [r for r, _ in inventory.history() if r["op"]["op"] == "add_brainrots"]
+        self.assertEqual(index["bases"][0]["Count"] + len(pending), len(added))
+
+    def test_bulk_operations_do_not_compact_on_every_commit(self):
+        # Chaque ajout groupé pèse ~4 Ko : garder 50 opérations dépasserait COMPACT_SIZE
+        inventory.commit({"op": "add_base", "name": "A"})
+        with mock.patch.object(jsonstore, '_compact', wraps=jsonstore._compact) as compact:
+            for _ in range(60):
+                inventory.commit({"op": "add_brainrots", "base": "A", "entries": new_entries(40)})
+        self.assertLess(compact.call_count, 10)
+        self.assertLessEqual(os.path.getsize(jsonstore.journal_path()), journal.COMPACT_SIZE)
+        self.assertEqual(inventory.base_summaries(), [("A", 2400)])
+
+    def test_undo_across_compaction(self):
+        batches = []
+        with self.small_journal():
+            inventory.commit({"op": "add_base", "name": "A"})
+            for _ in range(30):
+                batches.append(new_entries(1))
+                inventory.commit({"op": "add_brainrots", "base": "A", "entries": batches[-1]})
+            kept = len(inventory.history())
+            self.assertLess(kept, 31)  # des opérations ont été repliées
+            for undone in range(1, kept + 1):
+                record = inventory.undo_last()
+                self.assertEqual(record["op"]["entries"], batches[-undone])
+                self.assertEqual(self.bases()["A"], [e["Id"] for batch in batches[:-undone] for e in batch])
+            # Les opérations repliées dans l'instantané ne s'annulent plus
+            self.assertIsNone(inventory.undo_last())
+            self.assertEqual(len(self.bases()["A"]), 30 - kept)
+            # Une nouvelle opération après les annulations repart de cet état, même repliée plus tard
+            for _ in range(20):
+                inventory.commit({"op": "add_brainrots", "base": "A", "entries": new_entries(1)})
+        self.assertEqual(len(self.bases()["A"]), 50 - kept)
+
+    def test_undo_restores_both_bases_of_a_move(self):
+        entries = new_entries(2)
+        inventory.commit({"op": "add_base", "name": "A"})
+        inventory.commit({"op": "add_base", "name": "B"})
+        inventory.commit({"op": "add_brainrots", "base": "A", "entries": entries})
+        inventory.commit({"op": "move_brainrots", "base": "A", "target": "B", "ids": [entries[0]["Id"]]})
+        self.assertEqual(inventory.undo_last()["op"]["op"], "move_brainrots")
+        self.assertEqual(self.bases(), {"A": [e["Id"] for e in entries], "B": []})
+        self.assertEqual([(r["op"]["op"], undone) for r, undone in inventory.history()][:2],
+                         [("move_brainrots", True), ("add_brainrots", False)])
+        # Annuler une seconde fois vise l'opération active précédente
+        inventory.undo_last()
+        self.assertEqual(self.bases(), {"A": [], "B": []})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""Stockage JSON par fragments : cohérence de l'index et des fragments (voir jsonstore.py)
+
+usage : python -m unittest discover -s tools   (ou python -m pytest tools)
+"""
+import os
+import sys
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import kodistubs
+kodistubs.install_sandbox()
+
+import inventory
+import journal
+import jsonstore
+import refdata
+import safeio
+from paths import account_file
+
+CATALOG_ID = refdata.get_catalog()[0]["Id"]
+
+def new_entries(count):
+    return [inventory.make_entry(inventory.new_instance_id(), CATALOG_ID, "", []) for _ in range(count)]
+
+def compact():
+    """Replie tout le journal dans l'instantané (comme au-delà de journal.COMPACT_SIZE, sans rien garder)"""
+    with safeio.file_lock(jsonstore.index_path()), mock.patch.object(journal, 'KEEP_OPERATIONS', 0):
+        state = jsonstore._read_state(())
+        if state['records']:
+            jsonstore._compact(state['index'], state['records'])
+
+class JsonStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.data = tempfile.mkdtemp(dir=kodistubs.install_sandbox())
+        kodistubs.install_sandbox({'storage_backend': 'json', 'data_path': self.data, 'account': 'test'})
+
+    def index(self):
+        with open(jsonstore.index_path(), 'rb') as f:
+            return json.loads(f.read())["bases"]
+
+    def assertConsistent(self):
+        """Chaque base de l'index désigne un fragment existant, de la bonne taille ; aucun fragment orphelin"""
+        index = self.index()
+        for base in index:
+            with open(account_file(base["File"]), 'rb') as f:
+                self.assertEqual(len(json.loads(f.read())), base["Count"], base["Name"])
+        self.assertEqual(len({b["Name"] for b in index}), len(index))
+        shards = {f"{jsonstore.SHARDS_DIR}/{name}" for name in os.listdir(account_file(jsonstore.SHARDS_DIR))}
+        self.assertEqual(shards, {b["File"] for b in index})
+
+    def test_rename_keeps_the_shard(self):
+        entries = new_entries(3)
+        inventory.commit({"op": "add_base", "name": "A"})
+        inventory.commit({"op": "add_brainrots", "base": "A", "entries": entries})
+        compact()
+        shard = self.index()[0]["File"]
+        inventory.commit({"op": "rename_base", "name": "A", "new_name": "B"})
+        self.assertIsNone(inventory.get_base("A"))
+        self.assertEqual(inventory.get_base("B")["Brainrots"], entries)
+        compact()
+        self.assertEqual(self.index(), [{"Name": "B", "File": shard, "Count": 3}])
+        self.assertConsistent()
+
+    def test_rename_then_write_before_compaction(self):
+        inventory.commit({"op": "add_base", "name": "A"})
+        inventory.commit({"op": "add_brainrots", "base": "A", "entries": new_entries(2)})
+        compact()
+        inventory.commit({"op": "rename_base", "name": "A", "new_name": "B"})
+        added = new_entries(1)
+        inventory.commit({"op": "add_brainrots", "base": "B", "entries": added})
+        self.assertEqual(inventory.get_base("B")["Brainrots"][-1], added[0])
+        self.assertEqual(inventory.base_summaries(), [("B", 3)])
+        compact()
+        self.assertEqual(inventory.base_summaries(), [("B", 3)])
+        self.assertConsistent()
+
+    def test_delete_removes_only_unshared_shards(self):
+        # Deux bases vides partagent le même fragment (empreinte du contenu)
+        for name in ("A", "B", "C"):
+            inventory.commit({"op": "add_base", "name": name})
+        inventory.commit({"op": "add_brainrots", "base": "C", "entries": new_entries(2)})
+        compact()
+        self.assertEqual(self.index()[0]["File"], self.index()[1]["File"])
+        inventory.commit({"op": "delete_base", "name": "A"})
+        inventory.commit({"op": "delete_base", "name": "C"})
+        compact()
+        self.assertEqual([(b["Name"], b["Count"]) for b in self.index()], [("B", 0)])
+        self.assertConsistent()
+
+    def test_deleted_name_can_be_reused(self):
+        inventory.commit({"op": "add_base", "name": "A"})
+        inventory.commit({"op": "add_brainrots", "base": "A", "entries": new_entries(2)})
+        compact()
+        inventory.commit({"op": "delete_base", "name": "A"})
+        inventory.commit({"op": "add_base", "name": "A"})
+        self.assertEqual(inventory.get_base("A")["Brainrots"], [])
+        compact()
+        self.assertEqual(inventory.get_base("A")["Brainrots"], [])
+        self.assertConsistent()
+
+    def test_compaction_rewrites_only_changed_shards(self):
+        inventory.commit({"op": "add_base", "name": "A"})
+        inventory.commit({"op": "add_base", "name": "B"})
+        inventory.commit({"op": "add_brainrots", "base": "A", "entries": new_entries(2)})
+        inventory.commit({"op": "add_brainrots", "base": "B", "entries": new_entries(2)})
+        compact()
+        untouched = os.stat(account_file(self.index()[0]["File"]))
+        inventory.commit({"op": "add_brainrots", "base": "B", "entries": new_entries(1)})
+        compact()
+        self.assertEqual(os.stat(account_file(self.index()[0]["File"])).st_mtime_ns, untouched.st_mtime_ns)
+        self.assertEqual([b["Count"] for b in self.index()], [2, 3])
+        self.assertConsistent()
+
+    def test_move_reads_and_updates_both_shards(self):
+        entries = new_entries(3)
+        inventory.commit({"op": "add_base", "name": "A"})
+        inventory.commit({"op": "add_base", "name": "B"})
+        inventory.commit({"op": "add_brainrots", "base": "A", "entries": entries})
+        compact()
+        inventory.commit({"op": "move_brainrots", "base": "A", "target": "B", "ids": [entries[0]["Id"]]})
+        compact()
+        self.assertEqual(inventory.get_base("B")["Brainrots"], entries[:1])
+        self.assertEqual(inventory.get_base("A")["Brainrots"], entries[1:])
+        self.assertConsistent()
+
+    def test_stale_write_is_refused(self):
+        inventory.commit({"op": "add_base", "name": "A"})
+        bases, version = inventory.read_bases()
+        inventory.commit({"op": "add_base", "name": "B"})
+        self.assertIsNone(inventory.write_bases(bases + [{"Name": "C", "Brainrots": []}], version))
+        self.assertEqual(inventory.base_summaries(), [("A", 0), ("B", 0)])
+        self.assertIsNotNone(inventory.write_bases(bases, jsonstore.version()))
+        self.assertEqual(inventory.base_summaries(), [("A", 0)])
+        self.assertConsistent()
+
+    def test_accounts_are_isolated(self):
+        inventory.commit({"op": "add_base", "name": "A"})
+        version = inventory.version()
+        kodistubs.settings['account'] = 'autre'
+        self.assertEqual(inventory.base_summaries(), [])
+        self.assertNotEqual(inventory.version(), version)
+        inventory.commit({"op": "add_base", "name": "Z"})
+        kodistubs.settings['account'] = 'test'
+        self.assertEqual(inventory.base_summaries(), [("A", 0)])
+
+if __name__ == '__main__':
+    unittest.main()
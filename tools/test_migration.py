@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Migration de l'inventaire : anciennes entrées et identifiants d'instance (inventory.migrate_bases)
+
+usage : python -m unittest discover -s tools   (ou python -m pytest tools)
+"""
+import os
+import sys
+import copy
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import kodistubs
+kodistubs.install_sandbox()
+
+import inventory
+import refdata
+
+CATALOG = refdata.get_catalog()
+MUTATIONS = refdata.get_mutations()
+TRAITS = refdata.get_traits()
+
+def legacy_entry(item, old_id, mutation=None, traits=()):
+    """Entrée à l'ancien format : copie complète de la fiche, mutation et traits embarqués"""
+    entry = dict(item, Id=old_id)
+    entry["Mutation"] = dict(mutation) if mutation else {}
+    entry["Traits"] = [dict(t) for t in traits]
+    return entry
+
+def all_ids(bases):
+    return [e["Id"] for base in bases for e in base["Brainrots"]]
+
+class MigrationTest(unittest.TestCase):
+    def setUp(self):
+        kodistubs.install_sandbox()
+
+    def test_legacy_entries_become_references(self):
+        item = CATALOG[0]
+        bases = [{"Name": "A", "Brainrots": [legacy_entry(item, "old-1", MUTATIONS[0], TRAITS[:2])]}]
+        self.assertTrue(inventory.migrate_bases(bases))
+        entry = bases[0]["Brainrots"][0]
+        self.assertEqual({k: entry[k] for k in ("CatalogId", "Mutation", "Traits")},
+                         {"CatalogId": item["Id"], "Mutation": MUTATIONS[0]["Name"], "Traits": [t["Name"] for t in TRAITS[:2]]})
+        self.assertTrue(inventory.is_instance_id(entry["Id"]))
+        self.assertEqual(set(entry), {"Id", "CatalogId", "Mutation", "Traits"})
+
+    def test_entry_matched_by_image_when_the_name_is_mangled(self):
+        item = CATALOG[1]
+        entry = legacy_entry(dict(item, Name="Nom mal encodÃ©"), "old-1")
+        bases = [{"Name": "A", "Brainrots": [entry]}]
+        inventory.migrate_bases(bases)
+        self.assertEqual(bases[0]["Brainrots"][0]["CatalogId"], item["Id"])
+
+    def test_entry_missing_from_the_catalog_keeps_its_fields(self):
+        orphan = {"Id": "old-1", "Name": "Disparu", "Image": "absent.png", "BaseIncomePerSecond": 12,
+                  "Mutation": {}, "Traits": [], "BaseName": "A"}
+        bases = [{"Name": "A", "Brainrots": [orphan]}]
+        inventory.migrate_bases(bases)
+        entry = bases[0]["Brainrots"][0]
+        self.assertIsNone(entry["CatalogId"])
+        self.assertEqual((entry["Name"], entry["BaseIncomePerSecond"]), ("Disparu", 12))
+        self.assertNotIn("BaseName", entry)
+
+    def test_duplicate_legacy_ids_get_distinct_stable_ids(self):
+        # Les anciennes versions dérivaient l'identifiant de la configuration : doublons dans une base
+        item = CATALOG[0]
+        bases = [{"Name": "A", "Brainrots": [legacy_entry(item, "Tung_Default_") for _ in range(3)]},
+                 {"Name": "B", "Brainrots": [legacy_entry(item, "Tung_Default_")]}]
+        again = copy.deepcopy(bases)
+        inventory.migrate_bases(bases)
+        ids = all_ids(bases)
+        self.assertEqual(len(set(ids)), 4)
+        self.assertTrue(all(inventory.is_instance_id(i) for i in ids))
+        # Même résultat dans un autre processus ou pour un ancien export migré plus tard
+        inventory.migrate_bases(again)
+        self.assertEqual(all_ids(again), ids)
+        self.assertEqual(ids[0], inventory.legacy_instance_id("A", "Tung_Default_", 1))
+
+    def test_duplicate_instance_ids_across_bases(self):
+        # Copie manuelle d'une base : le premier exemplaire garde son identifiant
+        entry = inventory.make_entry(inventory.new_instance_id(), CATALOG[0]["Id"], "", [])
+        other = inventory.make_entry(inventory.new_instance_id(), CATALOG[1]["Id"], "", [])
+        bases = [{"Name": "A", "Brainrots": [dict(entry), dict(other)]}, {"Name": "B", "Brainrots": [dict(entry)]}]
+        self.assertTrue(inventory.migrate_bases(bases))
+        self.assertEqual(all_ids(bases)[:2], [entry["Id"], other["Id"]])
+        self.assertNotEqual(all_ids(bases)[2], entry["Id"])
+        self.assertEqual(len(set(all_ids(bases))), 3)
+
+    def test_migrated_inventory_is_left_unchanged(self):
+        bases = [{"Name": "A", "Brainrots": [legacy_entry(CATALOG[0], "x"), legacy_entry(CATALOG[0], "x")]}]
+        inventory.migrate_bases(bases)
+        migrated = copy.deepcopy(bases)
+        self.assertFalse(inventory.migrate_bases(bases))
+        self.assertEqual(bases, migrated)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""Planificateur d'achats (planner.py) comparé à une recherche exhaustive
+
+usage : python -m unittest discover -s tools   (ou python -m pytest tools)
+"""
+import os
+import sys
+import random
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import kodistubs
+kodistubs.install_sandbox()
+
+import planner
+
+def best_income(items, budget, slots=None):
+    """Optimum exact (coûts entiers) : meilleur revenu pour chaque budget et nombre d'achats"""
+    max_slots = slots if slots is not None else budget
+    best = [[0.0] * (budget + 1) for _ in range(max_slots + 1)]
+    for n in range(1, max_slots + 1):
+        for b in range(budget + 1):
+            value = best[n - 1][b]
+            for cost, income, _ in items:
+                if 0 < cost <= b:
+                    value = max(value, best[n - 1][b - cost] + income)
+            best[n][b] = value
+    return best[max_slots][budget]
+
+def random_items(rng, count, max_cost):
+    return [(rng.randint(1, max_cost), float(rng.randint(1, 100)), f"k{i}") for i in range(count)]
+
+class PlannerTest(unittest.TestCase):
+    def check_plan(self, items, budget, slots, counts, spent, income):
+        costs = {key: cost for cost, _, key in items}
+        incomes = {key: value for _, value, key in items}
+        self.assertEqual(spent, sum(costs[k] * n for k, n in counts.items()))
+        self.assertAlmostEqual(income, sum(incomes[k] * n for k, n in counts.items()))
+        self.assertLessEqual(spent, budget)
+        if slots is not None:
+            self.assertLessEqual(sum(counts.values()), slots)
+
+    def test_pareto_front_drops_dominated_items(self):
+        items = [(10, 5.0, 'a'), (12, 5.0, 'b'), (8, 6.0, 'c'), (30, 20.0, 'd'), (50, 1.0, 'e'), (200, 99.0, 'f')]
+        self.assertEqual([key for _, _, key in planner.pareto_front(items, 100)], ['c', 'd'])
+
+    def test_degenerate_inputs(self):
+        items = [(10, 5.0, 'a')]
+        self.assertEqual(planner.plan(items, 0), (planner.Counter(), 0, 0.0))
+        self.assertEqual(planner.plan(items, 100, slots=0), (planner.Counter(), 0, 0.0))
+        self.assertEqual(planner.plan(items, 5), (planner.Counter(), 0, 0.0))
+        self.assertEqual(planner.plan([(0, 5.0, 'free'), (10, 0.0, 'useless')], 100), (planner.Counter(), 0, 0.0))
+
+    def test_unbounded_matches_exhaustive_search(self):
+        # Résolution = budget : paliers de coût d'une unité, le programme dynamique est exact
+        rng = random.Random(1)
+        for _ in range(60):
+            items = random_items(rng, rng.randint(1, 8), 40)
+            budget = rng.randint(1, 120)
+            counts, spent, income = planner.plan(items, budget, resolution=budget)
+            self.check_plan(items, budget, None, counts, spent, income)
+            self.assertAlmostEqual(income, best_income(items, budget), msg=(items, budget))
+
+    def test_slot_limit_matches_exhaustive_search(self):
+        rng = random.Random(2)
+        for _ in range(60):
+            items = random_items(rng, rng.randint(1, 8), 40)
+            budget, slots = rng.randint(1, 120), rng.randint(1, 6)
+            counts, spent, income = planner.plan(items, budget, slots, resolution=budget)
+            self.check_plan(items, budget, slots, counts, spent, income)
+            self.assertAlmostEqual(income, best_income(items, budget, slots), msg=(items, budget, slots))
+
+    def test_coarse_resolution_stays_close_to_the_optimum(self):
+        # Résolution par défaut sur de grands budgets : paliers arrondis, résultat toujours valide
+        rng = random.Random(3)
+        for slots in (None, 3):
+            for _ in range(20):
+                items = [(cost * 1000, value, key) for cost, value, key in random_items(rng, 6, 40)]
+                budget = rng.randint(40, 120) * 1000
+                counts, spent, income = planner.plan(items, budget, slots, resolution=50)
+                self.check_plan(items, budget, slots, counts, spent, income)
+                exact = best_income([(c // 1000, v, k) for c, v, k in items], budget // 1000, slots)
+                self.assertGreaterEqual(income, 0.9 * exact)
+
+if __name__ == '__main__':
+    unittest.main()
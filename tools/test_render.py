@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Cache des lignes possédées (render.owned_rows) : ajouts en fin de fichier, purge à chaque nouvel inventaire
+
+usage : python -m unittest discover -s tools   (ou python -m pytest tools)
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import kodistubs
+kodistubs.install_sandbox()
+
+import inventory
+import refdata
+import render
+import safeio
+from paths import profile_file
+
+ITEMS = refdata.get_catalog()[:4]
+
+def entries(*items):
+    return [inventory.make_entry(inventory.new_instance_id(), item["Id"], "", []) for item in items]
+
+class OwnedRowsCacheTest(unittest.TestCase):
+    def setUp(self):
+        data = tempfile.mkdtemp(dir=kodistubs.install_sandbox())
+        kodistubs.install_sandbox({'storage_backend': 'json', 'data_path': data, 'account': 'test'})
+        try:
+            os.remove(profile_file(render.OWNED_ROWS_NAME))
+        except FileNotFoundError:
+            pass
+
+    def cached(self):
+        return sorted(key[0] for key in render._read_owned(render._owned_signature())[1])
+
+    def render(self, rows):
+        """owned_rows(rows) : True si le fichier a été réécrit en entier"""
+        with mock.patch.object(safeio, 'atomic_write', wraps=safeio.atomic_write) as write:
+            render.owned_rows(rows)
+        return write.called
+
+    def test_new_rows_are_appended_within_an_inventory_version(self):
+        inventory.commit({"op": "add_base", "name": "A"})
+        first, second = entries(ITEMS[0]), entries(ITEMS[1])
+        inventory.commit({"op": "add_brainrots", "base": "A", "entries": first + second})
+        self.assertTrue(self.render(first))
+        size = os.path.getsize(profile_file(render.OWNED_ROWS_NAME))
+        self.assertFalse(self.render(second))
+        self.assertGreater(os.path.getsize(profile_file(render.OWNED_ROWS_NAME)), size)
+        self.assertFalse(self.render(first + second))
+        self.assertEqual(self.cached(), sorted([ITEMS[0]["Id"], ITEMS[1]["Id"]]))
+
+    def test_new_inventory_drops_the_rows_no_longer_owned(self):
+        inventory.commit({"op": "add_base", "name": "A"})
+        inventory.commit({"op": "add_base", "name": "B"})
+        old, kept = entries(ITEMS[0]), entries(ITEMS[1])
+        inventory.commit({"op": "add_brainrots", "base": "A", "entries": old})
+        inventory.commit({"op": "add_brainrots", "base": "B", "entries": kept})
+        render.owned_rows(old + kept)
+        inventory.commit({"op": "delete_base", "name": "A"})
+        added = entries(ITEMS[2])
+        inventory.commit({"op": "add_brainrots", "base": "B", "entries": added})
+        self.assertTrue(self.render(added))
+        self.assertEqual(self.cached(), sorted([ITEMS[1]["Id"], ITEMS[2]["Id"]]))
+
+    def test_interrupted_append_keeps_earlier_rows(self):
+        inventory.commit({"op": "add_base", "name": "A"})
+        first, second = entries(ITEMS[0]), entries(ITEMS[1])
+        inventory.commit({"op": "add_brainrots", "base": "A", "entries": first + second})
+        render.owned_rows(first)
+        render.owned_rows(second)
+        path = profile_file(render.OWNED_ROWS_NAME)
+        with open(path, 'rb+') as f:
+            f.truncate(os.path.getsize(path) - 3)
+        version, rows = render._read_owned(render._owned_signature())
+        self.assertIsNone(version)
+        self.assertEqual([key[0] for key in rows], [ITEMS[0]["Id"]])
+        # La ligne perdue est recalculée et le fichier réécrit proprement
+        self.assertTrue(self.render(second))
+        self.assertEqual(self.cached(), sorted([ITEMS[0]["Id"], ITEMS[1]["Id"]]))
+        self.assertIsNotNone(render._read_owned(render._owned_signature())[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""Index de recherche : une source par fichier, une base possédée réindexée seulement si elle change (voir search.py)
+
+usage : python -m unittest discover -s tools   (ou python -m pytest tools)
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import kodistubs
+kodistubs.install_sandbox()
+
+import inventory
+import refdata
+import search
+from paths import profile_file
+
+ITEM = refdata.get_catalog()[0]
+
+def new_entries(count):
+    return [inventory.make_entry(inventory.new_instance_id(), ITEM["Id"], "", []) for _ in range(count)]
+
+class SearchIndexTest(unittest.TestCase):
+    def setUp(self):
+        data = tempfile.mkdtemp(dir=kodistubs.install_sandbox())
+        kodistubs.install_sandbox({'storage_backend': 'json', 'data_path': data, 'account': 'test'})
+        for source in search.SOURCES:
+            try:
+                os.remove(profile_file(search.INDEX_NAME.format(source)))
+            except FileNotFoundError:
+                pass
+        search._indexes.clear()
+
+    def written(self, fn, *args):
+        """Index réécrits pendant fn(*args) : noms des sources et des bases possédées"""
+        parts = {search._part_path(b): b for b, _ in inventory.base_summaries()}
+        with mock.patch.object(search, '_write', wraps=search._write) as write:
+            fn(*args)
+        parts.update({search._part_path(b): b for b, _ in inventory.base_summaries()})
+        return sorted(parts.get(c.args[0], os.path.basename(c.args[0])) for c in write.call_args_list)
+
+    def reload(self):
+        """Nouvel appel du greffon : index relus depuis le profil"""
+        search._indexes.clear()
+        search.load_index()
+
+    def test_inventory_change_reindexes_only_the_changed_bases(self):
+        inventory.commit({"op": "add_base", "name": "A"})
+        inventory.commit({"op": "add_base", "name": "B"})
+        self.assertEqual(self.written(self.reload),
+                         ["A", "B", "search.catalog.index", "search.owned.index", "search.traits.index"])
+        self.assertEqual(self.written(self.reload), [])
+        # Chaque action ne réécrit que les bases qu'elle touche, et l'index reste à jour
+        self.assertEqual(self.written(inventory.commit, {"op": "add_base", "name": "Zone Alpha"}),
+                         ["Zone Alpha", "search.owned.index"])
+        added = new_entries(2)
+        self.assertEqual(self.written(inventory.commit, {"op": "add_brainrots", "base": "Zone Alpha", "entries": added}),
+                         ["Zone Alpha", "search.owned.index"])
+        self.assertEqual(self.written(inventory.commit, {"op": "move_brainrots", "base": "Zone Alpha",
+                                                         "target": "A", "ids": [added[0]["Id"]]}),
+                         ["A", "Zone Alpha", "search.owned.index"])
+        self.assertEqual(self.written(inventory.commit, {"op": "rename_base", "name": "B", "new_name": "Zone Beta"}),
+                         ["Zone Beta", "search.owned.index"])
+        self.assertEqual(self.written(inventory.commit, {"op": "delete_base", "name": "A"}), ["search.owned.index"])
+        self.assertEqual(self.written(self.reload), [])
+        self.assertEqual(search.query("zone", sources=('owned',)), [('owned', ("Zone Alpha", added[1]["Id"]))])
+        self.assertEqual(sorted(os.listdir(profile_file(search.OWNED_DIR))),
+                         sorted(os.path.basename(search._part_path(b)) for b in ("Zone Alpha", "Zone Beta")))
+
+    def test_change_outside_commit_rebuilds_the_owned_index(self):
+        inventory.commit({"op": "add_base", "name": "A"})
+        self.reload()
+        inventory.commit({"op": "add_brainrots", "base": "A", "entries": new_entries(1)})
+        inventory.undo_last()  # sans delta appliqué à l'index
+        self.assertEqual(self.written(self.reload), ["A", "search.owned.index"])
+        self.assertEqual(search.query(ITEM["Name"], sources=('owned',)), [])
+
+    def test_catalog_search_does_not_read_the_inventory(self):
+        with mock.patch.object(inventory, 'version', side_effect=AssertionError), \
+             mock.patch.object(inventory, 'load_all_bases', side_effect=AssertionError):
+            results = search.query(ITEM["Name"], sources=('catalog',))
+        self.assertIn(('catalog', 0), results)
+
+if __name__ == '__main__':
+    unittest.main()